@@ -1,24 +1,195 @@
 import os
+import logging
+from contextvars import ContextVar
+from functools import wraps
 from pymongo import AsyncMongoClient
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.read_preferences import Nearest, PrimaryPreferred, Secondary, SecondaryPreferred
 from beanie import init_beanie
+from beanie.odm.utils.encoder import Encoder
 from dotenv import load_dotenv
 
-from models import Autor, Declarante, BoletimOcorrencia
+from config.monitoramento import metricas_pool, rastreador_comandos
+from config.settings import database_settings
+from models import Autor, Declarante, BoletimOcorrencia, RankingAutor, RankingDeclarante, EstatisticaDiaria, HistoricoBoletim, TokenRetomada
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 client: AsyncMongoClient | None = None
+analytics_client: AsyncMongoClient | None = None
+
+_leitura_analitica: ContextVar[bool] = ContextVar("leitura_analitica", default=False)
+
+_PREFERENCIAS_SECUNDARIAS = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
 
 async def init_db():
-    global client
-    client = AsyncMongoClient(os.getenv("MONGODB_URL"))
-    db_name = os.getenv("DB_NAME")
+    global client, analytics_client
+    client = AsyncMongoClient(
+        database_settings.url,
+        event_listeners=[metricas_pool, rastreador_comandos],
+        **database_settings.client_kwargs()
+    )
+    if database_settings.analytics_url:
+        analytics_client = AsyncMongoClient(
+            database_settings.analytics_url,
+            event_listeners=[metricas_pool, rastreador_comandos],
+            **database_settings.client_kwargs()
+        )
 
     await init_beanie(
-        database=client[db_name],
+        database=client[database_settings.db_name],
         document_models=[
             Autor,
             Declarante,
-            BoletimOcorrencia
+            BoletimOcorrencia,
+            RankingAutor,
+            RankingDeclarante,
+            EstatisticaDiaria,
+            HistoricoBoletim,
+            TokenRetomada
         ]
     )
+
+    if os.getenv("VERIFICAR_PLANOS", "true").lower() != "false":
+        await verificar_planos_de_execucao()
+
+
+async def close_db():
+    """
+    Fecha o cliente do MongoDB, devolvendo as conexões do pool ao encerrar a aplicação.
+    """
+    global client, analytics_client
+    if analytics_client is not None:
+        await analytics_client.close()
+        analytics_client = None
+    if client is not None:
+        await client.close()
+        client = None
+
+
+def consulta_analitica(metodo):
+    """
+    Marca um método de serviço como analítico: as leituras feitas com colecao_leitura/agregar
+    dentro dele vão para a conexão analítica (ou para secundários), e não para o primário.
+    """
+    @wraps(metodo)
+    async def envoltorio(*args, **kwargs):
+        token = _leitura_analitica.set(True)
+        try:
+            return await metodo(*args, **kwargs)
+        finally:
+            _leitura_analitica.reset(token)
+
+    return envoltorio
+
+
+def _preferencia_analitica():
+    classe = _PREFERENCIAS_SECUNDARIAS.get(database_settings.analytics_read_preference, SecondaryPreferred)
+    staleness = database_settings.analytics_max_staleness_s
+    return classe(max_staleness=staleness if staleness is not None else -1)
+
+
+def colecao_leitura(modelo, analitica: bool | None = None) -> AsyncCollection:
+    """
+    Escolhe a coleção usada para uma leitura: primário para CRUD, réplica/conexão analítica para consultas analíticas.
+
+    :param modelo: Documento do Beanie consultado.
+    :param analitica: Força o roteamento; por padrão segue a marcação de consulta_analitica.
+    :return: Coleção do pymongo com a read preference adequada.
+    """
+    colecao = modelo.get_pymongo_collection()
+    if analitica is None:
+        analitica = _leitura_analitica.get()
+    if not analitica:
+        return colecao
+    if analytics_client is not None:
+        colecao = analytics_client[database_settings.db_name][colecao.name]
+    return colecao.with_options(read_preference=_preferencia_analitica())
+
+
+async def agregar(modelo, pipeline: list[dict]) -> list[dict]:
+    """
+    Executa um pipeline de agregação respeitando o roteamento de leitura (ver colecao_leitura).
+
+    :param modelo: Documento do Beanie sobre cuja coleção o pipeline roda.
+    :param pipeline: Estágios da agregação.
+    :return: Documentos resultantes.
+    """
+    cursor = await colecao_leitura(modelo).aggregate(pipeline)
+    return await cursor.to_list()
+
+
+def _planeja_collscan(plano) -> bool:
+    """
+    Percorre recursivamente a saída do explain procurando estágios COLLSCAN.
+
+    :param plano: Documento (ou parte dele) retornado pelo explain.
+    :return: True se algum estágio do plano for um COLLSCAN.
+    """
+    if isinstance(plano, dict):
+        if plano.get("stage") == "COLLSCAN":
+            return True
+        return any(_planeja_collscan(valor) for valor in plano.values())
+    if isinstance(plano, list):
+        return any(_planeja_collscan(valor) for valor in plano)
+    return False
+
+
+async def explicar(modelo, pipeline: list[dict], verbosity: str = "queryPlanner") -> dict:
+    """
+    Executa o comando explain de um pipeline de agregação, respeitando o roteamento de leitura.
+
+    Com verbosity "executionStats" o pipeline é de fato executado pelo servidor para medir o tempo.
+
+    :param modelo: Documento do Beanie sobre cuja coleção o pipeline roda.
+    :param pipeline: Estágios da agregação.
+    :param verbosity: Nível de detalhe do explain (queryPlanner, executionStats, allPlansExecution).
+    :return: Documento retornado pelo explain.
+    """
+    colecao = colecao_leitura(modelo)
+    return await colecao.database.command(
+        {
+            "explain": {
+                "aggregate": colecao.name,
+                "pipeline": Encoder().encode(pipeline),
+                "cursor": {}
+            },
+            "verbosity": verbosity
+        },
+        read_preference=colecao.read_preference
+    )
+
+
+async def verificar_planos_de_execucao():
+    """
+    Executa explain() em todos os pipelines dos serviços e registra um aviso quando algum planeja um COLLSCAN.
+    """
+    from service.autor import AutorService
+    from service.boletim import BoletimService
+    from service.declarante import DeclaranteService
+    from service.estatistica import EstatisticaService
+
+    pipelines = [
+        *AutorService().pipelines_para_explain(),
+        *BoletimService().pipelines_para_explain(),
+        *DeclaranteService().pipelines_para_explain(),
+        *EstatisticaService().pipelines_para_explain(),
+    ]
+
+    for modelo, pipeline in pipelines:
+        colecao = modelo.get_collection_name()
+        try:
+            plano = await explicar(modelo, pipeline)
+        except Exception as e:
+            logger.warning("Não foi possível executar explain em %s: %s", colecao, e)
+            continue
+
+        if _planeja_collscan(plano):
+            logger.warning("Pipeline em %s planeja COLLSCAN: %s", colecao, pipeline)
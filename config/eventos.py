@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from models import TokenRetomada
+
+logger = logging.getLogger(__name__)
+
+Tratador = Callable[[list[dict]], Awaitable[None]]
+
+# Tokens que o servidor não consegue mais retomar (fora do oplog ou inválidos): recomeça do momento atual.
+_CODIGOS_TOKEN_PERDIDO = {260, 280, 286}
+_OPERACOES = ["insert", "update", "replace", "delete"]
+
+
+class BarramentoEventos:
+    """
+    Acompanha os change streams do MongoDB e entrega os eventos, em lotes, aos tratadores registrados.
+
+    Cada coleção tem uma tarefa leitora e uma despachante ligadas por uma fila limitada: quando os
+    tratadores ficam para trás a fila enche e a leitura do stream pausa (back-pressure), sem perder
+    eventos. O token de retomada do último evento de cada lote é gravado em TokenRetomada depois que
+    todos os tratadores terminam, então, após um reinício, a leitura continua de onde parou e um lote
+    pode ser entregue mais de uma vez: os tratadores devem ser idempotentes. Há um único token por
+    prefixo e coleção, compartilhado pelos processos que usam o mesmo prefixo.
+
+    Change streams exigem replica set (um nó único basta); num servidor standalone o barramento não inicia.
+    """
+
+    def __init__(self, prefixo: str, tamanho_lote: int, intervalo_lote_ms: int, fila_maxima: int):
+        self.prefixo = prefixo
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_lote = intervalo_lote_ms / 1000
+        self.fila_maxima = fila_maxima
+        self._tratadores: dict[type, list[Tratador]] = defaultdict(list)
+        self._tarefas: list[asyncio.Task] = []
+        self._filas: dict[str, asyncio.Queue] = {}
+        self.eventos = defaultdict(int)
+        self.lotes = defaultdict(int)
+        self.falhas = defaultdict(int)
+
+    def assinar(self, modelo: type, tratador: Tratador):
+        """
+        Registra um tratador para os eventos da coleção de um documento do Beanie.
+
+        :param modelo: Documento cuja coleção é acompanhada.
+        :param tratador: Função assíncrona que recebe a lista de eventos do lote.
+        """
+        if tratador not in self._tratadores[modelo]:
+            self._tratadores[modelo].append(tratador)
+
+    async def iniciar(self, client) -> bool:
+        """
+        Abre um change stream por coleção com tratadores registrados.
+
+        :param client: Cliente do MongoDB usado para conferir se o servidor é um replica set.
+        :return: False se o servidor não suporta change streams.
+        """
+        if self._tarefas or not self._tratadores:
+            return bool(self._tarefas)
+
+        try:
+            hello = await client.admin.command("hello")
+        except PyMongoError as e:
+            logger.warning("Barramento de eventos não iniciado, servidor indisponível: %s", e)
+            return False
+        if "setName" not in hello and hello.get("msg") != "isdbgrid":
+            logger.warning("Barramento de eventos não iniciado: change streams exigem replica set")
+            return False
+
+        for modelo, tratadores in self._tratadores.items():
+            colecao = modelo.get_pymongo_collection()
+            fila: asyncio.Queue = asyncio.Queue(maxsize=self.fila_maxima)
+            self._filas[colecao.name] = fila
+            self._tarefas.append(asyncio.create_task(self._ler(colecao, fila), name=f"change-stream:{colecao.name}"))
+            self._tarefas.append(asyncio.create_task(self._despachar(colecao.name, fila, tratadores), name=f"despacho:{colecao.name}"))
+        return True
+
+    async def parar(self):
+        """
+        Cancela as tarefas do barramento; os eventos ainda na fila serão relidos a partir do último token gravado.
+        """
+        for tarefa in self._tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*self._tarefas, return_exceptions=True)
+        self._tarefas.clear()
+        self._filas.clear()
+
+    def _stream(self, colecao: str) -> str:
+        return f"{self.prefixo}:{colecao}"
+
+    async def _token(self, colecao: str) -> dict | None:
+        documento = await TokenRetomada.get_pymongo_collection().find_one({"stream": self._stream(colecao)}, {"token": 1})
+        return documento["token"] if documento else None
+
+    async def _gravar_token(self, colecao: str, token: dict):
+        await TokenRetomada.get_pymongo_collection().update_one(
+            {"stream": self._stream(colecao)},
+            {"$set": {"token": token, "atualizado_em": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    async def _ler(self, colecao, fila: asyncio.Queue):
+        espera = 1.0
+        token = None
+        carregado = False
+        while True:
+            try:
+                if not carregado:
+                    token, carregado = await self._token(colecao.name), True
+                async with await colecao.watch(
+                    [{"$match": {"operationType": {"$in": _OPERACOES}}}],
+                    start_after=token,
+                ) as stream:
+                    espera = 1.0
+                    async for evento in stream:
+                        # put() aguarda enquanto a fila estiver cheia: o cursor só avança quando os tratadores consomem.
+                        await fila.put(evento)
+                        token = evento["_id"]
+                    # Stream encerrado pelo servidor (coleção removida ou renomeada): reabre depois do evento de invalidação.
+                    token = stream.resume_token or token
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code not in _CODIGOS_TOKEN_PERDIDO:
+                    logger.warning("Change stream de %s falhou, reabrindo em %.0fs: %s", colecao.name, espera, e)
+                else:
+                    logger.warning("Token de retomada de %s perdido, eventos anteriores a agora foram ignorados: %s", colecao.name, e)
+                    token = None
+                    continue
+            except PyMongoError as e:
+                logger.warning("Change stream de %s interrompido, reabrindo em %.0fs: %s", colecao.name, espera, e)
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, 30.0)
+
+    async def _proximo_lote(self, fila: asyncio.Queue) -> list[dict]:
+        lote = [await fila.get()]
+        limite = time.monotonic() + self.intervalo_lote
+        while len(lote) < self.tamanho_lote:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(fila.get(), restante))
+            except asyncio.TimeoutError:
+                break
+        return lote
+
+    async def _despachar(self, colecao: str, fila: asyncio.Queue, tratadores: list[Tratador]):
+        while True:
+            lote = await self._proximo_lote(fila)
+            resultados = await asyncio.gather(*(tratador(lote) for tratador in tratadores), return_exceptions=True)
+            for tratador, resultado in zip(tratadores, resultados):
+                if isinstance(resultado, Exception):
+                    self.falhas[colecao] += 1
+                    nome = getattr(tratador, "__qualname__", tratador)
+                    logger.error("Tratador %s falhou em %d eventos de %s", nome, len(lote), colecao, exc_info=resultado)
+
+            self.eventos[colecao] += len(lote)
+            self.lotes[colecao] += 1
+            try:
+                await self._gravar_token(colecao, lote[-1]["_id"])
+            except PyMongoError as e:
+                logger.warning("Falha ao gravar o token de retomada de %s: %s", colecao, e)
+
+    def metricas(self) -> dict:
+        return {
+            "ativo": any(not tarefa.done() for tarefa in self._tarefas),
+            "eventos": dict(self.eventos),
+            "lotes": dict(self.lotes),
+            "falhas": dict(self.falhas),
+            "pendentes": {colecao: fila.qsize() for colecao, fila in self._filas.items()},
+        }
+
+
+barramento_eventos = BarramentoEventos(
+    os.getenv("EVENTOS_PREFIXO", "api"),
+    int(os.getenv("EVENTOS_TAMANHO_LOTE", "100")),
+    int(os.getenv("EVENTOS_INTERVALO_LOTE_MS", "200")),
+    int(os.getenv("EVENTOS_FILA_MAXIMA", "1000")),
+)
@@ -0,0 +1,344 @@
+import inspect
+import logging
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+
+from bson import json_util
+from fastapi.routing import APIRoute
+from pymongo import monitoring
+
+
+class MetricasPool(monitoring.ConnectionPoolListener):
+    """
+    Coleta métricas do pool de conexões do pymongo (checkouts, espera e conexões abertas) por processo.
+    """
+
+    def __init__(self):
+        self.conexoes_abertas = 0
+        self.conexoes_em_uso = 0
+        self.checkouts = 0
+        self.checkouts_falhos = Counter()
+        self.espera_total_segundos = 0.0
+        self.espera_maxima_segundos = 0.0
+        self.pools_limpos = 0
+
+    def _registrar_espera(self, duracao: float | None):
+        if duracao is None:
+            return
+        self.espera_total_segundos += duracao
+        self.espera_maxima_segundos = max(self.espera_maxima_segundos, duracao)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pools_limpos += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.conexoes_abertas += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.conexoes_abertas -= 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkouts_falhos[str(event.reason)] += 1
+        self._registrar_espera(event.duration)
+
+    def connection_checked_out(self, event):
+        self.checkouts += 1
+        self.conexoes_em_uso += 1
+        self._registrar_espera(event.duration)
+
+    def connection_checked_in(self, event):
+        self.conexoes_em_uso -= 1
+
+    def metricas(self) -> dict:
+        return {
+            "conexoes_abertas": self.conexoes_abertas,
+            "conexoes_em_uso": self.conexoes_em_uso,
+            "checkouts": self.checkouts,
+            "checkouts_falhos": dict(self.checkouts_falhos),
+            "espera_media_ms": 1000 * self.espera_total_segundos / self.checkouts if self.checkouts else 0.0,
+            "espera_maxima_ms": 1000 * self.espera_maxima_segundos,
+            "pools_limpos": self.pools_limpos,
+        }
+
+
+metricas_pool = MetricasPool()
+
+
+LIMITES_DURACAO_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_COMANDOS = (1, 2, 3, 5, 10, 20, 50, 100)
+LIMITE_REQUISICAO_LENTA_MS = float(os.getenv("LIMITE_REQUISICAO_LENTA_MS", "500"))
+MAXIMO_COMANDOS_REGISTRADOS = 50
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MedicaoRequisicao:
+    """
+    Acumula o que aconteceu durante uma requisição: comandos do MongoDB, documentos retornados e o
+    instante em que o endpoint terminou (a partir dele, o tempo gasto na serialização da resposta).
+    """
+    inicio: float
+    comandos: int = 0
+    tempo_mongo: float = 0.0
+    documentos: int = 0
+    fim_endpoint: float | None = None
+    serializacao: float | None = None
+    detalhes_comandos: list[dict] = field(default_factory=list)
+
+
+_medicao_atual: ContextVar[MedicaoRequisicao | None] = ContextVar("medicao_atual", default=None)
+
+
+def _documentos_na_resposta(resposta) -> int:
+    cursor = resposta.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if resposta.get("value") is not None:
+        return 1
+    return 0
+
+
+class RastreadorComandos(monitoring.CommandListener):
+    """
+    Atribui cada comando enviado ao MongoDB à requisição HTTP em andamento (via contextvar),
+    somando quantidade, tempo e documentos retornados.
+    """
+
+    def __init__(self):
+        self._pendentes: dict[int, dict] = {}
+
+    def started(self, event):
+        medicao = _medicao_atual.get()
+        if medicao is None or len(medicao.detalhes_comandos) >= MAXIMO_COMANDOS_REGISTRADOS:
+            return
+        comando = event.command
+        detalhe = {"comando": event.command_name, "colecao": comando.get(event.command_name)}
+        for chave in ("pipeline", "filter", "query", "updates", "q"):
+            if chave in comando:
+                detalhe[chave] = comando[chave]
+        self._pendentes[event.request_id] = detalhe
+        medicao.detalhes_comandos.append(detalhe)
+
+    def _concluir(self, event, documentos: int):
+        medicao = _medicao_atual.get()
+        detalhe = self._pendentes.pop(event.request_id, None)
+        if medicao is None:
+            return
+        duracao = event.duration_micros / 1_000_000
+        medicao.comandos += 1
+        medicao.tempo_mongo += duracao
+        medicao.documentos += documentos
+        if detalhe is not None:
+            detalhe["duracao_ms"] = round(duracao * 1000, 3)
+
+    def succeeded(self, event):
+        self._concluir(event, _documentos_na_resposta(event.reply))
+
+    def failed(self, event):
+        self._concluir(event, 0)
+
+
+class Histograma:
+    """
+    Histograma cumulativo no formato do Prometheus, com uma série por combinação de rótulos.
+    """
+
+    def __init__(self, nome: str, descricao: str, rotulos: tuple[str, ...], limites: tuple[float, ...]):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self.limites = limites
+        self._series: dict[tuple, list] = {}
+
+    def observar(self, valores_rotulos: tuple, valor: float):
+        serie = self._series.setdefault(valores_rotulos, [[0] * len(self.limites), 0.0, 0])
+        for i, limite in enumerate(self.limites):
+            if valor <= limite:
+                serie[0][i] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def exportar(self) -> list[str]:
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} histogram"]
+        for valores_rotulos, (contagens, soma, total) in sorted(self._series.items()):
+            rotulos = _formatar_rotulos(self.rotulos, valores_rotulos)
+            separador = "," if rotulos else ""
+            for limite, contagem in zip(self.limites, contagens):
+                linhas.append(f'{self.nome}_bucket{{{rotulos}{separador}le="{limite}"}} {contagem}')
+            linhas.append(f'{self.nome}_bucket{{{rotulos}{separador}le="+Inf"}} {total}')
+            linhas.append(f"{self.nome}_sum{{{rotulos}}} {soma}")
+            linhas.append(f"{self.nome}_count{{{rotulos}}} {total}")
+        return linhas
+
+
+class Contador:
+    """
+    Contador monotônico no formato do Prometheus, com uma série por combinação de rótulos.
+    """
+
+    def __init__(self, nome: str, descricao: str, rotulos: tuple[str, ...]):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = rotulos
+        self._series: Counter = Counter()
+
+    def incrementar(self, valores_rotulos: tuple, valor: float = 1):
+        self._series[valores_rotulos] += valor
+
+    def exportar(self) -> list[str]:
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} counter"]
+        for valores_rotulos, valor in sorted(self._series.items()):
+            linhas.append(f"{self.nome}{{{_formatar_rotulos(self.rotulos, valores_rotulos)}}} {valor}")
+        return linhas
+
+
+def _formatar_rotulos(nomes: tuple[str, ...], valores: tuple) -> str:
+    def escapar(valor) -> str:
+        return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return ",".join(f'{nome}="{escapar(valor)}"' for nome, valor in zip(nomes, valores))
+
+
+class MetricasRequisicoes:
+    """
+    Métricas por rota das requisições HTTP: latência, serialização e trabalho feito no MongoDB.
+    """
+
+    def __init__(self):
+        rotulos = ("metodo", "rota")
+        self.duracao = Histograma(
+            "http_requisicao_duracao_segundos", "Duração total das requisições HTTP.",
+            ("metodo", "rota", "status"), LIMITES_DURACAO_SEGUNDOS
+        )
+        self.serializacao = Histograma(
+            "http_serializacao_duracao_segundos", "Tempo entre o fim do endpoint e o início da resposta (validação e serialização).",
+            rotulos, LIMITES_DURACAO_SEGUNDOS
+        )
+        self.tempo_mongo = Histograma(
+            "mongo_tempo_por_requisicao_segundos", "Tempo somado dos comandos do MongoDB em cada requisição.",
+            rotulos, LIMITES_DURACAO_SEGUNDOS
+        )
+        self.comandos = Histograma(
+            "mongo_comandos_por_requisicao", "Quantidade de comandos enviados ao MongoDB em cada requisição.",
+            rotulos, LIMITES_COMANDOS
+        )
+        self.documentos = Contador(
+            "mongo_documentos_retornados_total", "Documentos retornados pelo MongoDB às requisições.", rotulos
+        )
+        self.lentas = Contador(
+            "http_requisicoes_lentas_total", "Requisições acima de LIMITE_REQUISICAO_LENTA_MS.", rotulos
+        )
+
+    def registrar(self, metodo: str, rota: str, status: int, duracao: float, medicao: MedicaoRequisicao):
+        chave = (metodo, rota)
+        self.duracao.observar((metodo, rota, status), duracao)
+        if medicao.serializacao is not None:
+            self.serializacao.observar(chave, medicao.serializacao)
+        self.tempo_mongo.observar(chave, medicao.tempo_mongo)
+        self.comandos.observar(chave, medicao.comandos)
+        self.documentos.incrementar(chave, medicao.documentos)
+
+        if duracao * 1000 >= LIMITE_REQUISICAO_LENTA_MS:
+            self.lentas.incrementar(chave)
+            mais_lento = max(medicao.detalhes_comandos, key=lambda d: d.get("duracao_ms", 0), default=None)
+            logger.warning(
+                "Requisição lenta %s %s: %.1f ms (mongo %.1f ms em %d comandos, %d documentos, serialização %.1f ms); comando mais lento: %s",
+                metodo, rota, duracao * 1000, medicao.tempo_mongo * 1000, medicao.comandos, medicao.documentos,
+                (medicao.serializacao or 0.0) * 1000, json_util.dumps(mais_lento)
+            )
+
+    def exportar_prometheus(self) -> str:
+        linhas = []
+        for metrica in (self.duracao, self.serializacao, self.tempo_mongo, self.comandos, self.documentos, self.lentas):
+            linhas.extend(metrica.exportar())
+        pool = metricas_pool.metricas()
+        for nome in ("conexoes_abertas", "conexoes_em_uso"):
+            linhas.append(f"# TYPE mongo_pool_{nome} gauge")
+            linhas.append(f"mongo_pool_{nome} {pool[nome]}")
+        return "\n".join(linhas) + "\n"
+
+
+class MiddlewareDesempenho:
+    """
+    Middleware ASGI que mede cada requisição HTTP e registra o resultado em metricas_requisicoes.
+
+    A rota é identificada pelo caminho declarado (ex.: /boletins/{id_boletim}), não pela URL recebida.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        medicao = MedicaoRequisicao(inicio=time.perf_counter())
+        token = _medicao_atual.set(medicao)
+        status_resposta = 500
+
+        async def enviar(mensagem):
+            nonlocal status_resposta
+            if mensagem["type"] == "http.response.start":
+                status_resposta = mensagem["status"]
+                if medicao.fim_endpoint is not None:
+                    medicao.serializacao = time.perf_counter() - medicao.fim_endpoint
+            await send(mensagem)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            _medicao_atual.reset(token)
+            rota = getattr(scope.get("route"), "path", "nao_encontrada")
+            metricas_requisicoes.registrar(
+                scope["method"], rota, status_resposta, time.perf_counter() - medicao.inicio, medicao
+            )
+
+
+class RotaInstrumentada(APIRoute):
+    """
+    Rota que marca o fim da execução do endpoint, separando o tempo de serialização da resposta.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = self._envolver(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def _envolver(self, endpoint):
+        return self._marcar_fim(endpoint)
+
+    @staticmethod
+    def _marcar_fim(endpoint):
+        @wraps(endpoint)
+        async def envoltorio(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                medicao = _medicao_atual.get()
+                if medicao is not None:
+                    medicao.fim_endpoint = time.perf_counter()
+
+        return envoltorio
+
+
+metricas_requisicoes = MetricasRequisicoes()
+rastreador_comandos = RastreadorComandos()
@@ -0,0 +1,78 @@
+import inspect
+from functools import wraps
+
+from fastapi import Response
+from fastapi.exceptions import ResponseValidationError
+from fastapi.responses import JSONResponse
+from fastapi.utils import is_body_allowed_for_status_code
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import to_json
+
+from config.monitoramento import RotaInstrumentada
+
+_PARAMETRO_RESPOSTA = "_resposta_parcial"
+
+
+class RespostaJSON(JSONResponse):
+    """
+    JSONResponse renderizada pelo serializador em Rust do pydantic-core.
+
+    Aceita também o corpo já serializado em bytes (ver RotaJSON).
+    """
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return to_json(content, fallback=str)
+
+
+class RotaJSON(RotaInstrumentada):
+    """
+    Rota que serializa o retorno do endpoint direto para JSON com TypeAdapter.dump_json do response_model.
+
+    O FastAPI, por padrão, valida o retorno, converte tudo em objetos Python (dicts, listas, strings) e só
+    então gera o JSON; aqui a validação é a mesma, mas o JSON sai de uma única passada em Rust, que trata
+    PydanticObjectId, date e os enums nativamente. Rotas sem response_model, que devolvem uma Response
+    ou cujo status não tem corpo seguem o caminho normal do FastAPI.
+    """
+
+    def _envolver(self, endpoint):
+        return self._serializar(super()._envolver(endpoint))
+
+    def _serializar(self, endpoint):
+        assinatura = inspect.signature(endpoint)
+        parametro_existente = next(
+            (p.name for p in assinatura.parameters.values() if p.annotation is Response),
+            None
+        )
+        nome_parametro = parametro_existente or _PARAMETRO_RESPOSTA
+        adaptador: TypeAdapter | None = None
+
+        @wraps(endpoint)
+        async def envoltorio(*args, **kwargs):
+            nonlocal adaptador
+            parcial = kwargs[nome_parametro] if parametro_existente else kwargs.pop(_PARAMETRO_RESPOSTA)
+            resultado = await endpoint(*args, **kwargs)
+
+            status_code = parcial.status_code or self.status_code or 200
+            if self.response_model is None or isinstance(resultado, Response) or not is_body_allowed_for_status_code(status_code):
+                return resultado
+
+            if adaptador is None:
+                adaptador = TypeAdapter(self.response_model)
+            try:
+                corpo = adaptador.dump_json(adaptador.validate_python(resultado, from_attributes=True), by_alias=True)
+            except ValidationError as e:
+                raise ResponseValidationError(errors=e.errors(include_url=False), body=resultado)
+
+            resposta = RespostaJSON(corpo, status_code=status_code)
+            resposta.headers.raw.extend(parcial.headers.raw)
+            return resposta
+
+        if parametro_existente is None:
+            # O FastAPI injeta a resposta parcial (cabeçalhos e status definidos pela rota) em parâmetros do tipo Response.
+            envoltorio.__signature__ = assinatura.replace(parameters=[
+                *assinatura.parameters.values(),
+                inspect.Parameter(_PARAMETRO_RESPOSTA, inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+            ])
+        return envoltorio
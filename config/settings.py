@@ -0,0 +1,75 @@
+from pydantic import AliasChoices, Field, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class DatabaseSettings(BaseSettings):
+    """
+    Configuração da conexão com o MongoDB, lida de variáveis de ambiente (prefixo MONGODB_) ou do .env.
+
+    O pool é por processo: com N workers do uvicorn, o número máximo de conexões abertas
+    contra cada membro do replica set é N * max_pool_size.
+    """
+
+    model_config = SettingsConfigDict(env_prefix="MONGODB_", env_file=".env", extra="ignore")
+
+    url: str = "mongodb://localhost:27017"
+    db_name: str = Field(default="db_boletim", validation_alias=AliasChoices("DB_NAME", "MONGODB_DB_NAME"))
+    app_name: str = "boletim-ocorrencias-api"
+
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: int | None = 60_000
+    wait_queue_timeout_ms: int | None = 2_000
+    max_connecting: int = 2
+    connect_timeout_ms: int = 10_000
+    server_selection_timeout_ms: int = 10_000
+
+    compressors: str | None = None
+    zlib_compression_level: int | None = None
+
+    read_preference: str = "primary"
+    write_concern_w: str | int | None = None
+    write_concern_journal: bool | None = None
+    write_concern_wtimeout_ms: int | None = None
+
+    analytics_url: str | None = None
+    analytics_read_preference: str = "secondaryPreferred"
+    analytics_max_staleness_s: int | None = None
+
+    @field_validator("analytics_max_staleness_s")
+    @classmethod
+    def validar_max_staleness(cls, valor: int | None) -> int | None:
+        """
+        O MongoDB só aceita maxStalenessSeconds igual a -1 (sem limite) ou de pelo menos 90 segundos;
+        validar aqui faz a configuração errada falhar na inicialização, e não na primeira leitura analítica.
+        """
+        if valor is not None and valor != -1 and valor < 90:
+            raise ValueError("MONGODB_ANALYTICS_MAX_STALENESS_S deve ser -1 ou pelo menos 90 segundos")
+        return valor
+
+    def client_kwargs(self) -> dict:
+        """
+        Converte a configuração nos argumentos aceitos pelo AsyncMongoClient.
+
+        :return: Dicionário de opções do cliente, sem as que não foram definidas.
+        """
+        opcoes = {
+            "appname": self.app_name,
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "maxIdleTimeMS": self.max_idle_time_ms,
+            "waitQueueTimeoutMS": self.wait_queue_timeout_ms,
+            "maxConnecting": self.max_connecting,
+            "connectTimeoutMS": self.connect_timeout_ms,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "compressors": self.compressors,
+            "zlibCompressionLevel": self.zlib_compression_level,
+            "readPreference": self.read_preference,
+            "w": int(self.write_concern_w) if str(self.write_concern_w).isdigit() else self.write_concern_w,
+            "journal": self.write_concern_journal,
+            "wTimeoutMS": self.write_concern_wtimeout_ms,
+        }
+        return {chave: valor for chave, valor in opcoes.items() if valor is not None}
+
+
+database_settings = DatabaseSettings()
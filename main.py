@@ -1,18 +1,32 @@
+import os
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 
-from config.database import init_db
-from routes import autor, boletim, declarante
+from config import database
+from config.database import close_db, init_db
+from config.eventos import barramento_eventos
+from config.monitoramento import MiddlewareDesempenho
+from routes import autor, boletim, declarante, estatistica, metricas
+from service.invalidacao import registrar_invalidacoes
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    if os.getenv("EVENTOS_CHANGE_STREAM", "true").lower() != "false":
+        registrar_invalidacoes()
+        await barramento_eventos.iniciar(database.client)
     yield
+    await barramento_eventos.parar()
+    await close_db()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(MiddlewareDesempenho)
 
 app.include_router(autor.router)
 app.include_router(boletim.router)
 app.include_router(declarante.router)
+app.include_router(estatistica.router)
+app.include_router(metricas.router)
+app.include_router(metricas.router_prometheus)
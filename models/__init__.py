@@ -1,5 +1,9 @@
 from .autor import Autor
 from .declarante import Declarante
 from .boletim_ocorrencia import BoletimOcorrencia
+from .ranking import RankingAutor, RankingDeclarante
+from .estatistica import EstatisticaDiaria
+from .historico import HistoricoBoletim
+from .token_retomada import TokenRetomada
 
-__all__ = ["Autor", "Declarante", "BoletimOcorrencia"]
\ No newline at end of file
+__all__ = ["Autor", "Declarante", "BoletimOcorrencia", "RankingAutor", "RankingDeclarante", "EstatisticaDiaria", "HistoricoBoletim", "TokenRetomada"]
@@ -1,10 +1,17 @@
 from beanie import Document
+from pymongo import ASCENDING, IndexModel
 
 class Autor(Document):
     nome: str
     matricula: str
     posto: str
     lotacao: str
+    versao: int = 0
 
     class Settings:
-        name = "autor"
\ No newline at end of file
+        name = "autor"
+        indexes = [
+            IndexModel([("matricula", ASCENDING)], unique=True),
+            IndexModel([("posto", ASCENDING)]),
+            IndexModel([("lotacao", ASCENDING)]),
+        ]
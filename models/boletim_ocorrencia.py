@@ -1,7 +1,8 @@
-from pydantic import Field
-from datetime import date
+from pydantic import BaseModel, Field
+from datetime import date, datetime
 from enum import Enum
-from beanie import Document, Link
+from beanie import Document, Link, PydanticObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
 
 from models.autor import Autor
 from models.declarante import Declarante
@@ -52,6 +53,16 @@ class StatusBoletim(Enum):
     AGUARDANDO_VALIDACAO = "Aguardando Validação"
     REABERTO = "Reaberto"
 
+class AutorResumo(BaseModel):
+    posto: str
+    lotacao: str
+
+class AlteracaoStatus(BaseModel):
+    status_anterior: StatusBoletim | None = None
+    status_novo: StatusBoletim
+    data: datetime
+    versao: int = 0
+
 class BoletimOcorrencia(Document):
     data_registro: date = Field(default_factory=date.today)
     tipo_ocorrencia: TipoOcorrencia
@@ -59,11 +70,35 @@ class BoletimOcorrencia(Document):
     
     autor: Link[Autor]
     declarantes: list[Link[Declarante]] = []
+    autor_resumo: AutorResumo | None = None
+    total_declarantes: int = 0
+    multiplos_declarantes: bool = False
+    versao: int = 0
+    historico_alteracoes: list[AlteracaoStatus] = []
+
+    @staticmethod
+    def _id_do_vinculo(vinculo) -> PydanticObjectId:
+        if isinstance(vinculo, Link):
+            return vinculo.ref.id
+        return vinculo.id
+
+    def id_autor(self) -> PydanticObjectId:
+        return self._id_do_vinculo(self.autor)
+
+    def ids_declarantes(self) -> list[PydanticObjectId]:
+        return [self._id_do_vinculo(d) for d in self.declarantes]
     
 
     class Settings:
         name = "boletins"
         indexes = [
-            [("tipo_ocorrencia", "text")]
+            IndexModel([("data_registro", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("status", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("tipo_ocorrencia", ASCENDING), ("data_registro", DESCENDING)]),
+            IndexModel([("autor.$id", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("autor_resumo.posto", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("status", ASCENDING), ("autor_resumo.lotacao", ASCENDING), ("_id", ASCENDING)]),
+            IndexModel([("declarantes.$id", ASCENDING)]),
+            IndexModel([("multiplos_declarantes", ASCENDING), ("_id", ASCENDING)]),
         ]
 
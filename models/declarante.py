@@ -1,6 +1,7 @@
 from datetime import date
 from enum import Enum
 from beanie import Document, Link
+from pymongo import ASCENDING, IndexModel
 
 
 class TipoEnvolvimento(str, Enum):
@@ -16,7 +17,26 @@ class Declarante(Document):
     cpf: str
     endereco: str
     tipo_envolvimento: TipoEnvolvimento
-
+    cpf_normalizado: str | None = None
+    nome_tokens: list[str] = []
+    nome_ngramas: list[str] = []
+    quantidade_boletins: int = 0
+    versao: int = 0
 
     class Settings:
         name = "declarantes"
+        indexes = [
+            IndexModel([("cpf", ASCENDING)], unique=True),
+            IndexModel(
+                [("cpf_normalizado", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"cpf_normalizado": {"$type": "string"}}
+            ),
+            IndexModel([("nome_tokens", ASCENDING)]),
+            IndexModel([("nome_ngramas", ASCENDING)]),
+            IndexModel(
+                [("quantidade_boletins", ASCENDING), ("_id", ASCENDING)],
+                name="declarantes_sem_boletim",
+                partialFilterExpression={"quantidade_boletins": 0}
+            ),
+        ]
@@ -0,0 +1,21 @@
+from datetime import date
+
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+
+
+class EstatisticaDiaria(Document):
+    data: date
+    tipo_ocorrencia: str
+    status: str
+    lotacao: str | None = None
+    total: int = 0
+
+    class Settings:
+        name = "estatisticas_diarias"
+        indexes = [
+            IndexModel(
+                [("data", ASCENDING), ("tipo_ocorrencia", ASCENDING), ("status", ASCENDING), ("lotacao", ASCENDING)],
+                unique=True
+            ),
+        ]
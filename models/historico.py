@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from beanie import Document, PydanticObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from models.boletim_ocorrencia import StatusBoletim
+
+
+class HistoricoBoletim(Document):
+    boletim: PydanticObjectId
+    status_anterior: StatusBoletim | None = None
+    status_novo: StatusBoletim
+    data: datetime
+    versao: int = 0
+
+    class Settings:
+        name = "historico_boletins"
+        indexes = [
+            IndexModel([("boletim", ASCENDING), ("_id", DESCENDING)]),
+        ]
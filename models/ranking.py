@@ -0,0 +1,22 @@
+from beanie import Document
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+class RankingAutor(Document):
+    total_boletins: int = 0
+
+    class Settings:
+        name = "ranking_autores"
+        indexes = [
+            IndexModel([("total_boletins", DESCENDING), ("_id", ASCENDING)]),
+        ]
+
+
+class RankingDeclarante(Document):
+    quantidade_registros: int = 0
+
+    class Settings:
+        name = "ranking_declarantes"
+        indexes = [
+            IndexModel([("quantidade_registros", DESCENDING), ("_id", ASCENDING)]),
+        ]
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from beanie import Document
+from pymongo import ASCENDING, IndexModel
+
+
+class TokenRetomada(Document):
+    stream: str
+    token: dict
+    atualizado_em: datetime
+
+    class Settings:
+        name = "tokens_retomada"
+        indexes = [
+            IndexModel([("stream", ASCENDING)], unique=True),
+        ]
@@ -1,11 +1,18 @@
-from fastapi import APIRouter, status
-from schemas.autor import AutorCreate, AutorResponse, AutorRanking
+from fastapi import APIRouter, Request, Response, status
+
+from config.respostas import RespostaJSON, RotaJSON
+from schemas.autor import AutorCreate, AutorResponse, AutorRanking, AutorPatch
 from service.autor import AutorService
+from service.cache_respostas import cache_respostas
+from service.condicional import definir_etag, etag, nao_modificado, resposta_nao_modificada
+from service.paginacao import definir_proximo_cursor
 from beanie.odm.fields import PydanticObjectId
 
 router = APIRouter(
     prefix="/autores",
     tags=["Autores"],
+    route_class=RotaJSON,
+    default_response_class=RespostaJSON,
 )
 
 service = AutorService()
@@ -26,19 +33,32 @@ async def create_autor(autor: AutorCreate):
     status_code=status.HTTP_200_OK,
     description="busca os autores cadastrados"        
 )
-async def read_autores(skip: int = 0, limit: int = 50):
-    return await service.list_autores(skip, limit)
+async def read_autores(response: Response, skip: int = 0, limit: int = 50, after: str | None = None):
+    autores = await service.list_autores(skip, limit, after)
+    return definir_proximo_cursor(response, autores, limit, "id")
 
 
 @router.get(
     path="/ranking",
     response_model=list[AutorRanking],
     status_code=status.HTTP_200_OK,
-    description="busca os autores que mais registraram boletins"
+    description="busca os autores que mais registraram boletins; responde 304 quando o If-None-Match confere com o ETag atual"
 ) 
-async def ranking_autores_route(skip: int = 0, limit: int = 50):
+async def ranking_autores_route(request: Request, response: Response, skip: int = 0, limit: int = 50, after: str | None = None):
     #try:
-    return await service.ranking_autores(skip, limit)
+    revisao = await cache_respostas.revisao(("boletins", "autores"))
+    marca = etag(revisao) if revisao else None
+    if nao_modificado(request, marca):
+        return resposta_nao_modificada(marca)
+
+    ranking = await cache_respostas.obter_ou_calcular(
+        "autores/ranking",
+        {"skip": skip, "limit": limit, "after": after},
+        ("boletins", "autores"),
+        lambda: service.ranking_autores(skip, limit, after)
+    )
+    definir_etag(response, marca)
+    return definir_proximo_cursor(response, ranking, limit, "total_boletins", "id")
     """
     except SQLAlchemyError as e:
         raise HTTPException(
@@ -57,16 +77,36 @@ async def ranking_autores_route(skip: int = 0, limit: int = 50):
     path="/{id_autor}",
     response_model=AutorResponse,
     status_code=status.HTTP_200_OK,
-    description="busca um autor por id"        
+    description="busca um autor por id; responde 304 quando o If-None-Match confere com o ETag atual"        
 )
 async def read_autor(
+    request: Request,
+    response: Response,
     id_autor: PydanticObjectId
 ):
-    return await service.get_autor(id_autor)
+    autor = await service.get_autor(id_autor)
+    marca = etag(autor.versao)
+    if nao_modificado(request, marca):
+        return resposta_nao_modificada(marca)
+    definir_etag(response, marca)
+    return autor
     # if not autor:
     #     raise HTTPException(status_code=404, detail="Autor não encontrado")
     
 
+@router.patch(
+    path="/{id_autor}",
+    response_model=AutorResponse,
+    status_code=status.HTTP_200_OK,
+    description="altera apenas os campos enviados de um autor; com versao, falha com 409 se ele mudou desde a leitura"
+)
+async def patch_autor(
+    id_autor: PydanticObjectId,
+    autor: AutorPatch
+):
+    return await service.patch_autor(id_autor, autor)
+
+
 @router.put(
     path="/{id_autor}",
     response_model=AutorResponse,
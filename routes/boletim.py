@@ -1,20 +1,36 @@
-from fastapi import APIRouter, Depends, status
+import json
 
-from models.boletim_ocorrencia import BoletimOcorrencia
-from schemas.boletim import BoletimOcorrenciaResponse, BoletimOcorrenciaCreate, BoletimOcorrenciaResponseMultiplosDeclarantes
-from service.boletim import BoletimService
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from config.respostas import RespostaJSON, RotaJSON
+from models.boletim_ocorrencia import StatusBoletim, TipoOcorrencia
+from schemas.boletim import BoletimOcorrenciaCreate, BoletimOcorrenciaDetalhado, BoletimOcorrenciaPatch, BoletimOcorrenciaResponseMultiplosDeclarantes, BoletimLoteResponse, HistoricoBoletimResponse
+from service.boletim import BoletimService, etag_boletim
+from service.condicional import definir_etag, nao_modificado, resposta_nao_modificada
+from service.exportacao import gerar_csv, gerar_ndjson
+from service.cache_respostas import cache_respostas
+from service.paginacao import definir_proximo_cursor
+from service.vinculos import interpretar_expand
 from datetime import date
 
 from beanie.odm.fields import PydanticObjectId
 
 
-router = APIRouter(prefix="/boletins", tags=["Boletins"])
+router = APIRouter(
+    prefix="/boletins",
+    tags=["Boletins"],
+    route_class=RotaJSON,
+    default_response_class=RespostaJSON,
+)
 service = BoletimService()
 
 
 @router.post(
     path="/",
-    response_model=BoletimOcorrencia,
+    response_model=BoletimOcorrenciaDetalhado,
     status_code=status.HTTP_201_CREATED,
     description="cria um boletim de ocorrencia"
 )
@@ -24,14 +40,116 @@ async def create_boletim(
     return await service.create_boletim(boletim)
 
 
+async def _itens_do_corpo(request: Request):
+    """
+    Lê o corpo da importação em lote: NDJSON (um boletim por linha, lido em streaming) ou um array JSON.
+    """
+    if "ndjson" in request.headers.get("content-type", ""):
+        pendente = b""
+        async for pedaco in request.stream():
+            pendente += pedaco
+            *linhas, pendente = pendente.split(b"\n")
+            for linha in linhas:
+                if linha.strip():
+                    yield _decodificar_linha(linha)
+        if pendente.strip():
+            yield _decodificar_linha(pendente)
+        return
+
+    try:
+        itens = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Corpo JSON inválido")
+
+    if not isinstance(itens, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="O corpo deve ser um array JSON de boletins")
+
+    for item in itens:
+        yield item
+
+
+def _decodificar_linha(linha: bytes):
+    try:
+        return json.loads(linha)
+    except ValueError:
+        return linha.decode(errors="replace")
+
+
+@router.post(
+    path="/bulk",
+    response_model=BoletimLoteResponse,
+    status_code=status.HTTP_200_OK,
+    description="importa boletins em lote a partir de um array JSON ou de um stream NDJSON (application/x-ndjson)"
+)
+async def create_boletins_bulk(request: Request):
+    return await service.create_boletins_em_lote(_itens_do_corpo(request))
+
+
 @router.get(
     path="/",
-    response_model=list[BoletimOcorrencia],
+    response_model=list[BoletimOcorrenciaDetalhado],
+    status_code=status.HTTP_200_OK,
+    description="busca todos os boletins de ocorrencia registrados de forma paginada; ?expand=autor,declarantes escolhe os vínculos carregados"
+)
+async def list_boletins(
+    response: Response,
+    skip: int = 0,
+    limit: int = 50,
+    after: str | None = None,
+    expand: str | None = None,
+):
+    boletins = await service.list_boletins(skip, limit, after, interpretar_expand(expand))
+    return definir_proximo_cursor(response, boletins, limit, "id")
+
+@router.get(
+    path="/busca",
+    response_model=list[BoletimOcorrenciaDetalhado],
     status_code=status.HTTP_200_OK,
-    description="busca todos os boletins de ocorrencia registrados de forma paginada"
+    description="busca boletins combinando intervalo de datas, tipos, status, autor, declarante, posto e lotação; ?debug=true devolve o explain no cabeçalho X-Explain"
 )
-async def list_boletins(skip: int = 0, limit: int = 50):
-    return await service.list_boletins(skip, limit)
+async def buscar_boletins(
+    response: Response,
+    data_inicio: date | None = None,
+    data_fim: date | None = None,
+    tipo_ocorrencia: list[TipoOcorrencia] | None = Query(default=None),
+    status_boletim: list[StatusBoletim] | None = Query(default=None, alias="status"),
+    autor: PydanticObjectId | None = None,
+    declarante: PydanticObjectId | None = None,
+    posto: str | None = None,
+    lotacao: str | None = None,
+    skip: int = 0,
+    limit: int = 50,
+    after: str | None = None,
+    expand: str | None = None,
+    debug: bool = False,
+):
+    consulta = service.consulta_busca(
+        data_inicio, data_fim, tipo_ocorrencia, status_boletim, autor, declarante, posto, lotacao,
+        interpretar_expand(expand)
+    )
+    boletins, explain = await service.buscar_boletins(consulta, skip, limit, after, debug)
+    if explain is not None:
+        response.headers["X-Explain"] = json.dumps(explain)
+    return definir_proximo_cursor(response, boletins, limit, "id")
+
+@router.get(
+    path="/exportar",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    description="exporta os boletins em NDJSON ou CSV via streaming, opcionalmente filtrando por data"
+)
+async def exportar_boletins(
+    formato: Literal["ndjson", "csv"] = "ndjson",
+    data: date | None = None,
+):
+    documentos = service.exportar_boletins(data)
+    if formato == "csv":
+        return StreamingResponse(
+            gerar_csv(documentos),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="boletins.csv"'}
+        )
+    return StreamingResponse(gerar_ndjson(documentos), media_type="application/x-ndjson")
 
 @router.get(
     path="/multiplos-declarantes",
@@ -40,68 +158,122 @@ async def list_boletins(skip: int = 0, limit: int = 50):
     description="busca boletins de ocorrencia que tem multiplos declarantes"
 )
 async def boletins_com_mais_de_um_declarante(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    after: str | None = None,
 ):
-    return await service.boletins_com_mais_de_um_declarante(skip, limit)
+    boletins = await cache_respostas.obter_ou_calcular(
+        "boletins/multiplos-declarantes",
+        {"skip": skip, "limit": limit, "after": after},
+        ("boletins",),
+        lambda: service.boletins_com_mais_de_um_declarante(skip, limit, after)
+    )
+    return definir_proximo_cursor(response, boletins, limit, "id")
 
 @router.get(
     path="/por-data",
     status_code=status.HTTP_200_OK,
-    response_model=list[BoletimOcorrencia],
-    description="busca boletins por uma data específica"
+    response_model=list[BoletimOcorrenciaDetalhado],
+    description="busca boletins por uma data específica; ?expand=autor,declarantes escolhe os vínculos carregados"
 )
 async def boletins_por_data(
+    response: Response,
     data: date,
     skip: int = 0,
     limit: int = 50,
+    after: str | None = None,
+    expand: str | None = None,
 ):
-    return await service.boletins_por_data(data, skip, limit)
+    boletins = await service.boletins_por_data(data, skip, limit, after, interpretar_expand(expand))
+    return definir_proximo_cursor(response, boletins, limit, "id")
 
 
 @router.get(
     path="/por-posto/{posto}",
     status_code=status.HTTP_200_OK,
-    response_model=list[BoletimOcorrencia],
+    response_model=list[BoletimOcorrenciaDetalhado],
     description="busca boletins de ocorrencia por posto especifico"    
 )
 async def boletins_por_posto(
+    response: Response,
     posto: str,
     skip: int = 0,
     limit: int = 50,
+    after: str | None = None,
 ):
-    return await service.boletins_por_posto(posto, skip, limit)
+    boletins = await service.boletins_por_posto(posto, skip, limit, after)
+    return definir_proximo_cursor(response, boletins, limit, "id")
 
 
 @router.get(
     path="/abertos/lotacao/{lotacao}",
     status_code=status.HTTP_200_OK,
-    response_model=list[BoletimOcorrencia],
+    response_model=list[BoletimOcorrenciaDetalhado],
     description="busca boletins por lotacao especifica"
 )
 async def boletins_abertos_por_lotacao_com_multiplos_declarantes(
+    response: Response,
     lotacao: str,
     skip: int = 0,
     limit: int = 50,
+    after: str | None = None,
 ):
-    return await service.boletins_abertos_por_lotacao_com_multiplos_declarantes(lotacao, skip, limit)
+    boletins = await service.boletins_abertos_por_lotacao_com_multiplos_declarantes(lotacao, skip, limit, after)
+    return definir_proximo_cursor(response, boletins, limit, "id")
 
 
 @router.get(
     path="/{id_boletim}",
     status_code=status.HTTP_200_OK,
-    response_model=BoletimOcorrencia,
-    description="busca boletim por id"
+    response_model=BoletimOcorrenciaDetalhado,
+    description="busca boletim por id; responde 304 quando o If-None-Match confere com o ETag atual"
 )
 async def get_boletim(
+    request: Request,
+    response: Response,
+    id_boletim: PydanticObjectId,
+):
+    if request.headers.get("if-none-match"):
+        revisao = await service.revisao_boletim(id_boletim)
+        if nao_modificado(request, revisao):
+            return resposta_nao_modificada(revisao)
+
+    boletim = await service.get_boletim(id_boletim)
+    definir_etag(response, etag_boletim(boletim))
+    return boletim
+
+@router.get(
+    path="/{id_boletim}/historico",
+    status_code=status.HTTP_200_OK,
+    response_model=list[HistoricoBoletimResponse],
+    description="linha do tempo completa das mudanças de status do boletim, da mais recente para a mais antiga; 404 se o boletim não existe"
+)
+async def historico_boletim(
+    response: Response,
+    id_boletim: PydanticObjectId,
+    limit: int = 50,
+    after: str | None = None,
+):
+    alteracoes = await service.historico.listar(id_boletim, limit, after)
+    return definir_proximo_cursor(response, alteracoes, limit, "id")
+
+@router.patch(
+    path="/{id_boletim}",
+    status_code=status.HTTP_200_OK,
+    response_model=BoletimOcorrenciaDetalhado,
+    description="altera apenas os campos enviados (ex.: status) ou adiciona/remove declarantes; com versao, falha com 409 se o boletim mudou desde a leitura"
+)
+async def patch_boletim(
     id_boletim: PydanticObjectId,
+    boletim: BoletimOcorrenciaPatch,
 ):
-    return await service.get_boletim(id_boletim)
+    return await service.patch_boletim(id_boletim, boletim)
 
 @router.put(
     path="/{id_boletim}",
     status_code=status.HTTP_200_OK,
-    response_model=BoletimOcorrencia
+    response_model=BoletimOcorrenciaDetalhado
 )
 async def update_boletim(
     id_boletim: PydanticObjectId,
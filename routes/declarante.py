@@ -1,13 +1,20 @@
-from fastapi import APIRouter, status
-from schemas.declarante import DeclaranteCreate, DeclaranteResponse, DeclaranteNumerosDeRegistros
-from service.declarante import DeclaranteService
+from fastapi import APIRouter, Query, Request, Response, status
+
+from config.respostas import RespostaJSON, RotaJSON
+from schemas.declarante import DeclaranteCreate, DeclaranteResponse, DeclaranteNumerosDeRegistros, DeclaranteBuscaResultado, DeclarantePatch
+from service.declarante import LIMITE_RESULTADOS_BUSCA, DeclaranteService
+from service.cache_respostas import cache_respostas
+from service.condicional import definir_etag, etag, nao_modificado, resposta_nao_modificada
+from service.paginacao import definir_proximo_cursor
 
 from beanie.odm.fields import PydanticObjectId
 
 
 router = APIRouter(
     prefix="/declarantes",
-    tags=["Declarantes"]
+    tags=["Declarantes"],
+    route_class=RotaJSON,
+    default_response_class=RespostaJSON,
 )
 
 service = DeclaranteService()
@@ -30,8 +37,18 @@ async def create_declarante(
     status_code=status.HTTP_200_OK,
     description="busca todos os declarantes de forma paginada"    
 )
-async def read_declarantes(skip: int = 0, limit: int = 50):
-    return await service.list_declarantes(skip, limit)
+async def read_declarantes(response: Response, skip: int = 0, limit: int = 50, after: str | None = None):
+    declarantes = await service.list_declarantes(skip, limit, after)
+    return definir_proximo_cursor(response, declarantes, limit, "id")
+
+@router.get(
+    path="/busca",
+    response_model=list[DeclaranteBuscaResultado],
+    status_code=status.HTTP_200_OK,
+    description="busca declarantes por CPF ou trecho do nome, sem diferenciar acentos e maiúsculas, ordenados por relevância"
+)
+async def buscar_declarantes(q: str, limit: int = Query(20, ge=1, le=LIMITE_RESULTADOS_BUSCA)):
+    return await service.buscar_declarantes(q, limit)
 
 @router.get(
     path="/sem-boletim",
@@ -40,22 +57,45 @@ async def read_declarantes(skip: int = 0, limit: int = 50):
     description="busca todos os declarantes sem boletim"    
 )
 async def declarantes_sem_boletim(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    after: str | None = None,
 ):
-    return await service.declarantes_sem_boletim(skip, limit)
+    declarantes = await cache_respostas.obter_ou_calcular(
+        "declarantes/sem-boletim",
+        {"skip": skip, "limit": limit, "after": after},
+        ("boletins", "declarantes"),
+        lambda: service.declarantes_sem_boletim(skip, limit, after)
+    )
+    return definir_proximo_cursor(response, declarantes, limit, "id")
 
 @router.get(
     path="/ranking",
     status_code=status.HTTP_200_OK,
     response_model=list[DeclaranteNumerosDeRegistros],
-    description="busca declarantes que possuem mais boletins registrados"    
+    description="busca declarantes que possuem mais boletins registrados; responde 304 quando o If-None-Match confere com o ETag atual"    
 )
 async def ranking_declarantes(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    after: str | None = None,
 ):
-    return await service.ranking_declarantes(skip, limit)
+    revisao = await cache_respostas.revisao(("boletins", "declarantes"))
+    marca = etag(revisao) if revisao else None
+    if nao_modificado(request, marca):
+        return resposta_nao_modificada(marca)
+
+    ranking = await cache_respostas.obter_ou_calcular(
+        "declarantes/ranking",
+        {"skip": skip, "limit": limit, "after": after},
+        ("boletins", "declarantes"),
+        lambda: service.ranking_declarantes(skip, limit, after)
+    )
+    definir_etag(response, marca)
+    return definir_proximo_cursor(response, ranking, limit, "quantidade_registros", "id")
 
 @router.get(
     path="/reincidentes/tipo",
@@ -64,21 +104,49 @@ async def ranking_declarantes(
     description="busca declarantes por reincidentes"    
 )
 async def declarantes_reincidentes_por_tipo(
+    response: Response,
     skip: int = 0,
     limit: int = 50,
+    after: str | None = None,
 ):
-    return await service.declarantes_reincidentes_por_tipo(skip, limit)
+    reincidentes = await cache_respostas.obter_ou_calcular(
+        "declarantes/reincidentes/tipo",
+        {"skip": skip, "limit": limit, "after": after},
+        ("boletins", "declarantes"),
+        lambda: service.declarantes_reincidentes_por_tipo(skip, limit, after)
+    )
+    return definir_proximo_cursor(response, reincidentes, limit, "quantidade_registros", "chave")
 
 @router.get(
     path="/{id_declarante}",
     response_model=DeclaranteResponse,
     status_code=status.HTTP_200_OK,
-    description="busca declarante por id"    
+    description="busca declarante por id; responde 304 quando o If-None-Match confere com o ETag atual"    
 )
 async def read_declarante(
+    request: Request,
+    response: Response,
+    id_declarante: PydanticObjectId,
+):
+    declarante = await service.get_declarante(id_declarante)
+    marca = etag(declarante.versao)
+    if nao_modificado(request, marca):
+        return resposta_nao_modificada(marca)
+    definir_etag(response, marca)
+    return declarante
+
+
+@router.patch(
+    path="/{id_declarante}",
+    response_model=DeclaranteResponse,
+    status_code=status.HTTP_200_OK,
+    description="altera apenas os campos enviados de um declarante; com versao, falha com 409 se ele mudou desde a leitura"
+)
+async def patch_declarante(
     id_declarante: PydanticObjectId,
+    declarante: DeclarantePatch,
 ):
-    return await service.get_declarante(id_declarante)
+    return await service.patch_declarante(id_declarante, declarante)
 
 
 @router.put(
@@ -0,0 +1,51 @@
+from datetime import date
+
+from fastapi import APIRouter, Query, status
+
+from config.monitoramento import RotaInstrumentada
+
+from models.boletim_ocorrencia import StatusBoletim, TipoOcorrencia
+from schemas.estatistica import Agrupamento, DimensaoEstatistica, EstatisticaPeriodo
+from service.cache_respostas import cache_respostas
+from service.estatistica import EstatisticaService
+
+router = APIRouter(
+    prefix="/estatisticas",
+    tags=["Estatísticas"],
+    route_class=RotaInstrumentada,
+)
+
+service = EstatisticaService()
+
+
+@router.get(
+    path="/",
+    response_model=list[EstatisticaPeriodo],
+    status_code=status.HTTP_200_OK,
+    description="totais de boletins por dia, semana ou mês no intervalo, opcionalmente separados por tipo, status ou lotação"
+)
+async def estatisticas_por_periodo(
+    inicio: date,
+    fim: date,
+    agrupamento: Agrupamento = Agrupamento.DIA,
+    por: DimensaoEstatistica | None = None,
+    tipo_ocorrencia: list[TipoOcorrencia] | None = Query(default=None),
+    status_boletim: list[StatusBoletim] | None = Query(default=None, alias="status"),
+    lotacao: str | None = None,
+):
+    return await cache_respostas.obter_ou_calcular(
+        "estatisticas",
+        {
+            "inicio": inicio,
+            "fim": fim,
+            "agrupamento": agrupamento.value,
+            "por": por.value if por else None,
+            "tipo_ocorrencia": ",".join(sorted(t.value for t in tipo_ocorrencia or [])),
+            "status": ",".join(sorted(s.value for s in status_boletim or [])),
+            "lotacao": lotacao,
+        },
+        ("boletins", "autores"),
+        lambda: service.estatisticas_por_periodo(
+            inicio, fim, agrupamento, por, tipo_ocorrencia, status_boletim, lotacao
+        )
+    )
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, status
+from fastapi.responses import PlainTextResponse
+
+from config.eventos import barramento_eventos
+from config.monitoramento import metricas_pool, metricas_requisicoes
+from service.cache import cache_autores, cache_declarantes
+
+router = APIRouter(
+    prefix="/metricas",
+    tags=["Métricas"],
+)
+
+router_prometheus = APIRouter(tags=["Métricas"])
+
+
+@router.get(
+    path="/cache",
+    status_code=status.HTTP_200_OK,
+    description="métricas de acerto/falha dos caches locais de autores e declarantes"
+)
+async def metricas_cache():
+    return [cache_autores.metricas(), cache_declarantes.metricas()]
+
+
+@router.get(
+    path="/pool",
+    status_code=status.HTTP_200_OK,
+    description="métricas do pool de conexões com o MongoDB deste processo"
+)
+async def metricas_pool_conexoes():
+    return metricas_pool.metricas()
+
+
+@router.get(
+    path="/eventos",
+    status_code=status.HTTP_200_OK,
+    description="eventos, lotes, falhas de tratadores e eventos pendentes do barramento de change streams deste processo"
+)
+async def metricas_eventos():
+    return barramento_eventos.metricas()
+
+
+@router_prometheus.get(
+    path="/metrics",
+    status_code=status.HTTP_200_OK,
+    response_class=PlainTextResponse,
+    description="latência por rota, tempo de serialização e trabalho no MongoDB por requisição, no formato do Prometheus"
+)
+async def metricas_prometheus():
+    return PlainTextResponse(metricas_requisicoes.exportar_prometheus(), media_type="text/plain; version=0.0.4")
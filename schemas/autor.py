@@ -9,7 +9,15 @@ class AutorCreate(BaseModel):
 
 class AutorResponse(AutorCreate):
     id: PydanticObjectId
+    versao: int = 0
 
 class AutorRanking(AutorResponse):
     nome: str
-    total_boletins: int
\ No newline at end of file
+    total_boletins: int
+
+class AutorPatch(BaseModel):
+    nome: str | None = None
+    matricula: str | None = None
+    posto: str | None = None
+    lotacao: str | None = None
+    versao: int | None = None
@@ -1,8 +1,14 @@
-from datetime import date
-from models.boletim_ocorrencia import TipoOcorrencia
-from pydantic import BaseModel
+from datetime import date, datetime
+from typing import Annotated
+from models.autor import Autor
+from models.declarante import Declarante
+from models.boletim_ocorrencia import AlteracaoStatus, AutorResumo, TipoOcorrencia
+from pydantic import BaseModel, ConfigDict, Field
 from models.boletim_ocorrencia import StatusBoletim
+from beanie import Link
 from beanie.odm.fields import PydanticObjectId
+from schemas.autor import AutorResponse
+from schemas.declarante import DeclaranteResponse
 
 
 class BoletimOcorrenciaCreate(BaseModel):
@@ -11,12 +17,60 @@ class BoletimOcorrenciaCreate(BaseModel):
     autor: PydanticObjectId
     declarantes: list[PydanticObjectId] = []
 
+class BoletimOcorrenciaPatch(BaseModel):
+    tipo_ocorrencia: TipoOcorrencia | None = None
+    status: StatusBoletim | None = None
+    autor: PydanticObjectId | None = None
+    declarantes: list[PydanticObjectId] | None = None
+    adicionar_declarantes: list[PydanticObjectId] = []
+    remover_declarantes: list[PydanticObjectId] = []
+    versao: int | None = None
+
 class BoletimOcorrenciaResponse(BaseModel):
     _id: PydanticObjectId
     data_registro: date
     tipo_ocorrencia: str
     status: str
 
+class BoletimOcorrenciaDetalhado(BaseModel):
+    """
+    Boletim completo devolvido pelas rotas de boletins.
+
+    Autor e declarantes carregados saem no formato de AutorResponse/DeclaranteResponse, sem os campos
+    internos dos documentos (contadores e campos de busca); vínculos não carregados saem como referência.
+    """
+
+    model_config = ConfigDict(from_attributes=True, populate_by_name=True)
+
+    id: PydanticObjectId = Field(alias="_id")
+    data_registro: date
+    tipo_ocorrencia: TipoOcorrencia
+    status: StatusBoletim
+    autor: AutorResponse | Link[Autor] = Field(union_mode="left_to_right")
+    declarantes: list[Annotated[DeclaranteResponse | Link[Declarante], Field(union_mode="left_to_right")]] = []
+    autor_resumo: AutorResumo | None = None
+    total_declarantes: int = 0
+    versao: int = 0
+    historico_alteracoes: list[AlteracaoStatus] = []
+
+class HistoricoBoletimResponse(BaseModel):
+    id: PydanticObjectId
+    status_anterior: StatusBoletim | None = None
+    status_novo: StatusBoletim
+    data: datetime
+    versao: int
+
+class BoletimLoteItemResultado(BaseModel):
+    indice: int
+    id: PydanticObjectId | None = None
+    erro: str | None = None
+
+class BoletimLoteResponse(BaseModel):
+    total: int
+    inseridos: int
+    falhas: int
+    resultados: list[BoletimLoteItemResultado]
+
 class BoletimOcorrenciaResponseMultiplosDeclarantes(BoletimOcorrenciaResponse):
     total_declarantes: int
 
@@ -12,7 +12,17 @@ class DeclaranteCreate(BaseModel):
 
 class DeclaranteResponse(DeclaranteCreate):
     id: PydanticObjectId
+    versao: int = 0
 
 class DeclaranteNumerosDeRegistros(DeclaranteResponse):
     quantidade_registros: int
 
+class DeclaranteBuscaResultado(DeclaranteResponse):
+    relevancia: float
+
+class DeclarantePatch(BaseModel):
+    nome: str | None = None
+    cpf: str | None = None
+    endereco: str | None = None
+    tipo_envolvimento: TipoEnvolvimento | None = None
+    versao: int | None = None
@@ -0,0 +1,20 @@
+from datetime import date
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class Agrupamento(str, Enum):
+    DIA = "dia"
+    SEMANA = "semana"
+    MES = "mes"
+
+class DimensaoEstatistica(str, Enum):
+    TIPO_OCORRENCIA = "tipo_ocorrencia"
+    STATUS = "status"
+    LOTACAO = "lotacao"
+
+class EstatisticaPeriodo(BaseModel):
+    periodo: date
+    chave: str | None = None
+    total: int
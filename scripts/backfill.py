@@ -0,0 +1,109 @@
+"""
+Comandos pontuais para preencher campos derivados em boletins já existentes.
+
+Uso: python -m scripts.backfill <comando>
+"""
+import argparse
+import asyncio
+
+from config.database import init_db
+from pymongo import UpdateOne
+
+from models import Autor, BoletimOcorrencia, Declarante
+from service.boletim import TAMANHO_LOTE, resumo_do_autor
+from service.declarante import campos_de_busca
+from service.estatistica import EstatisticaService
+from service.ranking import RankingService
+
+
+async def backfill_autor_resumo() -> int:
+    """
+    Grava o resumo (posto/lotação normalizados) do autor em todos os boletins dele.
+
+    :return: Quantidade de boletins atualizados.
+    """
+    total = 0
+    async for autor in Autor.find_all():
+        resultado = await BoletimOcorrencia.find({"autor.$id": autor.id}).update(
+            {"$set": {"autor_resumo": resumo_do_autor(autor).model_dump()}}
+        )
+        total += resultado.modified_count
+    return total
+
+
+async def backfill_total_declarantes() -> int:
+    """
+    Recalcula o contador total_declarantes e o indicador multiplos_declarantes de todos os boletins a partir da lista de declarantes.
+
+    :return: Quantidade de boletins atualizados.
+    """
+    resultado = await BoletimOcorrencia.get_pymongo_collection().update_many(
+        {},
+        [{"$set": {
+            "total_declarantes": {"$size": {"$ifNull": ["$declarantes", []]}},
+            "multiplos_declarantes": {"$gt": [{"$size": {"$ifNull": ["$declarantes", []]}}, 1]},
+        }}]
+    )
+    return resultado.modified_count
+
+
+async def backfill_declarantes_busca() -> int:
+    """
+    Preenche o CPF normalizado e os termos de busca do nome em todos os declarantes.
+
+    :return: Quantidade de declarantes atualizados.
+    """
+    colecao = Declarante.get_pymongo_collection()
+    total = 0
+    operacoes = []
+    async for declarante in colecao.find({}, {"nome": 1, "cpf": 1}):
+        operacoes.append(UpdateOne(
+            {"_id": declarante["_id"]},
+            {"$set": campos_de_busca(declarante["nome"], declarante["cpf"])}
+        ))
+        if len(operacoes) == TAMANHO_LOTE:
+            total += (await colecao.bulk_write(operacoes, ordered=False)).modified_count
+            operacoes = []
+    if operacoes:
+        total += (await colecao.bulk_write(operacoes, ordered=False)).modified_count
+    return total
+
+
+async def reconstruir_rankings() -> int:
+    """
+    Reconstrói as coleções de ranking de autores e declarantes a partir dos boletins.
+
+    :return: Quantidade de entradas gravadas nos rankings.
+    """
+    return await RankingService().reconstruir()
+
+
+async def reconstruir_estatisticas() -> int:
+    """
+    Reconstrói os contadores diários de boletins por data, tipo, status e lotação.
+
+    :return: Quantidade de células gravadas.
+    """
+    return await EstatisticaService().reconstruir()
+
+
+COMANDOS = {
+    "autor-resumo": backfill_autor_resumo,
+    "total-declarantes": backfill_total_declarantes,
+    "declarantes-busca": backfill_declarantes_busca,
+    "rankings": reconstruir_rankings,
+    "estatisticas": reconstruir_estatisticas,
+}
+
+
+async def main(comando: str):
+    await init_db()
+    total = await COMANDOS[comando]()
+    print(f"{comando}: {total} documento(s) atualizado(s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Preenche campos derivados dos boletins")
+    parser.add_argument("comando", choices=sorted(COMANDOS))
+    args = parser.parse_args()
+    asyncio.run(main(args.comando))
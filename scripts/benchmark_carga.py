@@ -0,0 +1,362 @@
+"""
+Teste de carga de todas as rotas da API contra um MongoDB local, com relatório de vazão, latência
+(p50/p95/p99) e estatísticas do servidor MongoDB por rota.
+
+Uso:
+    python -m scripts.gerar_dados --escala 10k --limpar
+    python -m scripts.benchmark_carga [--url http://localhost:8000] [--requisicoes 200] [--concorrencia 16]
+                                      [--rotas boletins] [--escritas] [--salvar base.json] [--comparar base.json]
+
+Sem --url a aplicação roda no mesmo processo (httpx.ASGITransport). Em ambos os casos o script se
+conecta ao banco configurado para sortear parâmetros reais e ler o serverStatus antes e depois de cada rota.
+Rotas de escrita só rodam com --escritas, pois alteram os dados. O script termina com código 1 se alguma
+rota de leitura responder com erro (status >= 400).
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+import httpx
+
+import config.database as database
+from config.database import close_db, init_db
+from models import Autor, BoletimOcorrencia, Declarante
+from models.boletim_ocorrencia import StatusBoletim, TipoOcorrencia
+
+TAMANHO_AMOSTRA = 200
+TAMANHO_LOTE_BULK = 100
+
+
+@dataclass
+class Amostra:
+    autores: list[str] = field(default_factory=list)
+    declarantes: list[str] = field(default_factory=list)
+    boletins: list[str] = field(default_factory=list)
+    datas: list[str] = field(default_factory=list)
+    postos: list[str] = field(default_factory=list)
+    lotacoes: list[str] = field(default_factory=list)
+    nomes: list[str] = field(default_factory=list)
+    cpfs: list[str] = field(default_factory=list)
+
+
+@dataclass
+class Cenario:
+    nome: str
+    preparar: Callable[[httpx.AsyncClient, Amostra, random.Random], Awaitable[tuple[str, str, dict]]]
+    escrita: bool = False
+
+
+async def _amostrar(modelo, projecao: dict) -> list[dict]:
+    cursor = await modelo.get_pymongo_collection().aggregate([
+        {"$sample": {"size": TAMANHO_AMOSTRA}},
+        {"$project": projecao}
+    ])
+    return await cursor.to_list()
+
+
+async def coletar_amostra() -> Amostra:
+    """
+    Sorteia identificadores e valores reais do banco para parametrizar as requisições.
+    """
+    autores = await _amostrar(Autor, {"posto": 1, "lotacao": 1})
+    declarantes = await _amostrar(Declarante, {"nome": 1, "cpf": 1})
+    boletins = await _amostrar(BoletimOcorrencia, {"data_registro": 1})
+    if not autores or not boletins:
+        raise SystemExit("Banco vazio: rode antes python -m scripts.gerar_dados")
+
+    return Amostra(
+        autores=[str(a["_id"]) for a in autores],
+        declarantes=[str(d["_id"]) for d in declarantes],
+        boletins=[str(b["_id"]) for b in boletins],
+        datas=[b["data_registro"].date().isoformat() for b in boletins],
+        postos=sorted({a["posto"] for a in autores}),
+        lotacoes=sorted({a["lotacao"] for a in autores}),
+        nomes=[d["nome"].split()[0][:4] + " " + d["nome"].split()[-1][:3] for d in declarantes],
+        cpfs=[d["cpf"][:7] for d in declarantes],
+    )
+
+
+def _novo_boletim(amostra: Amostra, rng: random.Random) -> dict:
+    return {
+        "tipo_ocorrencia": rng.choice(list(TipoOcorrencia)).value,
+        "status": StatusBoletim.REGISTRADO.value,
+        "autor": rng.choice(amostra.autores),
+        "declarantes": rng.sample(amostra.declarantes, k=min(2, len(amostra.declarantes))),
+    }
+
+
+def _novo_autor(rng: random.Random) -> dict:
+    return {"nome": "Carga", "matricula": f"carga-{time.time_ns()}-{rng.random()}", "posto": "Soldado", "lotacao": "Carga"}
+
+
+def _novo_declarante(rng: random.Random) -> dict:
+    return {"nome": "Declarante Carga", "cpf": f"carga-{time.time_ns()}-{rng.random()}", "endereco": "Rua da Carga", "tipo_envolvimento": "Testemunha"}
+
+
+async def _criar(cliente: httpx.AsyncClient, caminho: str, corpo: dict) -> str:
+    resposta = await cliente.post(caminho, json=corpo)
+    resposta.raise_for_status()
+    dados = resposta.json()
+    return dados.get("id") or dados.get("_id")
+
+
+def _get(caminho: Callable[[Amostra, random.Random], str], parametros: Callable[[Amostra, random.Random], dict] = lambda a, r: {}):
+    async def preparar(cliente, amostra, rng):
+        return "GET", caminho(amostra, rng), {"params": parametros(amostra, rng)}
+    return preparar
+
+
+def _intervalo(amostra: Amostra, rng: random.Random, dias: int) -> dict:
+    fim = date.fromisoformat(rng.choice(amostra.datas))
+    return {"inicio": (fim - timedelta(days=dias)).isoformat(), "fim": fim.isoformat()}
+
+
+def _busca_boletins(amostra: Amostra, rng: random.Random) -> dict:
+    intervalo = _intervalo(amostra, rng, 30)
+    return {
+        "data_inicio": intervalo["inicio"],
+        "data_fim": intervalo["fim"],
+        "status": [StatusBoletim.REGISTRADO.value, StatusBoletim.EM_ANALISE.value],
+        "lotacao": rng.choice(amostra.lotacoes),
+    }
+
+
+def montar_cenarios() -> list[Cenario]:
+    """
+    Um cenário por rota de routes/, com parâmetros sorteados da amostra.
+    """
+    async def post_autor(cliente, amostra, rng):
+        return "POST", "/autores/", {"json": _novo_autor(rng)}
+
+    async def patch_autor(cliente, amostra, rng):
+        return "PATCH", f"/autores/{rng.choice(amostra.autores)}", {"json": {"nome": f"Autor {rng.randint(0, 9999)}"}}
+
+    async def put_autor(cliente, amostra, rng):
+        id_autor = await _criar(cliente, "/autores/", _novo_autor(rng))
+        return "PUT", f"/autores/{id_autor}", {"json": _novo_autor(rng)}
+
+    async def delete_autor(cliente, amostra, rng):
+        return "DELETE", f"/autores/{await _criar(cliente, '/autores/', _novo_autor(rng))}", {}
+
+    async def post_boletim(cliente, amostra, rng):
+        return "POST", "/boletins/", {"json": _novo_boletim(amostra, rng)}
+
+    async def bulk_boletins(cliente, amostra, rng):
+        linhas = "\n".join(json.dumps(_novo_boletim(amostra, rng)) for _ in range(TAMANHO_LOTE_BULK))
+        return "POST", "/boletins/bulk", {"content": linhas, "headers": {"content-type": "application/x-ndjson"}}
+
+    async def patch_boletim(cliente, amostra, rng):
+        return "PATCH", f"/boletins/{rng.choice(amostra.boletins)}", {"json": {"status": rng.choice(list(StatusBoletim)).value}}
+
+    async def put_boletim(cliente, amostra, rng):
+        return "PUT", f"/boletins/{rng.choice(amostra.boletins)}", {"json": _novo_boletim(amostra, rng)}
+
+    async def delete_boletim(cliente, amostra, rng):
+        return "DELETE", f"/boletins/{await _criar(cliente, '/boletins/', _novo_boletim(amostra, rng))}", {}
+
+    async def post_declarante(cliente, amostra, rng):
+        return "POST", "/declarantes/", {"json": _novo_declarante(rng)}
+
+    async def patch_declarante(cliente, amostra, rng):
+        return "PATCH", f"/declarantes/{rng.choice(amostra.declarantes)}", {"json": {"endereco": f"Rua {rng.randint(0, 9999)}"}}
+
+    async def put_declarante(cliente, amostra, rng):
+        id_declarante = await _criar(cliente, "/declarantes/", _novo_declarante(rng))
+        return "PUT", f"/declarantes/{id_declarante}", {"json": _novo_declarante(rng)}
+
+    async def delete_declarante(cliente, amostra, rng):
+        return "DELETE", f"/declarantes/{await _criar(cliente, '/declarantes/', _novo_declarante(rng))}", {}
+
+    return [
+        Cenario("POST /autores/", post_autor, escrita=True),
+        Cenario("GET /autores/", _get(lambda a, r: "/autores/")),
+        Cenario("GET /autores/ranking", _get(lambda a, r: "/autores/ranking")),
+        Cenario("GET /autores/{id}", _get(lambda a, r: f"/autores/{r.choice(a.autores)}")),
+        Cenario("PATCH /autores/{id}", patch_autor, escrita=True),
+        Cenario("PUT /autores/{id}", put_autor, escrita=True),
+        Cenario("DELETE /autores/{id}", delete_autor, escrita=True),
+
+        Cenario("POST /boletins/", post_boletim, escrita=True),
+        Cenario("POST /boletins/bulk", bulk_boletins, escrita=True),
+        Cenario("GET /boletins/", _get(lambda a, r: "/boletins/")),
+        Cenario("GET /boletins/busca", _get(
+            lambda a, r: "/boletins/busca",
+            lambda a, r: _busca_boletins(a, r)
+        )),
+        Cenario("GET /boletins/exportar", _get(lambda a, r: "/boletins/exportar", lambda a, r: {"data": r.choice(a.datas)})),
+        Cenario("GET /boletins/multiplos-declarantes", _get(lambda a, r: "/boletins/multiplos-declarantes")),
+        Cenario("GET /boletins/por-data", _get(lambda a, r: "/boletins/por-data", lambda a, r: {"data": r.choice(a.datas)})),
+        Cenario("GET /boletins/por-posto/{posto}", _get(lambda a, r: f"/boletins/por-posto/{r.choice(a.postos)}")),
+        Cenario("GET /boletins/abertos/lotacao/{lotacao}", _get(lambda a, r: f"/boletins/abertos/lotacao/{r.choice(a.lotacoes)}")),
+        Cenario("GET /boletins/{id}", _get(lambda a, r: f"/boletins/{r.choice(a.boletins)}")),
+        Cenario("GET /boletins/{id}/historico", _get(lambda a, r: f"/boletins/{r.choice(a.boletins)}/historico")),
+        Cenario("PATCH /boletins/{id}", patch_boletim, escrita=True),
+        Cenario("PUT /boletins/{id}", put_boletim, escrita=True),
+        Cenario("DELETE /boletins/{id}", delete_boletim, escrita=True),
+
+        Cenario("POST /declarantes/", post_declarante, escrita=True),
+        Cenario("GET /declarantes/", _get(lambda a, r: "/declarantes/")),
+        Cenario("GET /declarantes/busca (nome)", _get(lambda a, r: "/declarantes/busca", lambda a, r: {"q": r.choice(a.nomes)})),
+        Cenario("GET /declarantes/busca (cpf)", _get(lambda a, r: "/declarantes/busca", lambda a, r: {"q": r.choice(a.cpfs)})),
+        Cenario("GET /declarantes/sem-boletim", _get(lambda a, r: "/declarantes/sem-boletim")),
+        Cenario("GET /declarantes/ranking", _get(lambda a, r: "/declarantes/ranking")),
+        Cenario("GET /declarantes/reincidentes/tipo", _get(lambda a, r: "/declarantes/reincidentes/tipo")),
+        Cenario("GET /declarantes/{id}", _get(lambda a, r: f"/declarantes/{r.choice(a.declarantes)}")),
+        Cenario("PATCH /declarantes/{id}", patch_declarante, escrita=True),
+        Cenario("PUT /declarantes/{id}", put_declarante, escrita=True),
+        Cenario("DELETE /declarantes/{id}", delete_declarante, escrita=True),
+
+        Cenario("GET /estatisticas/ (mes)", _get(
+            lambda a, r: "/estatisticas/",
+            lambda a, r: {**_intervalo(a, r, 365), "agrupamento": "mes", "por": "status"}
+        )),
+        Cenario("GET /metricas/cache", _get(lambda a, r: "/metricas/cache")),
+        Cenario("GET /metricas/pool", _get(lambda a, r: "/metricas/pool")),
+    ]
+
+
+async def estatisticas_servidor() -> dict:
+    """
+    Lê do serverStatus os contadores usados para medir o trabalho do MongoDB em cada rota.
+    """
+    status = await database.client.admin.command("serverStatus")
+    metricas = status.get("metrics", {})
+    executor = metricas.get("queryExecutor", {})
+    return {
+        **{f"op_{nome}": valor for nome, valor in status.get("opcounters", {}).items()},
+        "chaves_examinadas": executor.get("scanned", 0),
+        "documentos_examinados": executor.get("scannedObjects", 0),
+        "documentos_retornados": metricas.get("document", {}).get("returned", 0),
+    }
+
+
+async def executar_cenario(cliente: httpx.AsyncClient, cenario: Cenario, amostra: Amostra, requisicoes: int, concorrencia: int, semente: int) -> dict:
+    latencias = []
+    erros = 0
+    primeiro_erro = None
+    restantes = iter(range(requisicoes))
+
+    async def trabalhador(indice: int):
+        nonlocal erros, primeiro_erro
+        rng = random.Random(semente * 1000 + indice)
+        for _ in restantes:
+            try:
+                metodo, caminho, opcoes = await cenario.preparar(cliente, amostra, rng)
+                inicio = time.perf_counter()
+                resposta = await cliente.request(metodo, caminho, **opcoes)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                if resposta.status_code >= 400:
+                    erros += 1
+                    primeiro_erro = primeiro_erro or f"{metodo} {caminho} -> {resposta.status_code} {resposta.text[:200]}"
+            except httpx.HTTPError as e:
+                erros += 1
+                primeiro_erro = primeiro_erro or f"{metodo} {caminho} -> {type(e).__name__}: {e}"
+
+    antes = await estatisticas_servidor()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador(i) for i in range(concorrencia)))
+    duracao = time.perf_counter() - inicio
+    depois = await estatisticas_servidor()
+
+    percentis = statistics.quantiles(latencias, n=100) if len(latencias) > 1 else [latencias[0] if latencias else 0.0] * 99
+    total = max(len(latencias), 1)
+    return {
+        "requisicoes": len(latencias),
+        "erros": erros,
+        "primeiro_erro": primeiro_erro,
+        "vazao_rps": len(latencias) / duracao if duracao else 0.0,
+        "p50_ms": percentis[49],
+        "p95_ms": percentis[94],
+        "p99_ms": percentis[98],
+        "mongo_por_requisicao": {chave: (depois[chave] - antes.get(chave, 0)) / total for chave in depois},
+    }
+
+
+def _variacao(atual: float, base: float) -> str:
+    if not base:
+        return "   n/d"
+    return f"{(atual - base) / base * 100:+6.1f}%"
+
+
+def imprimir(resultados: dict, base: dict | None):
+    cabecalho = f"{'rota':<44} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'erros':>6} {'docs ex.':>9} {'chaves ex.':>10}"
+    if base:
+        cabecalho += f" {'Δp50':>8} {'Δp99':>8} {'Δrps':>8}"
+    print(cabecalho)
+    for nome, r in resultados.items():
+        mongo = r["mongo_por_requisicao"]
+        linha = (
+            f"{nome:<44} {r['vazao_rps']:8.1f} {r['p50_ms']:8.2f} {r['p95_ms']:8.2f} {r['p99_ms']:8.2f} {r['erros']:6d}"
+            f" {mongo['documentos_examinados']:9.1f} {mongo['chaves_examinadas']:10.1f}"
+        )
+        if base and nome in base:
+            anterior = base[nome]
+            linha += (
+                f" {_variacao(r['p50_ms'], anterior['p50_ms']):>8} {_variacao(r['p99_ms'], anterior['p99_ms']):>8}"
+                f" {_variacao(r['vazao_rps'], anterior['vazao_rps']):>8}"
+            )
+        print(linha)
+
+
+async def main(args):
+    await init_db()
+    amostra = await coletar_amostra()
+    cenarios = [
+        c for c in montar_cenarios()
+        if (args.escritas or not c.escrita) and (not args.rotas or any(filtro in c.nome for filtro in args.rotas))
+    ]
+
+    if args.url:
+        cliente = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+    else:
+        from main import app
+        cliente = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=args.timeout)
+
+    resultados = {}
+    async with cliente:
+        for cenario in cenarios:
+            # Aquecimento: estabelece conexões e popula caches antes da medição.
+            await executar_cenario(cliente, cenario, amostra, min(args.concorrencia, args.requisicoes), args.concorrencia, args.semente)
+            resultados[cenario.nome] = await executar_cenario(
+                cliente, cenario, amostra, args.requisicoes, args.concorrencia, args.semente
+            )
+            print(f"  {cenario.nome}: {resultados[cenario.nome]['p50_ms']:.2f} ms p50", flush=True)
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)["resultados"]
+    imprimir(resultados, base)
+
+    if args.salvar:
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump({"parametros": vars(args), "resultados": resultados}, arquivo, indent=2, ensure_ascii=False)
+    await close_db()
+
+    # Leituras usam ids amostrados do próprio banco: qualquer resposta >= 400 é defeito, não ruído da carga.
+    com_erro = {c.nome: resultados[c.nome] for c in cenarios if not c.escrita and resultados[c.nome]["erros"]}
+    if com_erro:
+        for nome, r in com_erro.items():
+            print(f"ERRO {nome}: {r['erros']} falhas; primeira: {r['primeiro_erro']}", file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga das rotas da API")
+    parser.add_argument("--url", help="URL de um servidor em execução; sem ela a aplicação roda no mesmo processo")
+    parser.add_argument("--requisicoes", type=int, default=200, help="requisições medidas por rota")
+    parser.add_argument("--concorrencia", type=int, default=16, help="requisições simultâneas")
+    parser.add_argument("--rotas", nargs="*", help="roda apenas as rotas cujo nome contém algum destes trechos")
+    parser.add_argument("--escritas", action="store_true", help="inclui as rotas que alteram dados")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--salvar", help="grava os resultados em JSON para comparação futura")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior (--salvar) usado como linha de base")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,159 @@
+"""
+Mede a latência (p50/p99) da criação e da atualização de boletins contra um MongoDB local.
+
+Compara o caminho atual do BoletimService (buscas em paralelo e $set único) com uma referência
+sequencial equivalente à implementação anterior (get do boletim, get do autor, find dos
+declarantes, save() do documento inteiro e atualização dos dados derivados, um após o outro).
+
+Uso: python -m scripts.benchmark_escrita [--operacoes 500] [--declarantes 3] [--sem-cache]
+
+Os documentos criados usam uma matrícula/CPF com o prefixo "bench-" e são removidos ao final.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from config.database import close_db, init_db
+from models import Autor, BoletimOcorrencia, Declarante, RankingAutor, RankingDeclarante
+from models.boletim_ocorrencia import StatusBoletim, TipoOcorrencia
+from schemas.boletim import BoletimOcorrenciaCreate
+from service.boletim import BoletimService, resumo_do_autor
+from service.cache import cache_autores, cache_declarantes
+from service.cache_respostas import cache_respostas
+
+PREFIXO = "bench-"
+
+
+async def _preparar(quantidade_declarantes: int) -> tuple[Autor, list[Declarante]]:
+    autor = Autor(nome="Benchmark", matricula=f"{PREFIXO}{time.time_ns()}", posto="Soldado", lotacao="Benchmark")
+    await autor.insert()
+    declarantes = []
+    for i in range(quantidade_declarantes):
+        declarante = Declarante(
+            nome=f"Declarante {i}",
+            cpf=f"{PREFIXO}{time.time_ns()}-{i}",
+            endereco="Rua do Benchmark",
+            tipo_envolvimento="Testemunha"
+        )
+        await declarante.insert()
+        declarantes.append(declarante)
+    return autor, declarantes
+
+
+async def _limpar(service: BoletimService, criados: list, autor: Autor, declarantes: list[Declarante]):
+    # Os boletins saem pelo serviço, para desfazer rankings e estatísticas.
+    for id_boletim in criados:
+        await service.delete_boletim(id_boletim)
+    await BoletimOcorrencia.find({"autor.$id": autor.id}).delete()
+    await RankingAutor.find({"_id": autor.id}).delete()
+    await RankingDeclarante.find({"_id": {"$in": [d.id for d in declarantes]}}).delete()
+    await Declarante.find({"_id": {"$in": [d.id for d in declarantes]}}).delete()
+    await autor.delete()
+
+
+async def _derivados_sequencial(service: BoletimService, alteracoes: list):
+    await service.ranking.aplicar_alteracoes(alteracoes)
+    await service.estatisticas.aplicar_alteracoes(alteracoes)
+    await cache_respostas.invalidar("boletins")
+
+
+async def _update_sequencial(service: BoletimService, id_boletim, dados: BoletimOcorrenciaCreate):
+    boletim = await BoletimOcorrencia.get(id_boletim)
+    anterior = boletim.model_copy()
+    autor = await Autor.get(dados.autor)
+    declarantes = await Declarante.find({"_id": {"$in": dados.declarantes}}).to_list()
+    boletim.tipo_ocorrencia = dados.tipo_ocorrencia
+    boletim.status = dados.status
+    boletim.autor = autor
+    boletim.autor_resumo = resumo_do_autor(autor)
+    boletim.declarantes = declarantes
+    boletim.total_declarantes = len(declarantes)
+    boletim.multiplos_declarantes = len(declarantes) > 1
+    await boletim.save()
+    await _derivados_sequencial(service, [(anterior, boletim)])
+
+
+async def _create_sequencial(service: BoletimService, dados: BoletimOcorrenciaCreate):
+    autor = await Autor.get(dados.autor)
+    declarantes = await Declarante.find({"_id": {"$in": dados.declarantes}}).to_list()
+    boletim = BoletimOcorrencia(
+        tipo_ocorrencia=dados.tipo_ocorrencia,
+        status=dados.status,
+        autor=autor,
+        declarantes=declarantes,
+        autor_resumo=resumo_do_autor(autor),
+        total_declarantes=len(declarantes),
+        multiplos_declarantes=len(declarantes) > 1
+    )
+    await boletim.insert()
+    await _derivados_sequencial(service, [(None, boletim)])
+    return boletim
+
+
+async def _medir(operacao, repeticoes: int, sem_cache: bool) -> list[float]:
+    latencias = []
+    for i in range(repeticoes):
+        if sem_cache:
+            cache_autores.limpar()
+            cache_declarantes.limpar()
+        inicio = time.perf_counter()
+        await operacao(i)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return latencias
+
+
+def _resumo(nome: str, latencias: list[float]) -> str:
+    percentis = statistics.quantiles(latencias, n=100)
+    return f"{nome:<24} p50={percentis[49]:7.2f} ms  p99={percentis[98]:7.2f} ms  n={len(latencias)}"
+
+
+async def main(operacoes: int, quantidade_declarantes: int, sem_cache: bool):
+    await init_db()
+    service = BoletimService()
+    autor, declarantes = await _preparar(quantidade_declarantes)
+    status_possiveis = list(StatusBoletim)
+
+    def dados(i: int) -> BoletimOcorrenciaCreate:
+        return BoletimOcorrenciaCreate(
+            tipo_ocorrencia=TipoOcorrencia.FURTO,
+            status=status_possiveis[i % len(status_possiveis)],
+            autor=autor.id,
+            declarantes=[d.id for d in declarantes]
+        )
+
+    criados_sequencial = []
+    criados_atual = []
+    try:
+        async def create_sequencial(i):
+            criados_sequencial.append((await _create_sequencial(service, dados(i))).id)
+
+        async def create_atual(i):
+            criados_atual.append((await service.create_boletim(dados(i))).id)
+
+        async def update_sequencial(i):
+            await _update_sequencial(service, criados_sequencial[i], dados(i + 1))
+
+        async def update_atual(i):
+            await service.update_boletim(criados_atual[i], dados(i + 1))
+
+        resultados = [
+            ("create (sequencial)", await _medir(create_sequencial, operacoes, sem_cache)),
+            ("create (atual)", await _medir(create_atual, operacoes, sem_cache)),
+            ("update (sequencial)", await _medir(update_sequencial, operacoes, sem_cache)),
+            ("update (atual)", await _medir(update_atual, operacoes, sem_cache)),
+        ]
+        for nome, latencias in resultados:
+            print(_resumo(nome, latencias))
+    finally:
+        await _limpar(service, criados_sequencial + criados_atual, autor, declarantes)
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de latência das escritas de boletins")
+    parser.add_argument("--operacoes", type=int, default=500)
+    parser.add_argument("--declarantes", type=int, default=3)
+    parser.add_argument("--sem-cache", action="store_true", help="limpa o cache de autores/declarantes antes de cada operação")
+    args = parser.parse_args()
+    asyncio.run(main(args.operacoes, args.declarantes, args.sem_cache))
@@ -0,0 +1,162 @@
+"""
+Micro-benchmark das listagens: linhas por segundo do caminho documento bruto -> JSON da resposta.
+
+Compara, para GET /autores/, GET /declarantes/ e GET /boletins/, a construção anterior (documento
+validado pelo Beanie e revalidado pelo response_model) com o caminho enxuto de service/leitura.py
+(dicionários já projetados no formato da resposta; boletins montados com model_construct).
+A serialização é a mesma do FastAPI (serialize_response + classe de resposta padrão) e os documentos
+são gerados em memória, então o tempo do MongoDB fica de fora; o script confere se o JSON é o mesmo.
+
+Uso: python -m scripts.benchmark_leitura [--linhas 50] [--repeticoes 200]
+"""
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime
+
+from bson import DBRef, ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from config.database import close_db, init_db
+from models import Autor, BoletimOcorrencia, Declarante
+from models.boletim_ocorrencia import StatusBoletim, TipoOcorrencia
+from models.declarante import TipoEnvolvimento
+from schemas.autor import AutorResponse
+from schemas.boletim import BoletimOcorrenciaDetalhado
+from schemas.declarante import DeclaranteResponse
+from scripts.gerar_dados import formatar_cpf, nome_aleatorio
+from service.leitura import (
+    PROJECAO_AUTOR_RESPOSTA, PROJECAO_DECLARANTE_RESPOSTA, autor_vinculado, boletim_de_documento, declarante_vinculado,
+)
+from service.vinculos import PROJECAO_AUTOR, PROJECAO_DECLARANTE
+
+
+def _autores(rng: random.Random, quantidade: int) -> list[dict]:
+    return [
+        {"_id": ObjectId(), "nome": nome_aleatorio(rng), "matricula": f"M{i:08d}", "posto": "Cabo", "lotacao": "Delegacia 1", "versao": 0}
+        for i in range(quantidade)
+    ]
+
+
+def _declarantes(rng: random.Random, quantidade: int) -> list[dict]:
+    return [
+        {
+            "_id": ObjectId(), "nome": nome_aleatorio(rng), "cpf": formatar_cpf(i), "endereco": f"Rua {i}",
+            "tipo_envolvimento": rng.choice(list(TipoEnvolvimento)).value, "versao": 0,
+        }
+        for i in range(quantidade)
+    ]
+
+
+def _boletins(rng: random.Random, quantidade: int, autores: list[dict], declarantes: list[dict]) -> list[dict]:
+    boletins = []
+    for _ in range(quantidade):
+        vinculados = rng.sample(declarantes, k=rng.randint(1, 3))
+        situacao = rng.choice(list(StatusBoletim)).value
+        boletins.append({
+            "_id": ObjectId(),
+            "data_registro": datetime(2024, rng.randint(1, 12), rng.randint(1, 28)),
+            "tipo_ocorrencia": rng.choice(list(TipoOcorrencia)).value,
+            "status": situacao,
+            "autor": DBRef(Autor.get_collection_name(), rng.choice(autores)["_id"]),
+            "declarantes": [DBRef(Declarante.get_collection_name(), d["_id"]) for d in vinculados],
+            "autor_resumo": {"posto": "cabo", "lotacao": "delegacia 1"},
+            "total_declarantes": len(vinculados),
+            "versao": 0,
+            "historico_alteracoes": [{"status_anterior": None, "status_novo": situacao, "data": datetime(2024, 1, 1), "versao": 0}],
+        })
+    return boletins
+
+
+def _projetar(documento: dict, projecao: dict) -> dict:
+    return {"_id": documento["_id"], **{campo: documento[campo] for campo in projecao}}
+
+
+def _como_resposta(documento: dict, projecao: dict) -> dict:
+    # O que o MongoDB devolve para PROJECAO_*_RESPOSTA: _id renomeado para id.
+    return {"id": documento["_id"], **{campo: documento[campo] for campo in projecao if campo not in ("_id", "id")}}
+
+
+def _boletins_validados(documentos: list[dict], autores: list[dict], declarantes: list[dict]) -> list[BoletimOcorrencia]:
+    # Referência do caminho anterior: to_list() do Beanie seguido de resolver_vinculos.
+    por_id_autor = {a["_id"]: Autor.model_validate(_projetar(a, PROJECAO_AUTOR)) for a in autores}
+    por_id_declarante = {d["_id"]: Declarante.model_validate(_projetar(d, PROJECAO_DECLARANTE)) for d in declarantes}
+    boletins = [BoletimOcorrencia.model_validate(documento) for documento in documentos]
+    for boletim in boletins:
+        boletim.autor = por_id_autor.get(boletim.id_autor(), boletim.autor)
+        boletim.declarantes = [
+            por_id_declarante.get(id_declarante, vinculo)
+            for id_declarante, vinculo in zip(boletim.ids_declarantes(), boletim.declarantes)
+        ]
+    return boletins
+
+
+def _boletins_construidos(documentos: list[dict], autores: list[dict], declarantes: list[dict]) -> list[BoletimOcorrencia]:
+    por_id_autor = {a["_id"]: autor_vinculado(_projetar(a, PROJECAO_AUTOR)) for a in autores}
+    por_id_declarante = {d["_id"]: declarante_vinculado(_projetar(d, PROJECAO_DECLARANTE)) for d in declarantes}
+    return [boletim_de_documento(documento, por_id_autor, por_id_declarante) for documento in documentos]
+
+
+async def _renderizar(campo, itens) -> bytes:
+    conteudo = await serialize_response(field=campo, response_content=itens)
+    return JSONResponse(conteudo).body
+
+
+async def _medir(construir, campo, repeticoes: int, linhas: int) -> tuple[float, bytes]:
+    corpo = b""
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        corpo = await _renderizar(campo, construir())
+    return repeticoes * linhas / (time.perf_counter() - inicio), corpo
+
+
+async def main(linhas: int, repeticoes: int):
+    await init_db()
+    rng = random.Random(42)
+    autores = _autores(rng, linhas)
+    declarantes = _declarantes(rng, linhas)
+    boletins = _boletins(rng, linhas, autores, declarantes)
+    autores_projetados = [_como_resposta(documento, PROJECAO_AUTOR_RESPOSTA) for documento in autores]
+    declarantes_projetados = [_como_resposta(documento, PROJECAO_DECLARANTE_RESPOSTA) for documento in declarantes]
+
+    rotas = [
+        (
+            "GET /autores/", list[AutorResponse],
+            lambda: [Autor.model_validate(documento) for documento in autores],
+            lambda: list(autores_projetados),
+        ),
+        (
+            "GET /declarantes/", list[DeclaranteResponse],
+            lambda: [Declarante.model_validate(documento) for documento in declarantes],
+            lambda: list(declarantes_projetados),
+        ),
+        (
+            "GET /boletins/", list[BoletimOcorrenciaDetalhado],
+            lambda: _boletins_validados(boletins, autores, declarantes),
+            lambda: _boletins_construidos(boletins, autores, declarantes),
+        ),
+    ]
+
+    try:
+        for nome, tipo, anterior, enxuto in rotas:
+            campo = create_model_field(name="resposta", type_=tipo, mode="serialization")
+            linhas_anterior, corpo_anterior = await _medir(anterior, campo, repeticoes, linhas)
+            linhas_enxuto, corpo_enxuto = await _medir(enxuto, campo, repeticoes, linhas)
+            igual = "mesmo JSON" if corpo_anterior == corpo_enxuto else "JSON DIFERENTE"
+            print(
+                f"{nome:<18} anterior={linhas_anterior:10.0f} linhas/s  enxuto={linhas_enxuto:10.0f} linhas/s"
+                f"  ({linhas_enxuto / linhas_anterior:.2f}x, {igual})"
+            )
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark do caminho de leitura das listagens")
+    parser.add_argument("--linhas", type=int, default=50, help="tamanho da página serializada")
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.linhas, args.repeticoes))
@@ -0,0 +1,190 @@
+"""
+Gera uma massa de dados sintética para benchmarks, com a distribuição desigual que aparece em produção:
+poucos autores concentrando muitos boletins, declarantes reincidentes e boletins com vários declarantes.
+
+Uso: python -m scripts.gerar_dados --escala 10k|1m|10m [--semente 42] [--limpar]
+
+Grava direto no banco configurado (MONGODB_URL / MONGODB_DB_NAME); use um banco separado para benchmarks.
+Ao final reconstrói rankings e estatísticas, deixando os dados derivados consistentes.
+"""
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from bson import DBRef, ObjectId
+
+from config.database import init_db
+from models import Autor, BoletimOcorrencia, Declarante, EstatisticaDiaria, HistoricoBoletim, RankingAutor, RankingDeclarante
+from models.boletim_ocorrencia import StatusBoletim, TipoOcorrencia
+from models.declarante import TipoEnvolvimento
+from service.boletim import TAMANHO_LOTE
+from service.declarante import campos_de_busca
+from service.estatistica import EstatisticaService
+from service.normalizacao import normalizar_texto
+from service.ranking import RankingService
+
+ESCALAS = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+TAMANHO_BLOCO = 10 * TAMANHO_LOTE
+
+NOMES = ["José", "Maria", "João", "Ana", "Antônio", "Francisca", "Carlos", "Luíza", "Paulo", "Márcia",
+         "Pedro", "Adriana", "Lucas", "Juliana", "Luís", "Patrícia", "Marcos", "Aline", "Gabriel", "Fátima"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima",
+              "Gomes", "Ribeiro", "Carvalho", "Araújo", "Conceição", "Magalhães", "Nascimento", "Simões"]
+POSTOS = ["Soldado", "Cabo", "Sargento", "Subtenente", "Tenente", "Capitão", "Major"]
+PESOS_POSTOS = [40, 25, 15, 8, 7, 4, 1]
+
+# Distribuições desiguais: a maioria dos boletins está registrada/em análise, poucos tipos dominam
+# e a maior parte tem um único declarante.
+PESOS_STATUS = {
+    StatusBoletim.REGISTRADO: 35, StatusBoletim.EM_ANALISE: 20, StatusBoletim.EM_INVESTIGACAO: 15,
+    StatusBoletim.COMPLEMENTADO: 5, StatusBoletim.ENCAMINHADO: 8, StatusBoletim.SUSPENSO: 2,
+    StatusBoletim.ARQUIVADO: 10, StatusBoletim.CONCLUIDO: 5,
+}
+QUANTIDADE_DECLARANTES = [1, 2, 3, 4, 5]
+PESOS_QUANTIDADE_DECLARANTES = [60, 25, 9, 4, 2]
+
+
+def pesos_zipf(quantidade: int, expoente: float = 1.1) -> list[float]:
+    """
+    Pesos acumulados de uma distribuição de Zipf: o item de posição k tem peso proporcional a 1/k^expoente.
+
+    :param quantidade: Número de itens.
+    :param expoente: Concentração da distribuição (maior = mais desigual).
+    :return: Pesos acumulados, para uso em random.choices(cum_weights=...).
+    """
+    return list(itertools.accumulate(1 / (k ** expoente) for k in range(1, quantidade + 1)))
+
+
+def nome_aleatorio(rng: random.Random) -> str:
+    return f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+
+
+def formatar_cpf(numero: int) -> str:
+    digitos = f"{numero:011d}"
+    return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+
+
+async def _inserir(modelo, documentos: list[dict]):
+    if documentos:
+        await modelo.get_pymongo_collection().insert_many(documentos, ordered=False)
+
+
+async def gerar_autores(rng: random.Random, quantidade: int, lotacoes: list[str]) -> list[dict]:
+    pesos_lotacoes = pesos_zipf(len(lotacoes))
+    autores = []
+    for i in range(quantidade):
+        posto = rng.choices(POSTOS, weights=PESOS_POSTOS)[0]
+        lotacao = rng.choices(lotacoes, cum_weights=pesos_lotacoes)[0]
+        autores.append({
+            "_id": ObjectId(),
+            "nome": nome_aleatorio(rng),
+            "matricula": f"M{i:08d}",
+            "posto": posto,
+            "lotacao": lotacao,
+            "versao": 0,
+        })
+    await _inserir(Autor, autores)
+    return autores
+
+
+async def gerar_declarantes(rng: random.Random, quantidade: int) -> list[ObjectId]:
+    ids = []
+    envolvimentos = list(TipoEnvolvimento)
+    for inicio in range(0, quantidade, TAMANHO_BLOCO):
+        bloco = []
+        for i in range(inicio, min(inicio + TAMANHO_BLOCO, quantidade)):
+            nome = nome_aleatorio(rng)
+            cpf = formatar_cpf(i)
+            bloco.append({
+                "_id": ObjectId(),
+                "nome": nome,
+                "cpf": cpf,
+                "endereco": f"Rua {rng.choice(SOBRENOMES)}, {rng.randint(1, 3000)}",
+                "tipo_envolvimento": rng.choice(envolvimentos).value,
+                "quantidade_boletins": 0,
+                "versao": 0,
+                **campos_de_busca(nome, cpf),
+            })
+        await _inserir(Declarante, bloco)
+        ids.extend(d["_id"] for d in bloco)
+    return ids
+
+
+async def gerar_boletins(rng: random.Random, quantidade: int, autores: list[dict], ids_declarantes: list[ObjectId], dias: int):
+    colecao_autor = Autor.get_collection_name()
+    colecao_declarantes = Declarante.get_collection_name()
+    pesos_autores = pesos_zipf(len(autores))
+    pesos_declarantes = pesos_zipf(len(ids_declarantes), 0.8)
+    tipos = list(TipoOcorrencia)
+    pesos_tipos = pesos_zipf(len(tipos), 1.3)
+    situacoes = list(PESOS_STATUS)
+    pesos_situacoes = list(PESOS_STATUS.values())
+    hoje = date.today()
+
+    for inicio in range(0, quantidade, TAMANHO_BLOCO):
+        bloco = []
+        for _ in range(min(TAMANHO_BLOCO, quantidade - inicio)):
+            autor = rng.choices(autores, cum_weights=pesos_autores)[0]
+            total = rng.choices(QUANTIDADE_DECLARANTES, weights=PESOS_QUANTIDADE_DECLARANTES)[0]
+            declarantes = list(dict.fromkeys(rng.choices(ids_declarantes, cum_weights=pesos_declarantes, k=total)))
+            situacao = rng.choices(situacoes, weights=pesos_situacoes)[0]
+            # Datas mais recentes são mais frequentes (distribuição triangular com moda em hoje).
+            registro = hoje - timedelta(days=int(rng.triangular(0, dias, 0)))
+            criado_em = datetime.combine(registro, datetime.min.time(), timezone.utc)
+            bloco.append({
+                "_id": ObjectId(),
+                "data_registro": datetime.combine(registro, datetime.min.time()),
+                "tipo_ocorrencia": rng.choices(tipos, cum_weights=pesos_tipos)[0].value,
+                "status": situacao.value,
+                "autor": DBRef(colecao_autor, autor["_id"]),
+                "declarantes": [DBRef(colecao_declarantes, d) for d in declarantes],
+                "autor_resumo": {"posto": normalizar_texto(autor["posto"]), "lotacao": normalizar_texto(autor["lotacao"])},
+                "total_declarantes": len(declarantes),
+                "multiplos_declarantes": len(declarantes) > 1,
+                "versao": 0,
+                "historico_alteracoes": [
+                    {"status_anterior": None, "status_novo": situacao.value, "data": criado_em, "versao": 0}
+                ],
+            })
+        await _inserir(BoletimOcorrencia, bloco)
+        await _inserir(HistoricoBoletim, [{"boletim": b["_id"], **b["historico_alteracoes"][0]} for b in bloco])
+        print(f"  boletins: {inicio + len(bloco)}/{quantidade}", flush=True)
+
+
+async def main(escala: str, semente: int, limpar: bool, dias: int):
+    await init_db()
+    rng = random.Random(semente)
+
+    if limpar:
+        for modelo in (Autor, Declarante, BoletimOcorrencia, HistoricoBoletim, RankingAutor, RankingDeclarante, EstatisticaDiaria):
+            await modelo.get_pymongo_collection().delete_many({})
+
+    total_boletins = ESCALAS[escala]
+    total_autores = max(20, total_boletins // 2000)
+    total_declarantes = max(100, total_boletins // 3)
+    lotacoes = [f"{rng.choice(['Delegacia', 'Batalhão', 'Companhia'])} {i}" for i in range(1, 41)]
+
+    inicio = time.perf_counter()
+    print(f"Gerando {total_autores} autores, {total_declarantes} declarantes e {total_boletins} boletins")
+    autores = await gerar_autores(rng, total_autores, lotacoes)
+    ids_declarantes = await gerar_declarantes(rng, total_declarantes)
+    await gerar_boletins(rng, total_boletins, autores, ids_declarantes, dias)
+
+    print("Reconstruindo rankings e estatísticas")
+    await RankingService().reconstruir()
+    await EstatisticaService().reconstruir()
+    print(f"Concluído em {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para benchmarks")
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="10k")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--dias", type=int, default=3 * 365, help="intervalo de datas de registro, a partir de hoje")
+    parser.add_argument("--limpar", action="store_true", help="apaga os dados existentes antes de gerar")
+    args = parser.parse_args()
+    asyncio.run(main(args.escala, args.semente, args.limpar, args.dias))
@@ -0,0 +1,67 @@
+from beanie import PydanticObjectId
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+
+
+def filtro_versao(id_documento: PydanticObjectId, versao: int | None) -> dict:
+    """
+    Monta o filtro de uma atualização com controle de concorrência otimista.
+
+    Documentos gravados antes do campo versao existir são tratados como versão 0.
+
+    :param id_documento: Identificador do documento.
+    :param versao: Versão que o cliente leu; None desativa a verificação.
+    :return: Filtro para o find_one_and_update.
+    """
+    filtro = {"_id": id_documento}
+    if versao is not None:
+        filtro["versao"] = versao if versao else {"$in": [0, None]}
+    return filtro
+
+
+def campos_informados(patch) -> dict:
+    """
+    Extrai de um esquema de PATCH apenas os campos enviados pelo cliente, sem a versão e sem nulos.
+
+    :param patch: Esquema com todos os campos opcionais.
+    :return: Dicionário {campo: valor} a alterar.
+    """
+    dados = patch.model_dump(exclude_unset=True, exclude={"versao"})
+    return {campo: valor for campo, valor in dados.items() if valor is not None}
+
+
+async def atualizar_documento(
+    modelo,
+    id_documento: PydanticObjectId,
+    atualizacao: dict | list,
+    versao: int | None,
+    mensagem_nao_encontrado: str,
+) -> dict:
+    """
+    Aplica uma atualização atômica com find_one_and_update, sem leitura prévia do documento.
+
+    :param modelo: Documento do Beanie atualizado.
+    :param id_documento: Identificador do documento.
+    :param atualizacao: Operadores de atualização ou pipeline de atualização.
+    :param versao: Versão esperada (concorrência otimista); None para atualizar incondicionalmente.
+    :param mensagem_nao_encontrado: Detalhe do erro 404.
+    :return: O documento bruto como estava antes da atualização.
+    """
+    colecao = modelo.get_pymongo_collection()
+    anterior = await colecao.find_one_and_update(
+        filtro_versao(id_documento, versao),
+        atualizacao,
+        return_document=ReturnDocument.BEFORE
+    )
+    if anterior is not None:
+        return anterior
+
+    if versao is not None and await colecao.count_documents({"_id": id_documento}, limit=1):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="O documento foi alterado por outra requisição; recarregue-o e tente novamente"
+        )
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=mensagem_nao_encontrado
+    )
@@ -1,7 +1,16 @@
 from fastapi import HTTPException, status
-from schemas.autor import AutorCreate, AutorResponse, AutorRanking
+from pymongo.errors import DuplicateKeyError
+from schemas.autor import AutorCreate, AutorResponse, AutorRanking, AutorPatch
 from beanie import PydanticObjectId
-from models import Autor, BoletimOcorrencia
+from models import Autor, BoletimOcorrencia, RankingAutor
+from config.database import agregar, consulta_analitica
+from service.boletim import resumo_do_autor
+from service.atualizacao import atualizar_documento, campos_informados
+from service.cache import buscar_autor, cache_autores
+from service.cache_respostas import cache_respostas
+from service.estatistica import EstatisticaService
+from service.leitura import PROJECAO_AUTOR_RESPOSTA, listar_documentos
+from service.paginacao import filtro_apos_chave_desc, paginar
 
 
 class AutorService:
@@ -19,6 +28,7 @@ class AutorService:
         try:
             novo_autor = Autor(**autor.model_dump())
             await novo_autor.insert()
+            await cache_respostas.invalidar("autores")
             return novo_autor
         except Exception as e:
             raise HTTPException(
@@ -26,34 +36,25 @@ class AutorService:
                 detail=f"Erro ao criar autor: {str(e)}"
             )
 
-    async def list_autores(self, skip: int, limit: int) -> list[AutorResponse]:
+    async def list_autores(self, skip: int, limit: int, after: str | None = None) -> list[dict]:
         """
         Recupera uma lista paginada de todos os autores cadastrados.
 
         :param skip: Quantidade de registros a serem ignorados no início.
         :param limit: Quantidade máxima de registros a serem retornados.
-        :return: Lista de objetos AutorResponse.
+        :param after: Cursor opaco da página anterior; quando informado, o skip é ignorado.
+        :return: Lista de autores no formato de AutorResponse, como dicionários.
         """
-        return await Autor.find_all().skip(skip).limit(limit).to_list()
+        return await listar_documentos(Autor, PROJECAO_AUTOR_RESPOSTA, skip, limit, after)
 
-    async def ranking_autores(self, skip: int, limit: int) -> list[AutorRanking]:
+    def pipeline_ranking_autores(self, skip: int, limit: int, after: str | None = None) -> list[dict]:
         """
-        Executa uma agregação para ranquear os autores de acordo com o número de boletins registrados.
-
-        O pipeline agrupa os boletins pelo ID do autor, realiza um lookup para buscar os dados cadastrais
-        e ordena os resultados de forma decrescente.
-
-        :param skip: Offset para a paginação dos resultados.
-        :param limit: Limite de autores a serem exibidos no ranking.
-        :return: Lista de autores e seus respectivos totais de boletins.
+        Monta o pipeline de ranking de autores.
         """
-        pipeline = [
-            {
-                "$group": {
-                    "_id": "$autor.$id",
-                    "total_boletins": {"$sum": 1}
-                }
-            },
+        return [
+            {"$match": {"total_boletins": {"$gt": 0}, **filtro_apos_chave_desc(after, "total_boletins")}},
+            {"$sort": {"total_boletins": -1, "_id": 1}},
+            *paginar(skip, limit, after),
             {
                 "$lookup": {
                     "from": "autor",
@@ -63,9 +64,6 @@ class AutorService:
                 }
             },
             {"$unwind": "$dados_autor"},
-            {"$sort": {"total_boletins": -1}},
-            {"$skip": skip},
-            {"$limit": limit},
             {
                 "$project": {
                     "id": "$_id",
@@ -73,12 +71,28 @@ class AutorService:
                     "matricula": "$dados_autor.matricula",
                     "posto": "$dados_autor.posto",
                     "lotacao": "$dados_autor.lotacao",
+                    "versao": "$dados_autor.versao",
                     "total_boletins": 1,
                     "_id": 0
                 }
             }
         ]
-        return await BoletimOcorrencia.aggregate(pipeline).to_list()
+
+    @consulta_analitica
+    async def ranking_autores(self, skip: int, limit: int, after: str | None = None) -> list[AutorRanking]:
+        """
+        Ranqueia os autores de acordo com o número de boletins registrados.
+
+        Lê a página já ordenada da coleção de ranking (mantida pelas escritas de boletins)
+        e só então busca os dados cadastrais dos autores da página.
+
+        :param skip: Offset para a paginação dos resultados.
+        :param limit: Limite de autores a serem exibidos no ranking.
+        :param after: Cursor opaco (total_boletins, id) da página anterior.
+        :return: Lista de autores e seus respectivos totais de boletins.
+        """
+        pipeline = self.pipeline_ranking_autores(skip, limit, after)
+        return await agregar(RankingAutor, pipeline)
 
     async def get_autor(self, id_autor: PydanticObjectId) -> AutorResponse:
         """
@@ -87,7 +101,7 @@ class AutorService:
         :param id_autor: Identificador único do autor (ObjectId).
         :return: O documento do Autor encontrado.
         """
-        autor = await Autor.get(id_autor)
+        autor = await buscar_autor(id_autor)
 
         if not autor:
             raise HTTPException(
@@ -97,27 +111,68 @@ class AutorService:
 
         return autor
 
-    async def update_autor(self, id_autor: PydanticObjectId, autor: AutorResponse) -> AutorResponse:
+    async def update_autor(self, id_autor: PydanticObjectId, autor: AutorCreate) -> AutorResponse:
         """
         Atualiza todos os campos de um autor existente de forma dinâmica.
 
+        Equivale a um PATCH com todos os campos (ver patch_autor).
+
         :param id_autor: Identificador do autor a ser modificado.
         :param autor: Esquema contendo os novos dados para atualização.
         :return: O documento do Autor após a persistência das alterações.
         """
-        autor_att = await Autor.get(id_autor)
+        return await self.patch_autor(id_autor, AutorPatch(**autor.model_dump()))
+
+    async def patch_autor(self, id_autor: PydanticObjectId, patch: AutorPatch) -> AutorResponse:
+        """
+        Atualiza apenas os campos enviados com um único $set atômico, sem ler o autor antes.
+
+        Quando posto ou lotação mudam, o resumo desnormalizado gravado nos boletins do autor é sincronizado,
+        assim como as estatísticas diárias por lotação. Com patch.versao informado, a gravação só ocorre
+        se o autor ainda estiver nessa versão (409 caso contrário).
+
+        :param id_autor: Identificador do autor a ser modificado.
+        :param patch: Campos a alterar.
+        :return: O documento do Autor após a persistência das alterações.
+        """
+        dados = campos_informados(patch)
+        if not dados:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nenhum campo informado para atualização"
+            )
 
-        if not autor_att:
+        try:
+            bruto = await atualizar_documento(
+                Autor, id_autor, {"$set": dados, "$inc": {"versao": 1}}, patch.versao,
+                "Autor não encontrado para atualização"
+            )
+        except HTTPException:
+            raise
+        except DuplicateKeyError:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Autor não encontrado para atualização"
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Já existe um autor com esta matrícula"
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao atualizar autor: {str(e)}"
             )
 
-        update = autor.model_dump()
-        for key, value in update.items():
-            setattr(autor_att, key, value)
+        anterior = Autor.model_validate(bruto)
+        autor_att = anterior.model_copy(update={**dados, "versao": anterior.versao + 1})
+        await cache_respostas.invalidar("autores")
+        cache_autores.invalidar(autor_att.id)
+
+        resumo_anterior = resumo_do_autor(anterior)
+        resumo = resumo_do_autor(autor_att)
+        if resumo != resumo_anterior:
+            await EstatisticaService().mover_lotacao(autor_att.id, resumo_anterior.lotacao, resumo.lotacao)
+            await BoletimOcorrencia.find({"autor.$id": autor_att.id}).update(
+                {"$set": {"autor_resumo": resumo.model_dump()}}
+            )
 
-        await autor_att.save()
         return autor_att
 
     async def delete_autor(self, id_autor: PydanticObjectId):
@@ -136,4 +191,17 @@ class AutorService:
             )
 
         await autor.delete()
-        return {"detail": "Autor deletado com sucesso"}
\ No newline at end of file
+        await cache_respostas.invalidar("autores")
+        cache_autores.invalidar(id_autor)
+        await RankingAutor.find({"_id": id_autor}).delete()
+        return {"detail": "Autor deletado com sucesso"}
+
+    def pipelines_para_explain(self) -> list[tuple[type, list[dict]]]:
+        """
+        Lista os pipelines do serviço com parâmetros de exemplo, para a verificação de planos na inicialização.
+
+        :return: Lista de tuplas (modelo consultado, pipeline).
+        """
+        return [
+            (RankingAutor, self.pipeline_ranking_autores(0, 1)),
+        ]
@@ -1,9 +1,133 @@
-from fastapi import HTTPException, status
+import asyncio
+import logging
+from collections.abc import AsyncIterable, AsyncIterator
 
-from schemas.boletim import BoletimOcorrenciaCreate, BoletimOcorrenciaResponse, BoletimOcorrenciaResponseMultiplosDeclarantes
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+
+from schemas.boletim import (
+    BoletimOcorrenciaCreate,
+    BoletimOcorrenciaPatch,
+    BoletimOcorrenciaResponse,
+    BoletimOcorrenciaResponseMultiplosDeclarantes,
+    BoletimLoteItemResultado,
+    BoletimLoteResponse,
+)
 from models import BoletimOcorrencia, Autor, Declarante
-from beanie import PydanticObjectId
-from datetime import date
+from models.boletim_ocorrencia import AutorResumo, StatusBoletim, TipoOcorrencia
+from beanie import Link, PydanticObjectId
+from bson import DBRef
+from datetime import date, datetime
+from config.database import agregar, colecao_leitura, consulta_analitica, explicar
+from service.cache import buscar_autor, buscar_autores, buscar_declarantes
+from service.atualizacao import atualizar_documento, campos_informados
+from service.cache_respostas import cache_respostas
+from service.condicional import etag
+from service.consulta import ConsultaBoletins, resumo_explain
+from service.normalizacao import normalizar_texto, regex_prefixo
+from service.paginacao import filtro_apos_id, paginar
+from service.estatistica import EstatisticaService
+from service.leitura import PROJECAO_BOLETIM, boletins_enxutos, listar_documentos
+from service.historico import HISTORICO_INLINE, HistoricoService, expressao_historico, nova_alteracao
+from service.ranking import RankingService
+from service.vinculos import PROJECAO_AUTOR, resolver_vinculos
+
+logger = logging.getLogger(__name__)
+
+
+def resumo_do_autor(autor: Autor) -> AutorResumo:
+    """
+    Gera o resumo desnormalizado do autor gravado dentro do boletim.
+
+    :param autor: Documento do autor.
+    :return: Posto e lotação normalizados (sem acentos e em minúsculas).
+    """
+    return AutorResumo(
+        posto=normalizar_texto(autor.posto),
+        lotacao=normalizar_texto(autor.lotacao)
+    )
+
+
+async def resumos_atuais(ids_autores) -> dict[PydanticObjectId, AutorResumo]:
+    """
+    Lê posto e lotação dos autores direto do primário, sem passar pelo cache local.
+
+    O resumo gravado no boletim alimenta as estatísticas por lotação e só é corrigido pelo patch_autor
+    nos boletins que já existem; uma cópia desatualizada do cache ficaria gravada para sempre.
+
+    :param ids_autores: Identificadores dos autores.
+    :return: Resumo de cada autor encontrado.
+    """
+    colecao = colecao_leitura(Autor, analitica=False)
+    documentos = await colecao.find({"_id": {"$in": list(ids_autores)}}, {"posto": 1, "lotacao": 1}).to_list()
+    return {
+        documento["_id"]: AutorResumo(
+            posto=normalizar_texto(documento["posto"]),
+            lotacao=normalizar_texto(documento["lotacao"])
+        )
+        for documento in documentos
+    }
+
+
+def _versao_vinculo(vinculo):
+    # Vínculo cujo documento não existe mais: marca própria, para o ETag mudar quando ele é removido.
+    return "x" if isinstance(vinculo, Link) else vinculo.versao
+
+
+def etag_boletim(boletim: BoletimOcorrencia) -> str:
+    """
+    ETag de um boletim carregado com os vínculos: muda quando o boletim, o autor ou algum declarante é alterado.
+
+    :param boletim: Boletim retornado por get_boletim.
+    :return: ETag fraco (ver BoletimService.revisao_boletim).
+    """
+    return etag(
+        boletim.versao,
+        _versao_vinculo(boletim.autor),
+        *[_versao_vinculo(declarante) for declarante in boletim.declarantes]
+    )
+
+
+TAMANHO_LOTE = 1000
+TAMANHO_LOTE_EXPORTACAO = 1000
+
+PROJECAO_EXPORTACAO = {
+    "data_registro": 1,
+    "tipo_ocorrencia": 1,
+    "status": 1,
+    "autor": 1,
+    "declarantes": 1,
+    "total_declarantes": 1,
+}
+
+ESTAGIOS_LOOKUP_AUTOR = [
+    {
+        "$lookup": {
+            "from": "autor",
+            "localField": "autor.$id",
+            "foreignField": "_id",
+            "as": "autor"
+        }
+    },
+    {"$unwind": "$autor"},
+]
+
+# Formato de BoletimOcorrenciaDetalhado para os pipelines que juntam o autor com ESTAGIOS_LOOKUP_AUTOR.
+PROJECAO_BOLETIM_DETALHADO = {
+    "id": "$_id",
+    "data_registro": 1,
+    "tipo_ocorrencia": 1,
+    "status": 1,
+    "autor": {"id": "$autor._id", **{campo: f"$autor.{campo}" for campo in PROJECAO_AUTOR}},
+    "declarantes": 1,
+    "autor_resumo": 1,
+    "total_declarantes": 1,
+    "versao": 1,
+    "historico_alteracoes": 1,
+    "_id": 0
+}
+
 
 class BoletimService:
 
@@ -11,41 +135,87 @@ class BoletimService:
         """
         Inicializa o serviço de Boletim, instanciando o repositório correspondente.
         """
-        pass
-    async def create_boletim(self, boletim: BoletimOcorrenciaCreate) -> BoletimOcorrencia:
+        self.ranking = RankingService()
+        self.estatisticas = EstatisticaService()
+        self.historico = HistoricoService()
+
+    async def _atualizar_derivados(self, alteracoes: list[tuple[BoletimOcorrencia | None, BoletimOcorrencia | None]]):
         """
-        Cria um novo boletim de ocorrência no banco de dados após validar a existência do autor e dos declarantes informados.
+        Propaga escritas de boletins para os dados derivados (rankings, estatísticas diárias, histórico e cache de respostas).
 
-        :param boletim: Esquema com os dados para criação do boletim.
-        :return: O documento do Boletim de Ocorrência criado.
+        Roda depois que o boletim já foi gravado, então falhas aqui não são repassadas ao cliente (que
+        repetiria a escrita e duplicaria o boletim): são registradas no log e os dados derivados podem
+        ser reconstruídos com scripts.backfill.
+
+        :param alteracoes: Pares (anterior, novo); anterior é None na criação e novo é None na exclusão.
         """
-        dados = boletim.model_dump()
+        if not alteracoes:
+            return
+        derivados = {
+            "rankings": self.ranking.aplicar_alteracoes(alteracoes),
+            "estatisticas": self.estatisticas.aplicar_alteracoes(alteracoes),
+            "historico": self.historico.registrar(alteracoes),
+            "cache de respostas": cache_respostas.invalidar("boletins"),
+        }
+        resultados = await asyncio.gather(*derivados.values(), return_exceptions=True)
+        for nome, resultado in zip(derivados, resultados):
+            if isinstance(resultado, Exception):
+                ids = [str((novo or anterior).id) for anterior, novo in alteracoes]
+                logger.error("Falha ao atualizar %s após gravar os boletins %s", nome, ids, exc_info=resultado)
+
+    async def _validar_vinculos(
+        self, id_autor: PydanticObjectId | None, ids_declarantes: list[PydanticObjectId]
+    ) -> tuple[Autor | None, AutorResumo | None, list[Declarante]]:
+        """
+        Busca o autor, o resumo atual dele e os declarantes referenciados em paralelo e garante que todos existem.
+
+        O autor pode vir do cache local; o resumo é sempre lido do primário (ver resumos_atuais).
 
-        autor = await Autor.get(dados.get("autor"))
-        if not autor:
+        :param id_autor: Identificador do autor informado; None quando o autor não será alterado.
+        :param ids_declarantes: Identificadores dos declarantes informados.
+        :return: O autor, o resumo dele e os declarantes, na ordem em que foram informados.
+        """
+        autor, resumos, encontrados = await asyncio.gather(
+            buscar_autor(id_autor) if id_autor is not None else asyncio.sleep(0),
+            resumos_atuais([id_autor]) if id_autor is not None else asyncio.sleep(0, {}),
+            buscar_declarantes(ids_declarantes)
+        )
+        resumo = resumos.get(id_autor)
+
+        if id_autor is not None and (not autor or resumo is None):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Autor não encontrado. O boletim precisa de um autor válido."
             )
 
-        ids_declarantes = dados.get("declarantes", [])
-        declarantes_encontrados = await Declarante.find(
-            {"_id": {"$in": ids_declarantes}}
-        ).to_list()
-
-        if len(declarantes_encontrados) != len(ids_declarantes):
+        if len(encontrados) != len(ids_declarantes):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Um ou mais declarantes informados são inválidos ou não existem."
             )
 
+        return autor, resumo, [encontrados[id_declarante] for id_declarante in ids_declarantes]
+
+    async def create_boletim(self, boletim: BoletimOcorrenciaCreate) -> BoletimOcorrencia:
+        """
+        Cria um novo boletim de ocorrência no banco de dados após validar a existência do autor e dos declarantes informados.
+
+        :param boletim: Esquema com os dados para criação do boletim.
+        :return: O documento do Boletim de Ocorrência criado.
+        """
+        dados = boletim.model_dump()
+        autor, resumo, declarantes_encontrados = await self._validar_vinculos(dados["autor"], dados.get("declarantes", []))
+
         try:
             dados["autor"] = autor
             dados["declarantes"] = declarantes_encontrados
+            dados["autor_resumo"] = resumo
+            dados["historico_alteracoes"] = [nova_alteracao(None, boletim.status, 0)]
+            dados["total_declarantes"] = len(declarantes_encontrados)
+            dados["multiplos_declarantes"] = len(declarantes_encontrados) > 1
 
             novo_boletim = BoletimOcorrencia(**dados)
             await novo_boletim.insert()
-            return novo_boletim
 
         except Exception as e:
             raise HTTPException(
@@ -53,15 +223,122 @@ class BoletimService:
                 detail=f"Erro ao persistir o boletim: {str(e)}"
             )
 
-    async def list_boletins(self, skip: int, limit: int) -> list[BoletimOcorrencia]:
+        await self._atualizar_derivados([(None, novo_boletim)])
+        return novo_boletim
+
+    async def create_boletins_em_lote(self, itens: AsyncIterable) -> BoletimLoteResponse:
+        """
+        Importa boletins em lote, validando as referências com uma única consulta por coleção a cada bloco.
+
+        Os itens são processados em blocos de TAMANHO_LOTE e gravados com insert_many não ordenado,
+        de modo que um item inválido não interrompe os demais.
+
+        :param itens: Iterável assíncrono com os boletins em formato de dicionário.
+        :return: Resumo da importação com o resultado de cada item.
+        """
+        resultados: list[BoletimLoteItemResultado] = []
+        bloco = []
+
+        async for item in itens:
+            bloco.append((len(resultados) + len(bloco), item))
+            if len(bloco) >= TAMANHO_LOTE:
+                resultados.extend(await self._inserir_bloco(bloco))
+                bloco = []
+
+        if bloco:
+            resultados.extend(await self._inserir_bloco(bloco))
+
+        inseridos = sum(1 for r in resultados if r.erro is None)
+        return BoletimLoteResponse(
+            total=len(resultados),
+            inseridos=inseridos,
+            falhas=len(resultados) - inseridos,
+            resultados=resultados
+        )
+
+    async def _inserir_bloco(self, bloco: list[tuple[int, object]]) -> list[BoletimLoteItemResultado]:
+        """
+        Valida e insere um bloco de boletins da importação em lote.
+
+        :param bloco: Pares (índice original, item bruto).
+        :return: Resultado de cada item do bloco, na mesma ordem.
+        """
+        resultados: dict[int, BoletimLoteItemResultado] = {}
+        validos: list[tuple[int, BoletimOcorrenciaCreate]] = []
+
+        for indice, item in bloco:
+            try:
+                validos.append((indice, BoletimOcorrenciaCreate.model_validate(item)))
+            except ValidationError as e:
+                resultados[indice] = BoletimLoteItemResultado(indice=indice, erro=str(e.errors()[0]["msg"]))
+
+        ids_autores = list({b.autor for _, b in validos})
+        ids_declarantes = list({d for _, b in validos for d in b.declarantes})
+
+        autores, resumos, declarantes_existentes = await asyncio.gather(
+            buscar_autores(ids_autores),
+            resumos_atuais(ids_autores),
+            buscar_declarantes(ids_declarantes)
+        )
+        declarantes_existentes = set(declarantes_existentes)
+        colecao_declarantes = Declarante.get_collection_name()
+
+        documentos: list[tuple[int, BoletimOcorrencia]] = []
+        for indice, boletim in validos:
+            autor = autores.get(boletim.autor)
+            if autor is None or boletim.autor not in resumos:
+                resultados[indice] = BoletimLoteItemResultado(indice=indice, erro="Autor não encontrado")
+                continue
+            if len(set(boletim.declarantes)) != len(boletim.declarantes) or not declarantes_existentes.issuperset(boletim.declarantes):
+                resultados[indice] = BoletimLoteItemResultado(
+                    indice=indice,
+                    erro="Um ou mais declarantes informados são inválidos ou não existem"
+                )
+                continue
+
+            documentos.append((indice, BoletimOcorrencia(
+                id=PydanticObjectId(),
+                tipo_ocorrencia=boletim.tipo_ocorrencia,
+                status=boletim.status,
+                autor=autor,
+                declarantes=[Link(DBRef(colecao_declarantes, d), Declarante) for d in boletim.declarantes],
+                autor_resumo=resumos[boletim.autor],
+                total_declarantes=len(boletim.declarantes),
+                multiplos_declarantes=len(boletim.declarantes) > 1,
+                historico_alteracoes=[nova_alteracao(None, boletim.status, 0)]
+            )))
+
+        falhas_escrita: dict[int, str] = {}
+        if documentos:
+            try:
+                await BoletimOcorrencia.insert_many([doc for _, doc in documentos], ordered=False)
+            except BulkWriteError as e:
+                for erro in e.details.get("writeErrors", []):
+                    falhas_escrita[erro["index"]] = erro.get("errmsg", "Erro de escrita")
+
+        inseridos = []
+        for posicao, (indice, documento) in enumerate(documentos):
+            if posicao in falhas_escrita:
+                resultados[indice] = BoletimLoteItemResultado(indice=indice, erro=falhas_escrita[posicao])
+            else:
+                resultados[indice] = BoletimLoteItemResultado(indice=indice, id=documento.id)
+                inseridos.append((None, documento))
+
+        await self._atualizar_derivados(inseridos)
+        return [resultados[indice] for indice, _ in bloco]
+
+    async def list_boletins(self, skip: int, limit: int, after: str | None = None, expandir: set[str] | None = None) -> list[BoletimOcorrencia]:
         """
         Retorna uma lista de todos os boletins de ocorrência com suporte a paginação e carregamento de vínculos.
 
         :param skip: Quantidade de registros a serem pulados.
         :param limit: Limite máximo de registros a serem retornados.
+        :param after: Cursor opaco da página anterior; quando informado, o skip é ignorado.
+        :param expandir: Vínculos a carregar (autor, declarantes); None carrega todos.
         :return: Lista de objetos BoletimOcorrencia.
         """
-        return await BoletimOcorrencia.find_all(fetch_links=True).skip(skip).limit(limit).to_list()
+        documentos = await listar_documentos(BoletimOcorrencia, PROJECAO_BOLETIM, skip, limit, after)
+        return await boletins_enxutos(documentos, {"autor", "declarantes"} if expandir is None else expandir)
 
     async def get_boletim(self, id_boletim: PydanticObjectId) -> BoletimOcorrencia:
         """
@@ -80,59 +357,158 @@ class BoletimService:
 
         return boletim
 
+    async def revisao_boletim(self, id_boletim: PydanticObjectId) -> str | None:
+        """
+        Calcula o ETag atual de um boletim lendo apenas as versões do boletim e dos vínculos, sem carregá-los.
+
+        :param id_boletim: Identificador único do boletim.
+        :return: O mesmo valor de etag_boletim para o estado atual, ou None se o boletim não existir.
+        """
+        documento = await BoletimOcorrencia.get_pymongo_collection().find_one(
+            {"_id": id_boletim}, {"versao": 1, "autor": 1, "declarantes": 1}
+        )
+        if documento is None:
+            return None
+
+        ids_declarantes = [referencia.id for referencia in documento.get("declarantes") or []]
+        autor, declarantes = await asyncio.gather(
+            Autor.get_pymongo_collection().find_one({"_id": documento["autor"].id}, {"versao": 1}),
+            Declarante.get_pymongo_collection().find({"_id": {"$in": ids_declarantes}}, {"versao": 1}).to_list(),
+        )
+        versoes = {declarante["_id"]: declarante.get("versao") or 0 for declarante in declarantes}
+        return etag(
+            documento.get("versao") or 0,
+            (autor.get("versao") or 0) if autor else "x",
+            *[versoes.get(id_declarante, "x") for id_declarante in ids_declarantes]
+        )
+
     async def update_boletim(self, id_boletim: PydanticObjectId, boletim: BoletimOcorrenciaCreate) -> BoletimOcorrencia:
         """
         Atualiza as informações de um boletim existente, validando se o novo autor ou declarantes são válidos no sistema.
 
+        Equivale a um PATCH com todos os campos editáveis (ver patch_boletim).
+
         :param id_boletim: Identificador do boletim a ser atualizado.
         :param boletim: Dados atualizados do boletim.
         :return: O documento do Boletim de Ocorrência atualizado.
         """
-        boletim_att = await BoletimOcorrencia.get(id_boletim)
-
-        if not boletim_att:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Boletim de ocorrência não encontrado para atualização"
-            )
+        return await self.patch_boletim(id_boletim, BoletimOcorrenciaPatch(**boletim.model_dump()))
 
-        update = boletim.model_dump()
+    async def patch_boletim(self, id_boletim: PydanticObjectId, patch: BoletimOcorrenciaPatch) -> BoletimOcorrencia:
+        """
+        Atualiza apenas os campos enviados, com uma única operação atômica e sem ler o boletim antes.
 
-        for key, value in update.items():
-            if key in ["autor", "declarantes"]:
-                continue
-            setattr(boletim_att, key, value)
-
-        if "autor" in update:
-            autor = await Autor.get(update["autor"])
-            if not autor:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Autor referenciado não encontrado"
-                )
-            boletim_att.autor = autor
+        Autor e declarantes informados são validados em paralelo. Alterações simples viram um $set; incluir ou
+        remover declarantes usa um pipeline de atualização, para que total_declarantes continue consistente
+        com a lista na mesma operação. Com patch.versao informado, a gravação só ocorre se o boletim ainda
+        estiver nessa versão (409 caso contrário).
 
-        if "declarantes" in update:
-            update_ids = update["declarantes"]
-            declarantes_encontrados = await Declarante.find({"_id": {"$in": update_ids}}).to_list()
+        :param id_boletim: Identificador do boletim a ser atualizado.
+        :param patch: Campos a alterar.
+        :return: O boletim atualizado; autor e declarantes informados vêm expandidos.
+        """
+        dados = campos_informados(patch)
+        adicionar = list(dict.fromkeys(dados.pop("adicionar_declarantes", [])))
+        remover = set(dados.pop("remover_declarantes", []))
 
-            if len(declarantes_encontrados) != len(update_ids):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Um ou mais declarantes referenciados são inválidos ou não existem"
-                )
+        if "declarantes" in dados and (adicionar or remover):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Use declarantes para substituir a lista ou adicionar/remover_declarantes, não ambos"
+            )
+        if not dados and not adicionar and not remover:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nenhum campo informado para atualização"
+            )
 
-            boletim_att.declarantes = declarantes_encontrados
+        colecao_declarantes = Declarante.get_collection_name()
+        campos = {}
+        novos_valores = {}
+        adicionados = {}
+
+        if "tipo_ocorrencia" in dados:
+            campos["tipo_ocorrencia"] = dados["tipo_ocorrencia"].value
+            novos_valores["tipo_ocorrencia"] = dados["tipo_ocorrencia"]
+        if "status" in dados:
+            campos["status"] = dados["status"].value
+            novos_valores["status"] = dados["status"]
+
+        if "autor" in dados or "declarantes" in dados or adicionar:
+            autor, resumo, declarantes = await self._validar_vinculos(
+                dados.get("autor"), dados.get("declarantes", adicionar)
+            )
+            if autor is not None:
+                campos["autor"] = DBRef(Autor.get_collection_name(), autor.id)
+                campos["autor_resumo"] = resumo.model_dump()
+                novos_valores["autor"] = autor
+                novos_valores["autor_resumo"] = resumo
+            if "declarantes" in dados:
+                campos["declarantes"] = [DBRef(colecao_declarantes, d.id) for d in declarantes]
+                campos["total_declarantes"] = len(declarantes)
+                campos["multiplos_declarantes"] = len(declarantes) > 1
+                novos_valores["declarantes"] = declarantes
+                novos_valores["total_declarantes"] = len(declarantes)
+                novos_valores["multiplos_declarantes"] = len(declarantes) > 1
+            else:
+                adicionados.update((d.id, d) for d in declarantes)
+
+        alteracao = nova_alteracao(None, dados["status"], 0) if "status" in dados else None
+
+        if adicionar or remover or alteracao:
+            # Pipeline de atualização: expressões do mesmo $set enxergam o documento anterior,
+            # então o histórico registra o status antigo e a lista de declarantes é recalculada na mesma escrita.
+            expressoes = {campo: {"$literal": valor} for campo, valor in campos.items()}
+            if alteracao:
+                expressoes["historico_alteracoes"] = expressao_historico(alteracao)
+            if adicionar or remover:
+                atuais = {"$ifNull": ["$declarantes", []]}
+                refs_remover = [DBRef(colecao_declarantes, d) for d in remover]
+                refs_adicionar = [DBRef(colecao_declarantes, d) for d in adicionar]
+                expressoes["declarantes"] = {
+                    "$concatArrays": [
+                        {"$filter": {"input": atuais, "as": "d", "cond": {"$not": [{"$in": ["$$d", {"$literal": refs_remover}]}]}}},
+                        {"$filter": {"input": {"$literal": refs_adicionar}, "as": "d", "cond": {"$not": [{"$in": ["$$d", atuais]}]}}}
+                    ]
+                }
+            contadores = {"versao": {"$add": [{"$ifNull": ["$versao", 0]}, 1]}}
+            if adicionar or remover:
+                contadores["total_declarantes"] = {"$size": "$declarantes"}
+                contadores["multiplos_declarantes"] = {"$gt": [{"$size": "$declarantes"}, 1]}
+            atualizacao = [{"$set": expressoes}, {"$set": contadores}]
+        else:
+            atualizacao = {"$set": campos, "$inc": {"versao": 1}}
 
         try:
-            await boletim_att.save()
-            return boletim_att
+            bruto = await atualizar_documento(
+                BoletimOcorrencia, id_boletim, atualizacao, patch.versao,
+                "Boletim de ocorrência não encontrado para atualização"
+            )
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao salvar as alterações do boletim: {str(e)}"
             )
 
+        anterior = BoletimOcorrencia.model_validate(bruto)
+        if adicionar or remover:
+            mantidos = [d for d in anterior.declarantes if BoletimOcorrencia._id_do_vinculo(d) not in remover]
+            presentes = {BoletimOcorrencia._id_do_vinculo(d) for d in anterior.declarantes}
+            novos = [adicionados[d] for d in adicionar if d not in presentes]
+            novos_valores["declarantes"] = mantidos + novos
+            novos_valores["total_declarantes"] = len(mantidos) + len(novos)
+            novos_valores["multiplos_declarantes"] = len(mantidos) + len(novos) > 1
+        novos_valores["versao"] = anterior.versao + 1
+        if alteracao and anterior.status != alteracao.status_novo:
+            alteracao = alteracao.model_copy(update={"status_anterior": anterior.status, "versao": anterior.versao + 1})
+            novos_valores["historico_alteracoes"] = [*anterior.historico_alteracoes, alteracao][-HISTORICO_INLINE:]
+        boletim_att = anterior.model_copy(update=novos_valores)
+
+        await self._atualizar_derivados([(anterior, boletim_att)])
+        return boletim_att
+
     async def delete_boletim(self, id_boletim: PydanticObjectId) -> BoletimOcorrenciaResponse:
         """
         Exclui permanentemente um boletim de ocorrência da base de dados.
@@ -140,31 +516,28 @@ class BoletimService:
         :param id_boletim: Identificador do boletim a ser removido.
         :return: O documento do boletim que foi excluído.
         """
-        boletim = await BoletimOcorrencia.get(id_boletim)
+        bruto = await BoletimOcorrencia.get_pymongo_collection().find_one_and_delete({"_id": id_boletim})
 
-        if not boletim:
+        if not bruto:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Boletim de ocorrência não encontrado para exclusão"
             )
 
-        await boletim.delete()
+        boletim = BoletimOcorrencia.model_validate(bruto)
+        await self._atualizar_derivados([(boletim, None)])
         return boletim
 
-    async def boletins_com_mais_de_um_declarante(self, skip: int, limit: int) -> list[BoletimOcorrenciaResponseMultiplosDeclarantes]:
+    def pipeline_mais_de_um_declarante(self, skip: int, limit: int, after: str | None = None) -> list[dict]:
         """
-        Executa uma agregação para filtrar boletins que possuam dois ou mais declarantes associados.
-
-        :param skip: Quantidade de registros para pular.
-        :param limit: Limite de registros para retornar.
-        :return: Lista de boletins com a contagem de declarantes.
+        Monta o pipeline de boletins com múltiplos declarantes.
         """
-
-        pipeline = [
-            {"$addFields": {"total_declarantes": {"$size": "$declarantes"}}},
-            {"$match": {"total_declarantes": {"$gt": 1}}},
-            {"$skip": skip},
-            {"$limit": limit},
+        return [
+            # Igualdade em multiplos_declarantes: o índice (multiplos_declarantes, _id) atende o filtro e a
+            # ordenação, e cada página lê só os documentos que devolve.
+            {"$match": {"multiplos_declarantes": True, **filtro_apos_id(after)}},
+            {"$sort": {"_id": 1}},
+            *paginar(skip, limit, after),
             {
                 "$project": {
                     "id": "$_id",
@@ -178,122 +551,212 @@ class BoletimService:
                 }
             }
         ]
-        return await BoletimOcorrencia.aggregate(pipeline).to_list()
 
-    async def boletins_por_posto(self, posto: str, skip: int, limit: int) -> list[BoletimOcorrencia]:
+    @consulta_analitica
+    async def boletins_com_mais_de_um_declarante(self, skip: int, limit: int, after: str | None = None) -> list[BoletimOcorrenciaResponseMultiplosDeclarantes]:
+        """
+        Executa uma agregação para filtrar boletins que possuam dois ou mais declarantes associados.
+
+        :param skip: Quantidade de registros para pular.
+        :param limit: Limite de registros para retornar.
+        :param after: Cursor opaco da página anterior; quando informado, o skip é ignorado.
+        :return: Lista de boletins com a contagem de declarantes.
+        """
+
+        pipeline = self.pipeline_mais_de_um_declarante(skip, limit, after)
+        return await agregar(BoletimOcorrencia, pipeline)
+
+    def pipeline_por_posto(self, posto: str, skip: int, limit: int, after: str | None = None) -> list[dict]:
+        """
+        Monta o pipeline de busca de boletins pelo posto do autor.
+        """
+        return [
+            {"$match": {"autor_resumo.posto": regex_prefixo(posto), **filtro_apos_id(after)}},
+            {"$sort": {"_id": 1}},
+            *paginar(skip, limit, after),
+            *ESTAGIOS_LOOKUP_AUTOR,
+            {"$project": PROJECAO_BOLETIM_DETALHADO}
+        ]
+
+    @consulta_analitica
+    async def boletins_por_posto(self, posto: str, skip: int, limit: int, after: str | None = None) -> list[BoletimOcorrencia]:
         """
         Realiza uma busca pelo posto do autor associado ao boletim.
 
-        :param posto: Termo de busca para o campo posto do autor.
+        :param posto: Prefixo do posto do autor, comparado sem acentos e sem diferenciar maiúsculas.
         :param skip: Offset para paginação.
         :param limit: Limite de resultados.
+        :param after: Cursor opaco da página anterior; quando informado, o skip é ignorado.
         :return: Lista de boletins filtrados pelo posto.
         """
-        pipeline = [
+        pipeline = self.pipeline_por_posto(posto, skip, limit, after)
+        return await agregar(BoletimOcorrencia, pipeline)
+
+    def pipeline_abertos_por_lotacao(self, lotacao: str, skip: int, limit: int, after: str | None = None) -> list[dict]:
+        """
+        Monta o pipeline de boletins abertos por lotação com múltiplos declarantes.
+        """
+        return [
             {
-                "$lookup": {
-                    "from": "autor",
-                    "localField": "autor.$id",
-                    "foreignField": "_id",
-                    "as": "autor"
+                "$match": {
+                    "status": "Registrado",
+                    "autor_resumo.lotacao": regex_prefixo(lotacao),
+                    "multiplos_declarantes": True,
+                    **filtro_apos_id(after)
                 }
             },
-            {"$unwind": "$autor"},
-            {
-                "$match":
-                    {
-                        "autor.posto":
-                            {
-                                "$regex": posto,
-                                "$options": "i"
-                            }
-                    }
-            },
-            {"$skip": skip},
-            {"$limit": limit},
-            {
-                "$project": {
-                    "id": "$_id",
-                    "data_registro": 1,
-                    "tipo_ocorrencia": 1,
-                    "descricao": 1,
-                    "status": 1,
-                    "autor": 1,
-                    "_id": 0
-                }
-            }
+            {"$sort": {"_id": 1}},
+            *paginar(skip, limit, after),
+            *ESTAGIOS_LOOKUP_AUTOR,
+            {"$project": PROJECAO_BOLETIM_DETALHADO}
         ]
-        return await BoletimOcorrencia.aggregate(pipeline).to_list()
 
-    async def boletins_abertos_por_lotacao_com_multiplos_declarantes(self, lotacao: str, skip: int, limit: int) -> list[BoletimOcorrencia]:
+    @consulta_analitica
+    async def boletins_abertos_por_lotacao_com_multiplos_declarantes(self, lotacao: str, skip: int, limit: int, after: str | None = None) -> list[BoletimOcorrencia]:
         """
         Filtra boletins com status 'Registrado' que pertencem a uma lotação específica e possuem múltiplos declarantes.
 
-        :param lotacao: Termo para busca parcial na lotação do autor.
+        :param lotacao: Prefixo da lotação do autor, comparado sem acentos e sem diferenciar maiúsculas.
         :param skip: Parâmetro de deslocamento da busca.
         :param limit: Máximo de itens por página.
+        :param after: Cursor opaco da página anterior; quando informado, o skip é ignorado.
         :return: Lista de boletins que atendem aos critérios especificados.
         """
-        pipeline = [
-            {"$match": {"status": "Registrado"}},
-            {
-                "$lookup": {
-                    "from": "autor",
-                    "localField": "autor.$id",
-                    "foreignField": "_id",
-                    "as": "autor"
-                }
-            },
-            {"$unwind": "$autor"},
-            {"$match":
-                 {
-                     "autor.lotacao":
-                         {
-                             "$regex": lotacao,
-                             "$options": "i"
-                         }
-                 }
-            },
-            {
-                "$addFields":
-                    {
-                        "total_declarantes":
-                         {
-                             "$size": "$declarantes"
-                         }
-                    }
-            },
-            {"$match": {"total_declarantes": {"$gt": 1}}},
-            {"$skip": skip},
-            {"$limit": limit},
-            {
-                "$project": {
-                    "id": "$_id",
-                    "data_registro": 1,
-                    "tipo_ocorrencia": 1,
-                    "descricao": 1,
-                    "status": 1,
-                    "autor": 1,
-                    "declarantes": 1,
-                    "_id": 0
-                }
-            }
-        ]
-        return await BoletimOcorrencia.aggregate(pipeline).to_list()
+        pipeline = self.pipeline_abertos_por_lotacao(lotacao, skip, limit, after)
+        return await agregar(BoletimOcorrencia, pipeline)
 
-    async def boletins_por_data(self, data: date, skip: int, limit: int) -> list[BoletimOcorrencia]:
+    async def boletins_por_data(self, data: date, skip: int, limit: int, after: str | None = None, expandir: set[str] | None = None) -> list[BoletimOcorrencia]:
         """
         Lista todos os boletins de ocorrência registrados em uma data específica.
 
         :param data: Objeto de data para o filtro.
         :param skip: Quantidade de itens a serem ignorados no início da lista.
         :param limit: Quantidade máxima de itens a serem retornados.
+        :param after: Cursor opaco da página anterior; quando informado, o skip é ignorado.
+        :param expandir: Vínculos a carregar (autor, declarantes); None carrega todos.
         :return: Lista de boletins correspondentes à data informada.
         """
+        consulta = BoletimOcorrencia.find({"data_registro": data, **filtro_apos_id(after)}).sort("_id")
+        if after is None:
+            consulta = consulta.skip(skip)
+
         try:
-            return await BoletimOcorrencia.find({"data_registro":data} ,fetch_links=True).skip(skip).limit(limit).to_list()
+            boletins = await consulta.limit(limit).to_list()
+            return await resolver_vinculos(boletins, {"autor", "declarantes"} if expandir is None else expandir)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao filtrar boletins por data: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+    def consulta_busca(
+        self,
+        data_inicio: date | None = None,
+        data_fim: date | None = None,
+        tipos: list[TipoOcorrencia] | None = None,
+        situacoes: list[StatusBoletim] | None = None,
+        autor: PydanticObjectId | None = None,
+        declarante: PydanticObjectId | None = None,
+        posto: str | None = None,
+        lotacao: str | None = None,
+        expandir: set[str] | None = None,
+    ) -> ConsultaBoletins:
+        """
+        Traduz os filtros da busca combinada em uma ConsultaBoletins.
+
+        :param data_inicio: Data de registro mínima (inclusiva).
+        :param data_fim: Data de registro máxima (inclusiva).
+        :param tipos: Tipos de ocorrência aceitos.
+        :param situacoes: Status aceitos.
+        :param autor: Identificador do autor.
+        :param declarante: Identificador de um declarante do boletim.
+        :param posto: Prefixo do posto do autor, comparado sem acentos e sem diferenciar maiúsculas.
+        :param lotacao: Prefixo da lotação do autor, comparado sem acentos e sem diferenciar maiúsculas.
+        :param expandir: Vínculos a carregar (autor, declarantes); None carrega todos.
+        :return: Consulta pronta para gerar o pipeline.
+        """
+        if data_inicio is not None and data_fim is not None and data_fim < data_inicio:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A data final deve ser igual ou posterior à data inicial"
+            )
+
+        return (
+            ConsultaBoletins()
+            .igual("autor.$id", autor)
+            .igual("declarantes.$id", declarante)
+            .em("tipo_ocorrencia", tipos)
+            .em("status", situacoes)
+            .entre_datas("data_registro", data_inicio, data_fim)
+            .prefixo("autor_resumo.posto", posto)
+            .prefixo("autor_resumo.lotacao", lotacao)
+            .expandir({"autor", "declarantes"} if expandir is None else expandir)
+        )
+
+    async def buscar_boletins(
+        self,
+        consulta: ConsultaBoletins,
+        skip: int,
+        limit: int,
+        after: str | None = None,
+        depurar: bool = False,
+    ) -> tuple[list[BoletimOcorrencia], dict | None]:
+        """
+        Executa a busca combinada de boletins montada por consulta_busca.
+
+        :param consulta: Filtros e vínculos da busca.
+        :param skip: Quantidade de registros a pular.
+        :param limit: Tamanho da página.
+        :param after: Cursor opaco da página anterior; quando informado, o skip é ignorado.
+        :param depurar: Quando verdadeiro, executa também o explain (executionStats) do pipeline.
+        :return: Página de boletins e, se depurar, o resumo do explain.
+        """
+        pipeline = consulta.pipeline(skip, limit, after)
+        try:
+            documentos = await agregar(BoletimOcorrencia, pipeline)
+            explain = resumo_explain(await explicar(BoletimOcorrencia, pipeline, "executionStats")) if depurar else None
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao buscar boletins: {str(e)}"
+            )
+        return [BoletimOcorrencia.model_validate(documento) for documento in documentos], explain
+
+    async def exportar_boletins(self, data: date | None = None) -> AsyncIterator[dict]:
+        """
+        Percorre os boletins direto no cursor do pymongo, em lotes e com projeção, sem montar documentos do Beanie.
+
+        A memória usada fica limitada ao lote corrente, independente do total exportado.
+
+        :param data: Data de registro opcional para filtrar a exportação.
+        :return: Iterador assíncrono de documentos brutos.
+        """
+        filtro = {}
+        if data is not None:
+            filtro["data_registro"] = datetime.combine(data, datetime.min.time())
+
+        cursor = colecao_leitura(BoletimOcorrencia, analitica=True).find(
+            filtro,
+            PROJECAO_EXPORTACAO,
+            batch_size=TAMANHO_LOTE_EXPORTACAO
+        ).sort("_id")
+
+        try:
+            async for documento in cursor:
+                yield documento
+        finally:
+            await cursor.close()
+
+    def pipelines_para_explain(self) -> list[tuple[type, list[dict]]]:
+        """
+        Lista os pipelines do serviço com parâmetros de exemplo, para a verificação de planos na inicialização.
+
+        :return: Lista de tuplas (modelo consultado, pipeline).
+        """
+        return [
+            (BoletimOcorrencia, [{"$match": {"data_registro": date.today()}}, {"$sort": {"_id": 1}}, {"$limit": 1}]),
+            (BoletimOcorrencia, self.pipeline_mais_de_um_declarante(0, 1)),
+            (BoletimOcorrencia, self.pipeline_por_posto("soldado", 0, 1)),
+            (BoletimOcorrencia, self.pipeline_abertos_por_lotacao("delegacia", 0, 1)),
+            (BoletimOcorrencia, self.consulta_busca(date.today(), date.today(), situacoes=[StatusBoletim.REGISTRADO]).pipeline(0, 1)),
+        ]
@@ -0,0 +1,219 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+
+from beanie import PydanticObjectId
+
+from models import Autor, Declarante
+
+_AUSENTE = object()
+
+
+class CacheLocal:
+    """
+    Cache LRU com expiração (TTL) em memória do processo, seguro para uso concorrente no event loop.
+
+    Falhas simultâneas para a mesma chave compartilham um único carregamento (single-flight).
+    Valores None (documento inexistente) não são armazenados.
+    """
+
+    def __init__(self, nome: str, tamanho_maximo: int, ttl_segundos: float):
+        self.nome = nome
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl_segundos = ttl_segundos
+        self._entradas: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+        self._em_voo: dict[Hashable, asyncio.Future] = {}
+        self.acertos = 0
+        self.falhas = 0
+        self.carregamentos = 0
+        self.deduplicados = 0
+        self.invalidacoes = 0
+
+    def _ler(self, chave: Hashable):
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return _AUSENTE
+        expira_em, valor = entrada
+        if expira_em < time.monotonic():
+            del self._entradas[chave]
+            return _AUSENTE
+        self._entradas.move_to_end(chave)
+        return valor
+
+    def _gravar(self, chave: Hashable, valor):
+        self._entradas[chave] = (time.monotonic() + self.ttl_segundos, valor)
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self.tamanho_maximo:
+            self._entradas.popitem(last=False)
+
+    async def obter_varios(
+        self,
+        chaves: Iterable[Hashable],
+        carregar_varios: Callable[[list], Awaitable[dict]],
+    ) -> dict:
+        """
+        Busca várias chaves de uma vez; as ausentes são carregadas com uma única chamada a carregar_varios.
+
+        :param chaves: Chaves desejadas.
+        :param carregar_varios: Função que recebe as chaves faltantes e devolve {chave: valor} das encontradas.
+        :return: Dicionário apenas com as chaves encontradas.
+        """
+        resultado = {}
+        faltantes = []
+        aguardando = {}
+
+        for chave in dict.fromkeys(chaves):
+            valor = self._ler(chave)
+            if valor is not _AUSENTE:
+                self.acertos += 1
+                resultado[chave] = valor
+                continue
+
+            self.falhas += 1
+            if chave in self._em_voo:
+                self.deduplicados += 1
+                aguardando[chave] = self._em_voo[chave]
+            else:
+                faltantes.append(chave)
+
+        if faltantes:
+            loop = asyncio.get_running_loop()
+            futuros = {chave: loop.create_future() for chave in faltantes}
+            self._em_voo.update(futuros)
+            self.carregamentos += 1
+
+            try:
+                carregados = await carregar_varios(faltantes)
+            except BaseException as e:
+                for chave, futuro in futuros.items():
+                    if self._em_voo.get(chave) is futuro:
+                        del self._em_voo[chave]
+                    if isinstance(e, asyncio.CancelledError):
+                        futuro.cancel()
+                    else:
+                        futuro.set_exception(e)
+                        futuro.exception()
+                raise
+
+            for chave, futuro in futuros.items():
+                valor = carregados.get(chave)
+                # Se a chave foi invalidada durante o carregamento, o valor lido pode estar desatualizado.
+                if self._em_voo.get(chave) is futuro:
+                    del self._em_voo[chave]
+                    if valor is not None:
+                        self._gravar(chave, valor)
+                futuro.set_result(valor)
+                if valor is not None:
+                    resultado[chave] = valor
+
+        for chave, futuro in aguardando.items():
+            valor = await asyncio.shield(futuro)
+            if valor is not None:
+                resultado[chave] = valor
+
+        return resultado
+
+    async def obter(self, chave: Hashable, carregar: Callable[[Hashable], Awaitable[object]]):
+        """
+        Busca uma chave no cache, carregando-a com carregar(chave) em caso de falha.
+
+        :param chave: Chave desejada.
+        :param carregar: Função que carrega o valor (ou None, se não existir).
+        :return: Valor encontrado ou None.
+        """
+        async def carregar_varios(chaves: list) -> dict:
+            valor = await carregar(chaves[0])
+            return {} if valor is None else {chaves[0]: valor}
+
+        return (await self.obter_varios([chave], carregar_varios)).get(chave)
+
+    def invalidar(self, chave: Hashable):
+        """
+        Remove uma chave do cache e descarta carregamentos em andamento para ela.
+
+        :param chave: Chave a invalidar.
+        """
+        self.invalidacoes += 1
+        self._entradas.pop(chave, None)
+        self._em_voo.pop(chave, None)
+
+    def limpar(self):
+        self._entradas.clear()
+        self._em_voo.clear()
+
+    def metricas(self) -> dict:
+        total = self.acertos + self.falhas
+        return {
+            "nome": self.nome,
+            "tamanho": len(self._entradas),
+            "tamanho_maximo": self.tamanho_maximo,
+            "ttl_segundos": self.ttl_segundos,
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / total if total else 0.0,
+            "carregamentos": self.carregamentos,
+            "deduplicados": self.deduplicados,
+            "invalidacoes": self.invalidacoes,
+        }
+
+
+cache_autores = CacheLocal(
+    "autores",
+    int(os.getenv("CACHE_ENTIDADES_TAMANHO", "10000")),
+    float(os.getenv("CACHE_ENTIDADES_TTL", "300")),
+)
+cache_declarantes = CacheLocal(
+    "declarantes",
+    int(os.getenv("CACHE_ENTIDADES_TAMANHO", "10000")),
+    float(os.getenv("CACHE_ENTIDADES_TTL", "300")),
+)
+
+
+async def buscar_autor(id_autor: PydanticObjectId) -> Autor | None:
+    """
+    Busca um autor passando pelo cache local.
+
+    :param id_autor: Identificador do autor.
+    :return: O autor ou None se não existir.
+    """
+    return await cache_autores.obter(id_autor, Autor.get)
+
+
+async def _carregar_autores(ids: list) -> dict:
+    return {a.id: a for a in await Autor.find({"_id": {"$in": ids}}).to_list()}
+
+
+async def buscar_autores(ids: Iterable[PydanticObjectId]) -> dict[PydanticObjectId, Autor]:
+    """
+    Busca vários autores passando pelo cache local; os ausentes vêm em uma única consulta $in.
+
+    :param ids: Identificadores dos autores.
+    :return: Dicionário {id: autor} apenas com os encontrados.
+    """
+    return await cache_autores.obter_varios(ids, _carregar_autores)
+
+
+async def buscar_declarante(id_declarante: PydanticObjectId) -> Declarante | None:
+    """
+    Busca um declarante passando pelo cache local.
+
+    :param id_declarante: Identificador do declarante.
+    :return: O declarante ou None se não existir.
+    """
+    return await cache_declarantes.obter(id_declarante, Declarante.get)
+
+
+async def _carregar_declarantes(ids: list) -> dict:
+    return {d.id: d for d in await Declarante.find({"_id": {"$in": ids}}).to_list()}
+
+
+async def buscar_declarantes(ids: Iterable[PydanticObjectId]) -> dict[PydanticObjectId, Declarante]:
+    """
+    Busca vários declarantes passando pelo cache local; os ausentes vêm em uma única consulta $in.
+
+    :param ids: Identificadores dos declarantes.
+    :return: Dicionário {id: declarante} apenas com os encontrados.
+    """
+    return await cache_declarantes.obter_varios(ids, _carregar_declarantes)
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterable
+from urllib.parse import urlparse
+
+from bson import json_util
+
+logger = logging.getLogger(__name__)
+
+
+class BackendMemoria:
+    """
+    Backend padrão do cache de respostas: dicionário em memória do processo, com expiração por chave.
+
+    As respostas ficam em um LRU limitado a tamanho_maximo entradas; a cada gravação as expiradas do
+    início da fila são descartadas. Como cada escrita troca a versão das coleções, as chaves antigas
+    nunca mais são lidas: sem esse limite, ficariam na memória para sempre. Os contadores de versão
+    (incr) não expiram nem são descartados.
+    """
+
+    def __init__(self, tamanho_maximo: int):
+        self.tamanho_maximo = tamanho_maximo
+        self._dados: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._contadores: dict[str, int] = {}
+        # As versões só valem dentro deste processo.
+        self.identificador = uuid.uuid4().hex[:12]
+
+    def _valor(self, chave: str) -> bytes | None:
+        if chave in self._contadores:
+            return str(self._contadores[chave]).encode()
+        entrada = self._dados.get(chave)
+        if entrada is None:
+            return None
+        expira_em, valor = entrada
+        if expira_em < time.monotonic():
+            del self._dados[chave]
+            return None
+        self._dados.move_to_end(chave)
+        return valor
+
+    def _descartar(self):
+        agora = time.monotonic()
+        while self._dados:
+            chave, (expira_em, _) = next(iter(self._dados.items()))
+            if expira_em >= agora and len(self._dados) <= self.tamanho_maximo:
+                break
+            del self._dados[chave]
+
+    async def get_many(self, chaves: list[str]) -> list[bytes | None]:
+        return [self._valor(chave) for chave in chaves]
+
+    async def set(self, chave: str, valor: bytes, ttl_segundos: float):
+        self._dados[chave] = (time.monotonic() + ttl_segundos, valor)
+        self._dados.move_to_end(chave)
+        self._descartar()
+
+    async def incr(self, chave: str) -> int:
+        self._contadores[chave] = self._contadores.get(chave, 0) + 1
+        return self._contadores[chave]
+
+
+class ErroRedis(Exception):
+    pass
+
+
+class BackendRedis:
+    """
+    Backend compartilhado que fala o protocolo RESP do Redis (funciona com Redis, Valkey, KeyDB
+    ou qualquer substituto local compatível), sem dependências externas.
+
+    Usa uma única conexão por processo, serializada por um lock e reaberta em caso de erro.
+    """
+
+    def __init__(self, url: str):
+        partes = urlparse(url)
+        self.host = partes.hostname or "localhost"
+        self.port = partes.port or 6379
+        self.senha = partes.password
+        self.banco = int(partes.path.lstrip("/") or 0)
+        self.identificador = f"{self.host}:{self.port}/{self.banco}"
+        self._leitor: asyncio.StreamReader | None = None
+        self._escritor: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+
+    async def _conectar(self):
+        self._leitor, self._escritor = await asyncio.open_connection(self.host, self.port)
+        if self.senha:
+            await self._enviar("AUTH", self.senha)
+        if self.banco:
+            await self._enviar("SELECT", self.banco)
+
+    async def _fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+        self._leitor = self._escritor = None
+
+    async def _enviar(self, *argumentos):
+        partes = [b"*%d\r\n" % len(argumentos)]
+        for argumento in argumentos:
+            if not isinstance(argumento, bytes):
+                argumento = str(argumento).encode()
+            partes.append(b"$%d\r\n%s\r\n" % (len(argumento), argumento))
+        self._escritor.write(b"".join(partes))
+        await self._escritor.drain()
+        return await self._ler_resposta()
+
+    async def _ler_resposta(self):
+        linha = await self._leitor.readline()
+        if not linha:
+            raise ConnectionError("Conexão com o servidor Redis encerrada")
+
+        tipo, conteudo = linha[:1], linha[1:-2]
+        if tipo == b"+":
+            return conteudo
+        if tipo == b"-":
+            raise ErroRedis(conteudo.decode())
+        if tipo == b":":
+            return int(conteudo)
+        if tipo == b"$":
+            tamanho = int(conteudo)
+            if tamanho < 0:
+                return None
+            return (await self._leitor.readexactly(tamanho + 2))[:-2]
+        if tipo == b"*":
+            tamanho = int(conteudo)
+            if tamanho < 0:
+                return None
+            return [await self._ler_resposta() for _ in range(tamanho)]
+        raise ErroRedis(f"Resposta RESP desconhecida: {linha!r}")
+
+    async def comando(self, *argumentos):
+        async with self._lock:
+            try:
+                if self._escritor is None:
+                    await self._conectar()
+                return await self._enviar(*argumentos)
+            except ErroRedis:
+                raise
+            except BaseException:
+                # Inclui CancelledError: uma resposta não lida ficaria na conexão e seria entregue ao próximo comando.
+                await self._fechar()
+                raise
+
+    async def get_many(self, chaves: list[str]) -> list[bytes | None]:
+        return await self.comando("MGET", *chaves)
+
+    async def set(self, chave: str, valor: bytes, ttl_segundos: float):
+        await self.comando("SET", chave, valor, "PX", int(ttl_segundos * 1000))
+
+    async def incr(self, chave: str) -> int:
+        return await self.comando("INCR", chave)
+
+
+class CacheRespostas:
+    """
+    Cache de respostas das consultas analíticas, com stale-while-revalidate e invalidação por versão.
+
+    Cada resposta é guardada sob uma chave que inclui a rota, os parâmetros e a versão atual de cada
+    coleção de que ela depende; as escritas apenas incrementam a versão, tornando as chaves antigas inalcançáveis.
+    """
+
+    def __init__(self, backend, ttl_fresco: float, ttl_obsoleto: float):
+        self.backend = backend
+        self.ttl_fresco = ttl_fresco
+        self.ttl_obsoleto = ttl_obsoleto
+        self._revalidando: set[str] = set()
+        self._tarefas: set[asyncio.Task] = set()
+
+    async def _assinatura_versoes(self, escopos: Iterable[str]) -> str:
+        escopos = sorted(escopos)
+        versoes = await self.backend.get_many([f"versao:{escopo}" for escopo in escopos])
+        return ",".join(f"{e}={int(v or 0)}" for e, v in zip(escopos, versoes))
+
+    async def _chave(self, rota: str, parametros: dict, escopos: Iterable[str]) -> str:
+        assinatura_versoes = await self._assinatura_versoes(escopos)
+        assinatura_parametros = "&".join(f"{k}={parametros[k]}" for k in sorted(parametros))
+        return f"resposta:{rota}?{assinatura_parametros}#{assinatura_versoes}"
+
+    async def _calcular_e_gravar(self, chave: str, calcular: Callable[[], Awaitable]):
+        valor = await calcular()
+        entrada = json_util.dumps({"criado_em": time.time(), "valor": valor}).encode()
+        try:
+            await self.backend.set(chave, entrada, self.ttl_fresco + self.ttl_obsoleto)
+        except Exception as e:
+            logger.warning("Falha ao gravar no cache de respostas: %s", e)
+        return valor
+
+    def _revalidar_em_segundo_plano(self, chave: str, calcular: Callable[[], Awaitable]):
+        if chave in self._revalidando:
+            return
+        self._revalidando.add(chave)
+
+        async def revalidar():
+            try:
+                await self._calcular_e_gravar(chave, calcular)
+            except Exception as e:
+                logger.warning("Falha ao revalidar %s: %s", chave, e)
+            finally:
+                self._revalidando.discard(chave)
+
+        tarefa = asyncio.create_task(revalidar())
+        self._tarefas.add(tarefa)
+        tarefa.add_done_callback(self._tarefas.discard)
+
+    async def obter_ou_calcular(
+        self,
+        rota: str,
+        parametros: dict,
+        escopos: Iterable[str],
+        calcular: Callable[[], Awaitable],
+    ):
+        """
+        Retorna a resposta em cache para a rota e parâmetros, calculando-a quando não houver.
+
+        Respostas além do TTL fresco, mas dentro da janela de obsolescência, são devolvidas na hora
+        enquanto uma nova versão é calculada em segundo plano.
+
+        :param rota: Identificador da rota.
+        :param parametros: Parâmetros de consulta que distinguem a resposta.
+        :param escopos: Coleções das quais a resposta depende (boletins, autores, declarantes).
+        :param calcular: Função que executa a consulta de fato.
+        :return: Resposta em cache ou recém-calculada.
+        """
+        try:
+            chave = await self._chave(rota, parametros, escopos)
+            (bruto,) = await self.backend.get_many([chave])
+        except Exception as e:
+            logger.warning("Cache de respostas indisponível, consultando direto: %s", e)
+            return await calcular()
+
+        if bruto is not None:
+            entrada = json_util.loads(bruto)
+            idade = time.time() - entrada["criado_em"]
+            if idade > self.ttl_fresco:
+                self._revalidar_em_segundo_plano(chave, calcular)
+            return entrada["valor"]
+
+        return await self._calcular_e_gravar(chave, calcular)
+
+    async def revisao(self, escopos: Iterable[str]) -> str | None:
+        """
+        Versão atual do conjunto de coleções, usada como revisão (ETag) das respostas agregadas.
+
+        :param escopos: Coleções das quais a resposta depende.
+        :return: Assinatura das versões, ou None se o backend estiver indisponível.
+        """
+        try:
+            return f"{self.backend.identificador}#{await self._assinatura_versoes(escopos)}"
+        except Exception as e:
+            logger.warning("Cache de respostas indisponível, respondendo sem ETag: %s", e)
+            return None
+
+    async def invalidar(self, *escopos: str):
+        """
+        Incrementa a versão das coleções informadas, invalidando todas as respostas que dependem delas.
+
+        :param escopos: Coleções alteradas.
+        """
+        for escopo in escopos:
+            try:
+                await self.backend.incr(f"versao:{escopo}")
+            except Exception as e:
+                logger.warning("Falha ao invalidar o cache de respostas (%s): %s", escopo, e)
+
+
+def _criar_backend():
+    url = os.getenv("CACHE_RESPOSTAS_URL")
+    if url:
+        return BackendRedis(url)
+    return BackendMemoria(int(os.getenv("CACHE_RESPOSTAS_TAMANHO", "10000")))
+
+
+cache_respostas = CacheRespostas(
+    _criar_backend(),
+    float(os.getenv("CACHE_RESPOSTAS_TTL", "30")),
+    float(os.getenv("CACHE_RESPOSTAS_OBSOLETO", "300")),
+)
@@ -0,0 +1,63 @@
+import hashlib
+
+from fastapi import Request, Response, status
+
+# Os clientes podem guardar a resposta, mas precisam revalidá-la (If-None-Match) antes de reutilizar.
+# "private": as respostas trazem dados pessoais (CPF, endereço) e não devem ficar em caches compartilhados.
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag(*partes) -> str:
+    """
+    Gera um ETag fraco a partir das revisões que determinam o conteúdo da resposta.
+
+    :param partes: Versões dos documentos/coleções envolvidos.
+    :return: ETag no formato W/"...".
+    """
+    resumo = hashlib.blake2b("|".join(str(parte) for parte in partes).encode(), digest_size=12).hexdigest()
+    return f'W/"{resumo}"'
+
+
+def _sem_prefixo_fraco(valor: str) -> str:
+    valor = valor.strip()
+    return valor[2:] if valor.startswith("W/") else valor
+
+
+def nao_modificado(request: Request, etag_atual: str | None) -> bool:
+    """
+    Confere o cabeçalho If-None-Match (comparação fraca, como exige a RFC 9110 para GET).
+
+    :param request: Requisição recebida.
+    :param etag_atual: ETag da versão atual do recurso.
+    :return: True se o cliente já tem a versão atual.
+    """
+    cabecalho = request.headers.get("if-none-match")
+    if not cabecalho or etag_atual is None:
+        return False
+    if cabecalho.strip() == "*":
+        return True
+    atual = _sem_prefixo_fraco(etag_atual)
+    return any(_sem_prefixo_fraco(candidato) == atual for candidato in cabecalho.split(","))
+
+
+def definir_etag(response: Response, etag_atual: str | None):
+    """
+    Publica o ETag e o Cache-Control na resposta.
+
+    :param response: Resposta do FastAPI.
+    :param etag_atual: ETag da versão retornada; None publica só o Cache-Control.
+    """
+    if etag_atual is not None:
+        response.headers["ETag"] = etag_atual
+    response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+def resposta_nao_modificada(etag_atual: str) -> Response:
+    """
+    :param etag_atual: ETag da versão atual do recurso.
+    :return: Resposta 304 sem corpo, com os mesmos cabeçalhos de cache da resposta completa.
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag_atual, "Cache-Control": CACHE_CONTROL}
+    )
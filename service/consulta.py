@@ -0,0 +1,150 @@
+from datetime import date, datetime, time
+
+from service.normalizacao import regex_prefixo
+from service.paginacao import filtro_apos_id, paginar
+
+ESTAGIOS_LOOKUP = {
+    "autor": [
+        {"$lookup": {"from": "autor", "localField": "autor.$id", "foreignField": "_id", "as": "_autor"}},
+        {"$set": {"autor": {"$ifNull": [{"$first": "$_autor"}, "$autor"]}}},
+    ],
+    "declarantes": [
+        {"$lookup": {"from": "declarantes", "localField": "declarantes.$id", "foreignField": "_id", "as": "_declarantes"}},
+        {
+            "$set": {
+                "declarantes": {
+                    "$cond": [
+                        {"$eq": [{"$size": "$_declarantes"}, {"$size": {"$ifNull": ["$declarantes", []]}}]},
+                        # O $lookup não preserva a ordem do array: remonta na ordem gravada no boletim, como no get_boletim.
+                        {
+                            "$map": {
+                                "input": {"$ifNull": ["$declarantes.$id", []]},
+                                "as": "id",
+                                "in": {"$arrayElemAt": ["$_declarantes", {"$indexOfArray": ["$_declarantes._id", "$$id"]}]}
+                            }
+                        },
+                        "$declarantes"
+                    ]
+                }
+            }
+        },
+    ],
+}
+
+
+class ConsultaBoletins:
+    """
+    Monta o pipeline de busca de boletins a partir de filtros combináveis.
+
+    Todos os predicados vão para um único $match no início, seguido da ordenação por _id e da
+    paginação; os $lookup dos vínculos rodam só sobre a página resultante. A ordem das chaves no
+    $match não influencia o plano: o otimizador escolhe o índice pelo conjunto de predicados, e cada
+    filtro seletivo tem um índice composto terminado em _id (ver BoletimOcorrencia.Settings.indexes)
+    que também atende a ordenação.
+    """
+
+    def __init__(self):
+        self._predicados: dict[str, object] = {}
+        self._expandir: set[str] = set()
+
+    def igual(self, campo: str, valor) -> "ConsultaBoletins":
+        if valor is not None:
+            self._predicados[campo] = valor
+        return self
+
+    def em(self, campo: str, valores: list | None) -> "ConsultaBoletins":
+        if valores:
+            valores = list(dict.fromkeys(getattr(v, "value", v) for v in valores))
+            self._predicados[campo] = valores[0] if len(valores) == 1 else {"$in": valores}
+        return self
+
+    def entre_datas(self, campo: str, inicio: date | None, fim: date | None) -> "ConsultaBoletins":
+        intervalo = {}
+        if inicio is not None:
+            intervalo["$gte"] = datetime.combine(inicio, time.min)
+        if fim is not None:
+            intervalo["$lte"] = datetime.combine(fim, time.min)
+        if intervalo:
+            self._predicados[campo] = intervalo
+        return self
+
+    def prefixo(self, campo: str, texto: str | None) -> "ConsultaBoletins":
+        if texto:
+            self._predicados[campo] = regex_prefixo(texto)
+        return self
+
+    def expandir(self, vinculos: set[str]) -> "ConsultaBoletins":
+        self._expandir = set(vinculos)
+        return self
+
+    def filtro(self) -> dict:
+        """
+        :return: Predicados do $match inicial.
+        """
+        return dict(self._predicados)
+
+    def pipeline(self, skip: int, limit: int, after: str | None = None) -> list[dict]:
+        """
+        Gera o pipeline completo da busca.
+
+        :param skip: Quantidade de registros a pular (ignorado quando after é informado).
+        :param limit: Tamanho da página.
+        :param after: Cursor opaco da página anterior.
+        :return: Lista de estágios da agregação.
+        """
+        estagios = [
+            {"$match": {**self.filtro(), **filtro_apos_id(after)}},
+            {"$sort": {"_id": 1}},
+            *paginar(skip, limit, after),
+        ]
+        for vinculo in sorted(self._expandir):
+            estagios.extend(ESTAGIOS_LOOKUP[vinculo])
+        if self._expandir:
+            estagios.append({"$unset": [f"_{vinculo}" for vinculo in sorted(self._expandir)]})
+        return estagios
+
+
+def _estatisticas_de_execucao(plano) -> dict | None:
+    if isinstance(plano, dict):
+        if "executionStats" in plano:
+            return plano["executionStats"]
+        for valor in plano.values():
+            encontrado = _estatisticas_de_execucao(valor)
+            if encontrado is not None:
+                return encontrado
+    if isinstance(plano, list):
+        for valor in plano:
+            encontrado = _estatisticas_de_execucao(valor)
+            if encontrado is not None:
+                return encontrado
+    return None
+
+
+def _indices_usados(plano, no_plano_vencedor: bool = False) -> set[str]:
+    if isinstance(plano, dict):
+        indices = {plano["indexName"]} if no_plano_vencedor and "indexName" in plano else set()
+        for chave, valor in plano.items():
+            if chave == "rejectedPlans":
+                continue
+            indices |= _indices_usados(valor, no_plano_vencedor or chave == "winningPlan")
+        return indices
+    if isinstance(plano, list):
+        return set().union(*(_indices_usados(valor, no_plano_vencedor) for valor in plano))
+    return set()
+
+
+def resumo_explain(plano: dict) -> dict:
+    """
+    Resume a saída de um explain com executionStats nos números relevantes para depuração.
+
+    :param plano: Documento retornado pelo explain.
+    :return: Tempo de execução, chaves e documentos examinados, documentos retornados e índices usados.
+    """
+    estatisticas = _estatisticas_de_execucao(plano) or {}
+    return {
+        "tempo_ms": estatisticas.get("executionTimeMillis"),
+        "chaves_examinadas": estatisticas.get("totalKeysExamined"),
+        "documentos_examinados": estatisticas.get("totalDocsExamined"),
+        "retornados": estatisticas.get("nReturned"),
+        "indices": sorted(_indices_usados(plano)),
+    }
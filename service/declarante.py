@@ -1,9 +1,62 @@
 from unittest import skip
 
+import re
+
 from fastapi import HTTPException, status
-from schemas.declarante import DeclaranteCreate, DeclaranteResponse, DeclaranteNumerosDeRegistros
+from pymongo.errors import DuplicateKeyError
+from schemas.declarante import DeclaranteCreate, DeclaranteResponse, DeclaranteNumerosDeRegistros, DeclaranteBuscaResultado, DeclarantePatch
 from beanie import PydanticObjectId
-from models import Declarante, BoletimOcorrencia
+from models import Declarante, BoletimOcorrencia, RankingDeclarante
+from config.database import agregar, consulta_analitica
+from service.atualizacao import atualizar_documento, campos_informados
+from service.cache import buscar_declarante, cache_declarantes
+from service.cache_respostas import cache_respostas
+from service.leitura import PROJECAO_DECLARANTE_RESPOSTA, listar_documentos
+from service.normalizacao import ngramas, somente_digitos, tokens
+from service.paginacao import filtro_apos_id, filtro_apos_chave_desc, paginar
+
+TAMANHO_CPF = 11
+LIMITE_CANDIDATOS_BUSCA = 200
+# Maior limit aceito pela busca; também é o teto de candidatos lidos.
+LIMITE_RESULTADOS_BUSCA = 500
+
+PROJECAO_BUSCA = {"nome": 1, "cpf": 1, "endereco": 1, "tipo_envolvimento": 1, "cpf_normalizado": 1, "nome_tokens": 1, "versao": 1}
+
+
+def campos_de_busca(nome: str | None, cpf: str | None) -> dict:
+    """
+    Calcula os campos derivados usados pela busca: CPF só com dígitos e os termos do nome sem acentos.
+
+    :param nome: Nome do declarante; None quando não foi alterado.
+    :param cpf: CPF como informado (com ou sem pontuação); None quando não foi alterado.
+    :return: Dicionário com cpf_normalizado e/ou nome_tokens e nome_ngramas.
+    """
+    campos = {}
+    if cpf is not None:
+        campos["cpf_normalizado"] = somente_digitos(cpf)
+    if nome is not None:
+        termos = tokens(nome)
+        campos["nome_tokens"] = termos
+        campos["nome_ngramas"] = list(dict.fromkeys(n for termo in termos for n in ngramas(termo)))
+    return campos
+
+
+def _relevancia_nome(termos_busca: list[str], termos_nome: list[str]) -> float:
+    """
+    Pontua de 0 a 1 o quanto um nome atende à busca: palavra exata vale 1, prefixo 0.75 e,
+    sem isso, a fração de trigramas do termo presentes no nome vale até 0.5.
+    """
+    ngramas_nome = {n for termo in termos_nome for n in ngramas(termo)}
+    pontos = 0.0
+    for termo in termos_busca:
+        if termo in termos_nome:
+            pontos += 1.0
+        elif any(t.startswith(termo) for t in termos_nome):
+            pontos += 0.75
+        else:
+            trigramas = ngramas(termo)
+            pontos += 0.5 * sum(n in ngramas_nome for n in trigramas) / len(trigramas)
+    return pontos / len(termos_busca)
 
 
 class DeclaranteService:
@@ -19,25 +72,33 @@ class DeclaranteService:
         :return: Objeto do declarante persistido.
         """
         try:
-            novo_declarante = Declarante(**declarante.model_dump())
+            dados = declarante.model_dump()
+            novo_declarante = Declarante(**dados, **campos_de_busca(dados["nome"], dados["cpf"]))
             await novo_declarante.insert()
+            await cache_respostas.invalidar("declarantes")
             return novo_declarante
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Já existe um declarante com este CPF"
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao criar declarante: {str(e)}"
             )
 
-    async def list_declarantes(self, skip: int, limit: int) -> list[DeclaranteResponse]:
+    async def list_declarantes(self, skip: int, limit: int, after: str | None = None) -> list[dict]:
         """
         Recupera uma lista de declarantes com suporte a paginação.
 
         :param skip: Número de registros a ignorar.
         :param limit: Número máximo de registros a retornar.
-        :return: Lista de declarantes encontrados.
+        :param after: Cursor opaco da página anterior; quando informado, o skip é ignorado.
+        :return: Lista de declarantes no formato de DeclaranteResponse, como dicionários.
         """
         try:
-            return await Declarante.find_all().skip(skip).limit(limit).to_list()
+            return await listar_documentos(Declarante, PROJECAO_DECLARANTE_RESPOSTA, skip, limit, after)
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -51,7 +112,7 @@ class DeclaranteService:
         :param id_declarante: ID do declarante no formato PydanticObjectId.
         :return: Dados do declarante encontrado.
         """
-        declarante = await Declarante.get(id_declarante)
+        declarante = await buscar_declarante(id_declarante)
 
         if not declarante:
             raise HTTPException(
@@ -65,30 +126,115 @@ class DeclaranteService:
         """
         Atualiza as informações de um declarante existente.
 
+        Equivale a um PATCH com todos os campos (ver patch_declarante).
+
         :param id_declarante: ID do declarante a ser atualizado.
         :param data: Novos dados para atualização.
         :return: Objeto do declarante atualizado.
         """
-        declarante_att = await Declarante.get(id_declarante)
+        return await self.patch_declarante(id_declarante, DeclarantePatch(**data.model_dump()))
 
-        if not declarante_att:
+    async def patch_declarante(self, id_declarante: PydanticObjectId, patch: DeclarantePatch) -> DeclaranteResponse:
+        """
+        Atualiza apenas os campos enviados com um único $set atômico, sem ler o declarante antes.
+
+        O $set nunca inclui quantidade_boletins, que é incrementado em paralelo pelas escritas de boletins.
+        Com patch.versao informado, a gravação só ocorre se o declarante ainda estiver nessa versão (409 caso contrário).
+
+        :param id_declarante: ID do declarante a ser atualizado.
+        :param patch: Campos a alterar.
+        :return: Objeto do declarante atualizado.
+        """
+        dados = campos_informados(patch)
+        if not dados:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Declarante não encontrado para atualização"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nenhum campo informado para atualização"
             )
+        campos = {**dados, **campos_de_busca(dados.get("nome"), dados.get("cpf"))}
 
         try:
-            update = data.model_dump()
-            for key, value in update.items():
-                setattr(declarante_att, key, value)
-
-            await declarante_att.save()
-            return declarante_att
+            bruto = await atualizar_documento(
+                Declarante, id_declarante, {"$set": campos, "$inc": {"versao": 1}}, patch.versao,
+                "Declarante não encontrado para atualização"
+            )
+        except HTTPException:
+            raise
+        except DuplicateKeyError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Já existe um declarante com este CPF"
+            )
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao atualizar declarante: {str(e)}"
             )
+
+        anterior = Declarante.model_validate(bruto)
+        await cache_respostas.invalidar("declarantes")
+        cache_declarantes.invalidar(id_declarante)
+        return anterior.model_copy(update={**campos, "versao": anterior.versao + 1})
+
+    async def buscar_declarantes(self, termo: str, limit: int = 20) -> list[DeclaranteBuscaResultado]:
+        """
+        Busca declarantes por CPF (completo ou prefixo, com ou sem pontuação) ou por trechos do nome,
+        sem diferenciar acentos e maiúsculas, ordenando pelo grau de correspondência.
+
+        Nomes são procurados primeiro por prefixo de cada palavra (índice em nome_tokens); se isso não
+        preencher a lista de candidatos, completa-se com os que contêm todos os trigramas dos termos
+        (índice em nome_ngramas), o que cobre trechos no meio das palavras. São lidos
+        LIMITE_CANDIDATOS_BUSCA documentos (ou limit, se maior), nunca mais que LIMITE_RESULTADOS_BUSCA.
+
+        :param termo: Texto digitado (nome, parte do nome ou CPF).
+        :param limit: Quantidade máxima de resultados.
+        :return: Declarantes encontrados com a relevância (0 a 1), do mais para o menos relevante.
+        """
+        digitos = somente_digitos(termo)
+        termos = tokens(termo)
+        if not termos:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Informe um nome ou CPF para a busca"
+            )
+
+        colecao = Declarante.get_pymongo_collection()
+        limite = min(max(limit, LIMITE_CANDIDATOS_BUSCA), LIMITE_RESULTADOS_BUSCA)
+
+        try:
+            if digitos and not re.sub(r"[\d\s.\-/]", "", termo):
+                filtro = {"cpf_normalizado": digitos if len(digitos) == TAMANHO_CPF else {"$regex": "^" + digitos}}
+                candidatos = await colecao.find(filtro, PROJECAO_BUSCA).limit(limite).to_list()
+                pontuados = [(len(digitos) / TAMANHO_CPF, c) for c in candidatos]
+            else:
+                filtro_prefixo = {"$and": [{"nome_tokens": {"$regex": "^" + re.escape(t)}} for t in termos]}
+                candidatos = await colecao.find(filtro_prefixo, PROJECAO_BUSCA).limit(limite).to_list()
+
+                if len(candidatos) < limite:
+                    filtro_ngramas = {
+                        "nome_ngramas": {"$all": list(dict.fromkeys(n for t in termos for n in ngramas(t)))},
+                        "_id": {"$nin": [c["_id"] for c in candidatos]}
+                    }
+                    candidatos += await colecao.find(filtro_ngramas, PROJECAO_BUSCA).limit(limite - len(candidatos)).to_list()
+
+                pontuados = [(_relevancia_nome(termos, c.get("nome_tokens", [])), c) for c in candidatos]
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao buscar declarantes: {str(e)}"
+            )
+
+        pontuados.sort(key=lambda item: (-item[0], len(item[1].get("nome_tokens", [])), item[1]["nome"]))
+        return [
+            DeclaranteBuscaResultado(
+                id=c["_id"],
+                versao=c.get("versao", 0),
+                relevancia=round(relevancia, 4),
+                **{k: c[k] for k in DeclaranteCreate.model_fields}
+            )
+            for relevancia, c in pontuados[:limit]
+        ]
+
     async def delete_declarante(self, id_declarante: PydanticObjectId):
         """
         Remove um declarante do sistema.
@@ -106,9 +252,56 @@ class DeclaranteService:
             )
 
         await declarante.delete()
+        await cache_respostas.invalidar("declarantes")
+        cache_declarantes.invalidar(id_declarante)
+        await RankingDeclarante.find({"_id": id_declarante}).delete()
         return {"detail": "Declarante deletado com sucesso"}
 
-    async def declarantes_reincidentes_por_tipo(self, skip: int, limit: int) -> list[DeclaranteNumerosDeRegistros]:
+    def pipeline_reincidentes_por_tipo(self, skip: int, limit: int, after: str | None = None) -> list[dict]:
+        """
+        Monta o pipeline de declarantes reincidentes por tipo de ocorrência.
+        """
+        return [
+            {"$unwind": "$declarantes"},
+            {
+                "$group": {
+                    "_id": {
+                        "id": "$declarantes.$id",
+                        "tipo_ocorrencia": "$tipo_ocorrencia"
+                    },
+                    "total": {"$sum": 1}
+                }
+            },
+            {"$match": {"total": {"$gt": 1}}},
+            {
+                "$lookup": {
+                    "from": "declarantes",
+                    "localField": "_id.id",
+                    "foreignField": "_id",
+                    "as": "perfil"
+                }
+            },
+            {"$unwind": "$perfil"},
+            {"$match": filtro_apos_chave_desc(after, "total")},
+            {"$sort": {"total": -1, "_id": 1}},
+            *paginar(skip, limit, after),
+            {
+                "$project": {
+                    "id": "$_id.id",
+                    "chave": "$_id",
+                    "nome": "$perfil.nome",
+                    "cpf": "$perfil.cpf",
+                    "endereco": "$perfil.endereco",
+                    "tipo_envolvimento": "$perfil.tipo_envolvimento",
+                    "versao": "$perfil.versao",
+                    "quantidade_registros": "$total",
+                    "_id": 0
+                }
+            }
+        ]
+
+    @consulta_analitica
+    async def declarantes_reincidentes_por_tipo(self, skip: int, limit: int, after: str | None = None) -> list[DeclaranteNumerosDeRegistros]:
         """
         Identifica declarantes vinculados a múltiplos boletins de um mesmo tipo.
 
@@ -116,47 +309,13 @@ class DeclaranteService:
 
         :param skip: Offset para paginação.
         :param limit: Limite de registros.
+        :param after: Cursor opaco (quantidade_registros, chave) da página anterior.
         :return: Lista de reincidentes com total de registros.
         """
-        try:
-            pipeline = [
-                {"$unwind": "$declarantes"},
-                {
-                    "$group": {
-                        "_id": {
-                            "id": "$declarantes.$id",
-                            "tipo_ocorrencia": "$tipo_ocorrencia"
-                        },
-                        "total": {"$sum": 1}
-                    }
-                },
-                {"$match": {"total": {"$gt": 1}}},
-                {
-                    "$lookup": {
-                        "from": "declarantes",
-                        "localField": "_id.id",
-                        "foreignField": "_id",
-                        "as": "perfil"
-                    }
-                },
-                {"$unwind": "$perfil"},
-                {"$sort": {"total": -1}},
-                {"$skip": skip},
-                {"$limit": limit},
-                {
-                    "$project": {
-                        "id": "$_id.id",
-                        "nome": "$perfil.nome",
-                        "cpf": "$perfil.cpf",
-                        "endereco": "$perfil.endereco",
-                        "tipo_envolvimento": "$perfil.tipo_envolvimento",
-                        "quantidade_registros": "$total",
-                        "_id": 0
-                    }
-                }
-            ]
+        pipeline = self.pipeline_reincidentes_por_tipo(skip, limit, after)
 
-            return await BoletimOcorrencia.aggregate(pipeline).to_list()
+        try:
+            return await agregar(BoletimOcorrencia, pipeline)
 
         except Exception as e:
             raise HTTPException(
@@ -164,53 +323,50 @@ class DeclaranteService:
                 detail=f"Erro ao processar reincidência: {str(e)}"
             )
 
-    async def declarantes_sem_boletim(self, skip: int, limit: int) -> list[DeclaranteNumerosDeRegistros]:
+    def pipeline_sem_boletim(self, skip: int, limit: int, after: str | None = None) -> list[dict]:
+        """
+        Monta o pipeline de declarantes sem nenhum boletim vinculado.
+        """
+        return [
+            {"$match": {"quantidade_boletins": 0, **filtro_apos_id(after)}},
+            {"$sort": {"_id": 1}},
+            *paginar(skip, limit, after),
+            {
+                "$addFields": {
+                    "quantidade_registros": 0
+                }
+            },
+            {
+                "$project": {
+                    "id": "$_id",
+                    "nome": 1,
+                    "cpf": 1,
+                    "endereco": 1,
+                    "tipo_envolvimento": 1,
+                    "versao": 1,
+                    "quantidade_registros": 1,
+                    "_id": 0
+                }
+            }
+        ]
+
+    @consulta_analitica
+    async def declarantes_sem_boletim(self, skip: int, limit: int, after: str | None = None) -> list[DeclaranteNumerosDeRegistros]:
         """
         Localiza declarantes que não possuem nenhum vínculo com boletins de ocorrência.
 
-        Realiza um lookup na coleção de boletins e filtra documentos com lista de correspondência vazia.
+        Usa o contador quantidade_boletins, mantido pelas escritas de boletins, e o índice parcial
+        que contém apenas os declarantes com contador zero; nenhum boletim é lido.
 
         :param skip: Offset para paginação.
         :param limit: Limite de registros.
+        :param after: Cursor opaco da página anterior; quando informado, o skip é ignorado.
         :return: Lista de declarantes sem boletins.
         """
+        pipeline = self.pipeline_sem_boletim(skip, limit, after)
 
         try:
-            pipeline = [
-                {
-                    "$lookup": {
-                        "from": "boletins",
-                        "localField": "_id",
-                        "foreignField": "declarantes.$id",
-                        "as": "boletins_encontrados"
-                    }
-                },
-                {
-                    "$match": {
-                        "boletins_encontrados": {"$size": 0}
-                    }
-                },
-                {
-                    "$addFields": {
-                        "quantidade_registros": 0
-                    }
-                },
-                {"$skip": skip},
-                {"$limit": limit},
-                {
-                    "$project": {
-                        "id": "$_id",
-                        "nome": 1,
-                        "cpf": 1,
-                        "endereco": 1,
-                        "tipo_envolvimento": 1,
-                        "quantidade_registros": 1,
-                        "_id": 0
-                    }
-                }
-            ]
-
-            return await Declarante.aggregate(pipeline).to_list()
+            return await agregar(Declarante, pipeline)
 
         except Exception as e:
             raise HTTPException(
@@ -218,55 +374,69 @@ class DeclaranteService:
                 detail=f"Erro: {str(e)}"
             )
 
-    async def ranking_declarantes(self, skip: int, limit: int) -> list[DeclaranteNumerosDeRegistros]:
+    def pipeline_ranking_declarantes(self, skip: int, limit: int, after: str | None = None) -> list[dict]:
+        """
+        Monta o pipeline de ranking de declarantes.
+        """
+        return [
+            {"$match": {"quantidade_registros": {"$gt": 0}, **filtro_apos_chave_desc(after, "quantidade_registros")}},
+            {"$sort": {"quantidade_registros": -1, "_id": 1}},
+            *paginar(skip, limit, after),
+            {
+                "$lookup": {
+                    "from": "declarantes",
+                    "localField": "_id",
+                    "foreignField": "_id",
+                    "as": "dados_declarantes"
+                }
+            },
+            {"$unwind": "$dados_declarantes"},
+            {
+                "$project": {
+                    "id": "$_id",
+                    "nome": "$dados_declarantes.nome",
+                    "cpf": "$dados_declarantes.cpf",
+                    "endereco": "$dados_declarantes.endereco",
+                    "tipo_envolvimento": "$dados_declarantes.tipo_envolvimento",
+                    "versao": "$dados_declarantes.versao",
+                    "quantidade_registros": 1,
+                    "_id": 0
+                }
+            }
+        ]
+
+    @consulta_analitica
+    async def ranking_declarantes(self, skip: int, limit: int, after: str | None = None) -> list[DeclaranteNumerosDeRegistros]:
         """
         Gera um ranking geral de declarantes baseado no volume de participações em boletins.
 
-        Agrupa as ocorrências por declarante e ordena de forma decrescente pela quantidade.
+        Lê a página já ordenada da coleção de ranking, mantida de forma incremental pelas escritas de boletins.
 
         :param skip: Offset para paginação.
         :param limit: Limite de registros.
+        :param after: Cursor opaco (quantidade_registros, id) da página anterior.
         :return: Lista ordenada de declarantes e seu total de registros.
         """
-        try:
-            pipeline = [
-                {"$unwind": "$declarantes"},
-                {
-                    "$group": {
-                        "_id": "$declarantes.$id",
-                        "quantidade_registros": {"$sum": 1}
-                    }
-                },
-                {
-                    "$lookup": {
-                        "from": "declarantes",
-                        "localField": "_id",
-                        "foreignField": "_id",
-                        "as": "dados_declarantes"
-                    }
-                },
-                {"$unwind": "$dados_declarantes"},
-                {"$sort": {"quantidade_registros": -1}},
-                {"$skip": skip},
-                {"$limit": limit},
-                {
-                    "$project": {
-                        "id": "$_id",
-                        "nome": "$dados_declarantes.nome",
-                        "cpf": "$dados_declarantes.cpf",
-                        "endereco": "$dados_declarantes.endereco",
-                        "tipo_envolvimento": "$dados_declarantes.tipo_envolvimento",
-                        "quantidade_registros": 1,
-                        "_id": 0
-                    }
-                }
-            ]
+        pipeline = self.pipeline_ranking_declarantes(skip, limit, after)
 
-            resultados = await BoletimOcorrencia.aggregate(pipeline).to_list()
+        try:
+            resultados = await agregar(RankingDeclarante, pipeline)
             return resultados
 
         except Exception as e:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Erro ao processar ranking de declarantes: {str(e)}"
-            )
\ No newline at end of file
+            )
+
+    def pipelines_para_explain(self) -> list[tuple[type, list[dict]]]:
+        """
+        Lista os pipelines do serviço com parâmetros de exemplo, para a verificação de planos na inicialização.
+
+        :return: Lista de tuplas (modelo consultado, pipeline).
+        """
+        return [
+            (BoletimOcorrencia, self.pipeline_reincidentes_por_tipo(0, 1)),
+            (Declarante, self.pipeline_sem_boletim(0, 1)),
+            (RankingDeclarante, self.pipeline_ranking_declarantes(0, 1)),
+        ]
@@ -0,0 +1,226 @@
+from collections import Counter
+from datetime import date, datetime, time
+
+from beanie import PydanticObjectId
+from fastapi import HTTPException, status
+from pymongo import UpdateOne
+
+from config.database import agregar, consulta_analitica
+from models import BoletimOcorrencia, EstatisticaDiaria
+from models.boletim_ocorrencia import StatusBoletim, TipoOcorrencia
+from schemas.estatistica import Agrupamento, DimensaoEstatistica
+from service.normalizacao import normalizar_texto
+
+UNIDADES_AGRUPAMENTO = {
+    Agrupamento.DIA: "day",
+    Agrupamento.SEMANA: "week",
+    Agrupamento.MES: "month",
+}
+
+
+def _valor(campo) -> str:
+    return campo.value if hasattr(campo, "value") else campo
+
+
+def _meia_noite(data: date) -> datetime:
+    return datetime.combine(data, time.min)
+
+
+def chave_estatistica(boletim: BoletimOcorrencia) -> tuple:
+    """
+    Identifica a célula do rollup diário à qual o boletim pertence.
+
+    :param boletim: Documento do boletim.
+    :return: Tupla (data, tipo_ocorrencia, status, lotacao) com a lotação normalizada do autor.
+    """
+    lotacao = boletim.autor_resumo.lotacao if boletim.autor_resumo else None
+    return (
+        _meia_noite(boletim.data_registro),
+        _valor(boletim.tipo_ocorrencia),
+        _valor(boletim.status),
+        lotacao
+    )
+
+
+class EstatisticaService:
+    """
+    Mantém a coleção de estatísticas diárias (contagem de boletins por data, tipo, status e lotação),
+    atualizada de forma incremental pelas escritas de boletins e reconstruível a partir do histórico.
+    """
+
+    async def aplicar_alteracoes(self, alteracoes: list[tuple[BoletimOcorrencia | None, BoletimOcorrencia | None]]):
+        """
+        Aplica nos contadores diários a diferença entre o estado anterior e o novo de cada boletim escrito.
+
+        :param alteracoes: Pares (anterior, novo) dos boletins escritos.
+        """
+        deltas = Counter()
+        for anterior, novo in alteracoes:
+            if anterior is not None:
+                deltas[chave_estatistica(anterior)] -= 1
+            if novo is not None:
+                deltas[chave_estatistica(novo)] += 1
+        await self._incrementar(deltas)
+
+    async def mover_lotacao(self, id_autor: PydanticObjectId, lotacao_anterior: str, lotacao_nova: str):
+        """
+        Transfere os contadores dos boletins de um autor entre lotações quando a lotação dele muda.
+
+        Deve ser chamado antes de sincronizar o autor_resumo dos boletins, pois a contagem
+        é feita sobre os boletins ainda marcados com a lotação anterior.
+
+        :param id_autor: Identificador do autor.
+        :param lotacao_anterior: Lotação normalizada antes da alteração.
+        :param lotacao_nova: Lotação normalizada depois da alteração.
+        """
+        if lotacao_anterior == lotacao_nova:
+            return
+
+        grupos = await BoletimOcorrencia.get_pymongo_collection().aggregate([
+            {"$match": {"autor.$id": id_autor, "autor_resumo.lotacao": lotacao_anterior}},
+            {"$group": {
+                "_id": {"data": "$data_registro", "tipo_ocorrencia": "$tipo_ocorrencia", "status": "$status"},
+                "total": {"$sum": 1}
+            }}
+        ])
+
+        deltas = Counter()
+        async for grupo in grupos:
+            chave = grupo["_id"]
+            deltas[(chave["data"], chave["tipo_ocorrencia"], chave["status"], lotacao_anterior)] -= grupo["total"]
+            deltas[(chave["data"], chave["tipo_ocorrencia"], chave["status"], lotacao_nova)] += grupo["total"]
+        await self._incrementar(deltas)
+
+    async def _incrementar(self, deltas: Counter):
+        operacoes = [
+            UpdateOne(
+                {"data": data, "tipo_ocorrencia": tipo, "status": situacao, "lotacao": lotacao},
+                {"$inc": {"total": delta}},
+                upsert=True
+            )
+            for (data, tipo, situacao, lotacao), delta in deltas.items()
+            if delta
+        ]
+        if operacoes:
+            await EstatisticaDiaria.get_pymongo_collection().bulk_write(operacoes, ordered=False)
+
+    async def reconstruir(self) -> int:
+        """
+        Recalcula as estatísticas diárias do zero a partir da coleção de boletins, substituindo a coleção atual.
+
+        :return: Quantidade de células gravadas.
+        """
+        await BoletimOcorrencia.aggregate([
+            {"$group": {
+                "_id": {
+                    "data": "$data_registro",
+                    "tipo_ocorrencia": "$tipo_ocorrencia",
+                    "status": "$status",
+                    "lotacao": {"$ifNull": ["$autor_resumo.lotacao", None]}
+                },
+                "total": {"$sum": 1}
+            }},
+            {"$project": {
+                "_id": 0,
+                "data": "$_id.data",
+                "tipo_ocorrencia": "$_id.tipo_ocorrencia",
+                "status": "$_id.status",
+                "lotacao": "$_id.lotacao",
+                "total": 1
+            }},
+            {"$out": EstatisticaDiaria.get_collection_name()}
+        ]).to_list()
+
+        # O $out mantém os índices de uma coleção já existente, mas, se ela ainda não existia, cria-a só com o
+        # índice de _id; o índice único é necessário para os upserts (create_indexes não faz nada se já existir).
+        await EstatisticaDiaria.get_pymongo_collection().create_indexes(EstatisticaDiaria.Settings.indexes)
+        return await EstatisticaDiaria.count()
+
+    def pipeline_periodo(
+        self,
+        inicio: date,
+        fim: date,
+        agrupamento: Agrupamento = Agrupamento.DIA,
+        por: DimensaoEstatistica | None = None,
+        tipos: list[TipoOcorrencia] | None = None,
+        situacoes: list[StatusBoletim] | None = None,
+        lotacao: str | None = None,
+    ) -> list[dict]:
+        """
+        Monta o pipeline que soma os contadores diários do intervalo em baldes de dia, semana ou mês.
+
+        :param inicio: Primeira data do intervalo (inclusiva).
+        :param fim: Última data do intervalo (inclusiva).
+        :param agrupamento: Tamanho do balde.
+        :param por: Dimensão opcional para separar os totais de cada balde.
+        :param tipos: Filtra pelos tipos de ocorrência informados.
+        :param situacoes: Filtra pelos status informados.
+        :param lotacao: Filtra pela lotação do autor (comparação sem acentos e sem diferenciar maiúsculas).
+        :return: Lista de estágios da agregação.
+        """
+        if fim < inicio:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A data final deve ser igual ou posterior à data inicial"
+            )
+
+        filtro = {"data": {"$gte": _meia_noite(inicio), "$lte": _meia_noite(fim)}}
+        if tipos:
+            filtro["tipo_ocorrencia"] = {"$in": [_valor(t) for t in tipos]}
+        if situacoes:
+            filtro["status"] = {"$in": [_valor(s) for s in situacoes]}
+        if lotacao:
+            filtro["lotacao"] = normalizar_texto(lotacao)
+
+        periodo = "$data"
+        if agrupamento != Agrupamento.DIA:
+            periodo = {"$dateTrunc": {"date": "$data", "unit": UNIDADES_AGRUPAMENTO[agrupamento], "startOfWeek": "monday"}}
+
+        return [
+            {"$match": filtro},
+            {"$group": {
+                "_id": {"periodo": periodo, "chave": f"${por.value}" if por else None},
+                "total": {"$sum": "$total"}
+            }},
+            {"$match": {"total": {"$gt": 0}}},
+            {"$sort": {"_id.periodo": 1, "_id.chave": 1}},
+            {"$project": {"_id": 0, "periodo": "$_id.periodo", "chave": "$_id.chave", "total": 1}}
+        ]
+
+    @consulta_analitica
+    async def estatisticas_por_periodo(
+        self,
+        inicio: date,
+        fim: date,
+        agrupamento: Agrupamento = Agrupamento.DIA,
+        por: DimensaoEstatistica | None = None,
+        tipos: list[TipoOcorrencia] | None = None,
+        situacoes: list[StatusBoletim] | None = None,
+        lotacao: str | None = None,
+    ) -> list[dict]:
+        """
+        Consulta os totais de boletins por período a partir dos rollups diários, sem varrer a coleção de boletins.
+
+        :param inicio: Primeira data do intervalo (inclusiva).
+        :param fim: Última data do intervalo (inclusiva).
+        :param agrupamento: Tamanho do balde (dia, semana ou mês).
+        :param por: Dimensão opcional para separar os totais de cada balde.
+        :param tipos: Filtra pelos tipos de ocorrência informados.
+        :param situacoes: Filtra pelos status informados.
+        :param lotacao: Filtra pela lotação do autor.
+        :return: Lista de totais por período (e por chave da dimensão, se informada).
+        """
+        pipeline = self.pipeline_periodo(inicio, fim, agrupamento, por, tipos, situacoes, lotacao)
+        try:
+            return await agregar(EstatisticaDiaria, pipeline)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Erro ao consultar estatísticas: {str(e)}"
+            )
+
+    def pipelines_para_explain(self) -> list[tuple]:
+        hoje = date.today()
+        return [
+            (EstatisticaDiaria, self.pipeline_periodo(hoje, hoje, Agrupamento.MES, DimensaoEstatistica.STATUS)),
+        ]
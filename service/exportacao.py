@@ -0,0 +1,86 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+
+from bson import DBRef
+
+CAMPOS_EXPORTACAO = [
+    "id",
+    "data_registro",
+    "tipo_ocorrencia",
+    "status",
+    "autor",
+    "declarantes",
+    "total_declarantes",
+]
+
+LINHAS_POR_PEDACO = 500
+
+
+def achatar_boletim(documento: dict) -> dict:
+    """
+    Converte um boletim bruto do MongoDB (sem carregar vínculos) em um dicionário serializável.
+
+    :param documento: Documento retornado pelo cursor do pymongo.
+    :return: Dicionário com os campos de CAMPOS_EXPORTACAO.
+    """
+    autor = documento.get("autor")
+    declarantes = documento.get("declarantes") or []
+    data_registro = documento.get("data_registro")
+
+    return {
+        "id": str(documento["_id"]),
+        "data_registro": data_registro.date().isoformat() if data_registro else None,
+        "tipo_ocorrencia": documento.get("tipo_ocorrencia"),
+        "status": documento.get("status"),
+        "autor": str(autor.id) if isinstance(autor, DBRef) else None,
+        "declarantes": [str(d.id) for d in declarantes if isinstance(d, DBRef)],
+        "total_declarantes": documento.get("total_declarantes", len(declarantes)),
+    }
+
+
+async def gerar_ndjson(documentos: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """
+    Serializa os boletins em NDJSON, agrupando as linhas em pedaços para reduzir o número de escritas.
+
+    :param documentos: Iterador assíncrono de documentos brutos.
+    :return: Pedaços de bytes prontos para um StreamingResponse.
+    """
+    pedaco = []
+    async for documento in documentos:
+        pedaco.append(json.dumps(achatar_boletim(documento), ensure_ascii=False))
+        if len(pedaco) >= LINHAS_POR_PEDACO:
+            yield ("\n".join(pedaco) + "\n").encode()
+            pedaco = []
+    if pedaco:
+        yield ("\n".join(pedaco) + "\n").encode()
+
+
+async def gerar_csv(documentos: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """
+    Serializa os boletins em CSV; o cabeçalho é enviado antes da primeira consulta ao banco.
+
+    :param documentos: Iterador assíncrono de documentos brutos.
+    :return: Pedaços de bytes prontos para um StreamingResponse.
+    """
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=CAMPOS_EXPORTACAO)
+    escritor.writeheader()
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+
+    linhas = 0
+    async for documento in documentos:
+        linha = achatar_boletim(documento)
+        linha["declarantes"] = ";".join(linha["declarantes"])
+        escritor.writerow(linha)
+        linhas += 1
+        if linhas >= LINHAS_POR_PEDACO:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+            linhas = 0
+    if linhas:
+        yield buffer.getvalue().encode()
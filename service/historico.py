@@ -0,0 +1,106 @@
+import asyncio
+import os
+from datetime import datetime, timezone
+
+from beanie import PydanticObjectId
+from fastapi import HTTPException, status
+
+from models import BoletimOcorrencia, HistoricoBoletim
+from models.boletim_ocorrencia import AlteracaoStatus, StatusBoletim
+from service.paginacao import decode_cursor
+
+# Quantidade de alterações mais recentes mantidas dentro do próprio boletim; a linha do tempo
+# completa fica na coleção historico_boletins.
+HISTORICO_INLINE = int(os.getenv("HISTORICO_INLINE", "20"))
+
+
+def nova_alteracao(status_anterior: StatusBoletim | None, status_novo: StatusBoletim, versao: int) -> AlteracaoStatus:
+    """
+    Cria a entrada de histórico de uma mudança de status, com o horário truncado em milissegundos como no MongoDB.
+
+    :param status_anterior: Status antes da alteração (None na criação do boletim).
+    :param status_novo: Status gravado.
+    :param versao: Versão do boletim após a alteração.
+    :return: Entrada do histórico.
+    """
+    agora = datetime.now(timezone.utc)
+    return AlteracaoStatus(
+        status_anterior=status_anterior,
+        status_novo=status_novo,
+        data=agora.replace(microsecond=agora.microsecond // 1000 * 1000),
+        versao=versao
+    )
+
+
+def expressao_historico(alteracao: AlteracaoStatus) -> dict:
+    """
+    Expressão de pipeline de atualização que acrescenta a alteração ao histórico inline somente se o status
+    realmente mudou, mantendo apenas as HISTORICO_INLINE mais recentes (equivalente a $push com $slice,
+    mas lendo o status anterior na mesma operação).
+
+    :param alteracao: Entrada a acrescentar; status_anterior é preenchido pelo servidor.
+    :return: Expressão para o campo historico_alteracoes em um estágio $set.
+    """
+    atual = {"$ifNull": ["$historico_alteracoes", []]}
+    entrada = {
+        "status_anterior": "$status",
+        "status_novo": {"$literal": alteracao.status_novo.value},
+        "data": {"$literal": alteracao.data},
+        "versao": {"$add": [{"$ifNull": ["$versao", 0]}, 1]},
+    }
+    return {
+        "$cond": [
+            {"$ne": ["$status", {"$literal": alteracao.status_novo.value}]},
+            {"$slice": [{"$concatArrays": [atual, [entrada]]}, -HISTORICO_INLINE]},
+            atual
+        ]
+    }
+
+
+class HistoricoService:
+    """
+    Mantém a linha do tempo completa de mudanças de status dos boletins na coleção historico_boletins.
+    """
+
+    async def registrar(self, alteracoes: list[tuple[BoletimOcorrencia | None, BoletimOcorrencia | None]]):
+        """
+        Copia para a coleção de histórico a entrada mais recente de cada boletim criado ou com status alterado.
+
+        :param alteracoes: Pares (anterior, novo) dos boletins escritos.
+        """
+        documentos = [
+            HistoricoBoletim(boletim=novo.id, **novo.historico_alteracoes[-1].model_dump())
+            for anterior, novo in alteracoes
+            if novo is not None
+            and novo.historico_alteracoes
+            and (anterior is None or anterior.status != novo.status)
+        ]
+        if documentos:
+            await HistoricoBoletim.insert_many(documentos, ordered=False)
+
+    async def listar(self, id_boletim: PydanticObjectId, limit: int, after: str | None = None) -> list[HistoricoBoletim]:
+        """
+        Lista as alterações de um boletim da mais recente para a mais antiga, pelo índice (boletim, _id desc).
+
+        A existência do boletim é conferida em paralelo com a leitura da página.
+
+        :param id_boletim: Identificador do boletim.
+        :param limit: Tamanho da página.
+        :param after: Cursor opaco da página anterior.
+        :return: Página de alterações.
+        """
+        filtro = {"boletim": id_boletim}
+        if after is not None:
+            (ultimo_id,) = decode_cursor(after, 1)
+            filtro["_id"] = {"$lt": ultimo_id}
+        boletim, alteracoes = await asyncio.gather(
+            BoletimOcorrencia.get_pymongo_collection().find_one({"_id": id_boletim}, {"_id": 1}),
+            HistoricoBoletim.find(filtro).sort("-_id").limit(limit).to_list()
+        )
+
+        if not boletim:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Boletim de ocorrência não encontrado"
+            )
+        return alteracoes
@@ -0,0 +1,80 @@
+from config.eventos import barramento_eventos
+from models import Autor, BoletimOcorrencia, Declarante
+from service.cache import cache_autores, cache_declarantes
+from service.cache_respostas import cache_respostas
+
+# Invalidação dirigida pelos change streams: cobre escritas feitas por outros processos, outros
+# serviços ou direto no MongoDB, que não passam pelas invalidações feitas nos serviços.
+
+
+# Campos mantidos pelas escritas de boletins: a resposta a essas escritas já é invalidada pela
+# coleção de boletins, e tratá-las aqui esvaziaria o cache de declarantes a cada boletim gravado.
+_CONTADORES_DECLARANTE = {"quantidade_boletins"}
+
+
+def _ids(eventos: list[dict]) -> set:
+    return {evento["documentKey"]["_id"] for evento in eventos}
+
+
+def _sem_contadores(eventos: list[dict], contadores: set[str]) -> list[dict]:
+    """
+    Remove os updates que só alteraram os contadores informados.
+
+    :param eventos: Lote de eventos do change stream.
+    :param contadores: Campos cuja alteração isolada não invalida o documento.
+    :return: Eventos restantes.
+    """
+    restantes = []
+    for evento in eventos:
+        descricao = evento.get("updateDescription") or {}
+        if (
+            evento["operationType"] == "update"
+            and not descricao.get("removedFields")
+            and not descricao.get("truncatedArrays")
+            and set(descricao.get("updatedFields") or {}) <= contadores
+        ):
+            continue
+        restantes.append(evento)
+    return restantes
+
+
+async def invalidar_autores(eventos: list[dict]):
+    """
+    Descarta do cache local os autores alterados e invalida as respostas que dependem deles.
+
+    :param eventos: Lote de eventos do change stream da coleção de autores.
+    """
+    for id_autor in _ids(eventos):
+        cache_autores.invalidar(id_autor)
+    await cache_respostas.invalidar("autores")
+
+
+async def invalidar_declarantes(eventos: list[dict]):
+    """
+    Descarta do cache local os declarantes alterados e invalida as respostas que dependem deles.
+
+    Updates que só mexem em quantidade_boletins vêm das escritas de boletins e são ignorados.
+
+    :param eventos: Lote de eventos do change stream da coleção de declarantes.
+    """
+    eventos = _sem_contadores(eventos, _CONTADORES_DECLARANTE)
+    if not eventos:
+        return
+    for id_declarante in _ids(eventos):
+        cache_declarantes.invalidar(id_declarante)
+    await cache_respostas.invalidar("declarantes")
+
+
+async def invalidar_boletins(eventos: list[dict]):
+    """
+    Invalida as respostas em cache que dependem dos boletins.
+
+    :param eventos: Lote de eventos do change stream da coleção de boletins.
+    """
+    await cache_respostas.invalidar("boletins")
+
+
+def registrar_invalidacoes():
+    barramento_eventos.assinar(Autor, invalidar_autores)
+    barramento_eventos.assinar(Declarante, invalidar_declarantes)
+    barramento_eventos.assinar(BoletimOcorrencia, invalidar_boletins)
@@ -0,0 +1,98 @@
+from datetime import datetime
+
+from beanie import Link
+
+from models import Autor, BoletimOcorrencia, Declarante
+from models.boletim_ocorrencia import AlteracaoStatus, AutorResumo, StatusBoletim, TipoOcorrencia
+from models.declarante import TipoEnvolvimento
+from schemas.autor import AutorResponse
+from schemas.declarante import DeclaranteResponse
+from service.paginacao import filtro_apos_id
+from service.vinculos import PROJECAO_AUTOR, PROJECAO_DECLARANTE, buscar_por_ids
+
+# Caminho de leitura enxuto das listagens: nada passa pelo Document do Beanie antes do response_model.
+# Autores e declarantes saem como dicionários já no formato do esquema de resposta (validados uma
+# única vez pelo FastAPI); boletins são montados com model_construct e passam direto pelo response_model.
+
+
+def _projecao_resposta(esquema) -> dict:
+    # O _id sai renomeado para id, no formato do esquema de resposta.
+    return {"_id": 0, "id": "$_id", **{campo: 1 for campo in esquema.model_fields if campo != "id"}}
+
+
+PROJECAO_AUTOR_RESPOSTA = _projecao_resposta(AutorResponse)
+PROJECAO_DECLARANTE_RESPOSTA = _projecao_resposta(DeclaranteResponse)
+PROJECAO_BOLETIM = {campo: 1 for campo in BoletimOcorrencia.model_fields if campo not in ("id", "revision_id")}
+
+
+async def listar_documentos(modelo, projecao: dict, skip: int, limit: int, after: str | None) -> list[dict]:
+    """
+    Lê uma página de documentos brutos ordenada por _id, apenas com os campos projetados.
+
+    :param modelo: Documento do Beanie consultado.
+    :param projecao: Campos retornados pelo MongoDB.
+    :param skip: Offset legado, ignorado quando há cursor.
+    :param limit: Tamanho da página.
+    :param after: Cursor opaco da página anterior.
+    :return: Documentos como dicionários do pymongo.
+    """
+    cursor = modelo.get_pymongo_collection().find(filtro_apos_id(after), projecao).sort("_id")
+    if after is None and skip:
+        cursor = cursor.skip(skip)
+    return await cursor.limit(limit).to_list()
+
+
+def autor_vinculado(documento: dict) -> Autor:
+    # Campos ausentes no documento (versao em dados antigos) ficam com o padrão do modelo, como no get.
+    return Autor.model_construct(id=documento["_id"], **{campo: documento[campo] for campo in PROJECAO_AUTOR if campo in documento})
+
+
+def declarante_vinculado(documento: dict) -> Declarante:
+    return Declarante.model_construct(
+        id=documento["_id"],
+        nome=documento["nome"],
+        cpf=documento["cpf"],
+        endereco=documento["endereco"],
+        tipo_envolvimento=TipoEnvolvimento(documento["tipo_envolvimento"]),
+        versao=documento.get("versao", 0),
+    )
+
+
+def boletim_de_documento(documento: dict, autores: dict, declarantes: dict) -> BoletimOcorrencia:
+    referencia_autor = documento["autor"]
+    data_registro = documento["data_registro"]
+    resumo = documento.get("autor_resumo")
+    return BoletimOcorrencia.model_construct(
+        id=documento["_id"],
+        data_registro=data_registro.date() if isinstance(data_registro, datetime) else data_registro,
+        tipo_ocorrencia=TipoOcorrencia(documento["tipo_ocorrencia"]),
+        status=StatusBoletim(documento["status"]),
+        autor=autores.get(referencia_autor.id) or Link(referencia_autor, Autor),
+        declarantes=[
+            declarantes.get(referencia.id) or Link(referencia, Declarante)
+            for referencia in documento.get("declarantes") or []
+        ],
+        autor_resumo=AutorResumo.model_validate(resumo) if resumo else None,
+        total_declarantes=documento.get("total_declarantes") or 0,
+        versao=documento.get("versao") or 0,
+        historico_alteracoes=[AlteracaoStatus.model_validate(a) for a in documento.get("historico_alteracoes") or []],
+    )
+
+
+async def boletins_enxutos(documentos: list[dict], expandir: set[str]) -> list[BoletimOcorrencia]:
+    """
+    Monta boletins a partir de documentos brutos, carregando os vínculos pedidos com uma consulta $in por coleção.
+
+    Produz o mesmo JSON de resolver_vinculos, sem validar boletins, autores e declarantes um a um.
+
+    :param documentos: Boletins brutos, projetados com PROJECAO_BOLETIM.
+    :param expandir: Vínculos a carregar (autor, declarantes).
+    :return: Boletins prontos para serialização.
+    """
+    ids_autores = {d["autor"].id for d in documentos} if "autor" in expandir else set()
+    ids_declarantes = (
+        {r.id for d in documentos for r in d.get("declarantes") or []} if "declarantes" in expandir else set()
+    )
+    autores = await buscar_por_ids(Autor, ids_autores, PROJECAO_AUTOR, autor_vinculado)
+    declarantes = await buscar_por_ids(Declarante, ids_declarantes, PROJECAO_DECLARANTE, declarante_vinculado)
+    return [boletim_de_documento(documento, autores, declarantes) for documento in documentos]
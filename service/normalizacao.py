@@ -0,0 +1,57 @@
+import re
+import unicodedata
+
+
+def normalizar_texto(texto: str) -> str:
+    """
+    Normaliza um texto para comparação: remove acentos, converte para minúsculas e colapsa espaços.
+
+    :param texto: Texto original.
+    :return: Texto normalizado.
+    """
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.lower().split())
+
+
+def regex_prefixo(texto: str) -> dict:
+    """
+    Monta um filtro $regex ancorado no início sobre o termo normalizado, que o MongoDB resolve com varredura de índice.
+
+    :param texto: Termo de busca informado pelo usuário.
+    :return: Filtro $regex para ser usado em um $match.
+    """
+    return {"$regex": "^" + re.escape(normalizar_texto(texto))}
+
+
+def somente_digitos(texto: str) -> str:
+    """
+    Remove tudo que não for dígito (pontos, traços, espaços), como na comparação de CPFs.
+
+    :param texto: Texto original.
+    :return: Apenas os dígitos do texto.
+    """
+    return re.sub(r"\D", "", texto)
+
+
+def tokens(texto: str) -> list[str]:
+    """
+    Quebra um texto normalizado em palavras, sem repetições e preservando a ordem.
+
+    :param texto: Texto original.
+    :return: Lista de palavras sem acentos e em minúsculas.
+    """
+    return list(dict.fromkeys(re.findall(r"\w+", normalizar_texto(texto))))
+
+
+def ngramas(token: str, tamanho: int = 3) -> list[str]:
+    """
+    Gera os n-gramas de uma palavra; palavras menores que o tamanho viram um único n-grama.
+
+    :param token: Palavra já normalizada.
+    :param tamanho: Quantidade de caracteres de cada n-grama.
+    :return: Lista de n-gramas sem repetições.
+    """
+    if len(token) <= tamanho:
+        return [token]
+    return list(dict.fromkeys(token[i:i + tamanho] for i in range(len(token) - tamanho + 1)))
@@ -0,0 +1,109 @@
+import base64
+import binascii
+
+from bson import json_util
+from fastapi import HTTPException, Response, status
+
+CABECALHO_CURSOR = "X-Next-Cursor"
+
+
+def encode_cursor(*valores) -> str:
+    """
+    Gera um cursor opaco a partir dos valores da chave de ordenação do último item da página.
+
+    :param valores: Valores da chave de ordenação, terminando sempre pelo _id.
+    :return: Token em base64 url-safe.
+    """
+    bruto = json_util.dumps(list(valores)).encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def decode_cursor(token: str, quantidade: int) -> list:
+    """
+    Decodifica um cursor gerado por encode_cursor.
+
+    :param token: Cursor recebido no parâmetro after.
+    :param quantidade: Número de valores esperados na chave.
+    :return: Lista com os valores da chave de ordenação.
+    """
+    try:
+        bruto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        valores = json_util.loads(bruto)
+    except (binascii.Error, ValueError, TypeError):
+        valores = None
+
+    if not isinstance(valores, list) or len(valores) != quantidade:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginação inválido"
+        )
+
+    return valores
+
+
+def filtro_apos_id(after: str | None) -> dict:
+    """
+    Monta o filtro de keyset para listagens ordenadas apenas por _id.
+
+    :param after: Cursor da página anterior, ou None para a primeira página.
+    :return: Filtro para ser combinado no $match / find.
+    """
+    if after is None:
+        return {}
+    (ultimo_id,) = decode_cursor(after, 1)
+    return {"_id": {"$gt": ultimo_id}}
+
+
+def filtro_apos_chave_desc(after: str | None, campo: str) -> dict:
+    """
+    Monta o filtro de keyset para rankings ordenados por (campo desc, _id asc).
+
+    :param after: Cursor da página anterior, ou None para a primeira página.
+    :param campo: Nome do campo de ordenação decrescente.
+    :return: Filtro para ser combinado no $match.
+    """
+    if after is None:
+        return {}
+    valor, ultimo_id = decode_cursor(after, 2)
+    return {
+        "$or": [
+            {campo: {"$lt": valor}},
+            {campo: valor, "_id": {"$gt": ultimo_id}}
+        ]
+    }
+
+
+def paginar(skip: int, limit: int, after: str | None) -> list[dict]:
+    """
+    Estágios de paginação para pipelines: com cursor o skip é ignorado.
+
+    :param skip: Offset legado.
+    :param limit: Tamanho da página.
+    :param after: Cursor da página anterior.
+    :return: Lista de estágios $skip/$limit.
+    """
+    if after is not None or not skip:
+        return [{"$limit": limit}]
+    return [{"$skip": skip}, {"$limit": limit}]
+
+
+def _valor(item, campo: str):
+    if isinstance(item, dict):
+        return item.get(campo)
+    return getattr(item, campo, None)
+
+
+def definir_proximo_cursor(response: Response, itens: list, limit: int, *campos: str) -> list:
+    """
+    Publica o cursor da próxima página no cabeçalho X-Next-Cursor quando a página veio cheia.
+
+    :param response: Resposta do FastAPI onde o cabeçalho será escrito.
+    :param itens: Itens da página atual.
+    :param limit: Tamanho da página solicitado.
+    :param campos: Campos que formam a chave de ordenação, terminando pelo id.
+    :return: Os próprios itens, para permitir o uso direto no return da rota.
+    """
+    if itens and len(itens) >= limit:
+        ultimo = itens[-1]
+        response.headers[CABECALHO_CURSOR] = encode_cursor(*[_valor(ultimo, campo) for campo in campos])
+    return itens
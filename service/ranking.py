@@ -0,0 +1,81 @@
+from collections import Counter
+
+from pymongo import UpdateOne
+
+from models import BoletimOcorrencia, Declarante, RankingAutor, RankingDeclarante
+
+
+class RankingService:
+    """
+    Mantém as coleções de ranking de autores e declarantes, atualizadas de forma incremental
+    pelas escritas de boletins e reconstruíveis a partir do histórico completo.
+    """
+
+    async def aplicar_alteracoes(self, alteracoes: list[tuple[BoletimOcorrencia | None, BoletimOcorrencia | None]]):
+        """
+        Aplica nos rankings a diferença entre o estado anterior e o novo de cada boletim escrito.
+
+        Na criação o estado anterior é None; na exclusão, o novo. Todas as alterações viram
+        um único bulk_write por coleção de ranking; o contador quantidade_boletins dos próprios
+        declarantes recebe os mesmos incrementos.
+
+        :param alteracoes: Pares (anterior, novo) dos boletins escritos.
+        """
+        autores = Counter()
+        declarantes = Counter()
+
+        for anterior, novo in alteracoes:
+            if anterior is not None:
+                autores[anterior.id_autor()] -= 1
+                for id_declarante in anterior.ids_declarantes():
+                    declarantes[id_declarante] -= 1
+            if novo is not None:
+                autores[novo.id_autor()] += 1
+                for id_declarante in novo.ids_declarantes():
+                    declarantes[id_declarante] += 1
+
+        await self._incrementar(RankingAutor, "total_boletins", autores)
+        await self._incrementar(RankingDeclarante, "quantidade_registros", declarantes)
+        await self._incrementar(Declarante, "quantidade_boletins", declarantes, upsert=False)
+
+    async def _incrementar(self, modelo, campo: str, deltas: Counter, upsert: bool = True):
+        operacoes = [
+            UpdateOne({"_id": id_documento}, {"$inc": {campo: delta}}, upsert=upsert)
+            for id_documento, delta in deltas.items()
+            if delta
+        ]
+        if operacoes:
+            await modelo.get_pymongo_collection().bulk_write(operacoes, ordered=False)
+
+    async def reconstruir(self) -> int:
+        """
+        Recalcula os dois rankings do zero a partir da coleção de boletins, substituindo as coleções atuais,
+        e realinha o contador quantidade_boletins de cada declarante.
+
+        :return: Quantidade total de entradas gravadas nos rankings.
+        """
+        await BoletimOcorrencia.aggregate([
+            {"$group": {"_id": "$autor.$id", "total_boletins": {"$sum": 1}}},
+            {"$out": RankingAutor.get_collection_name()}
+        ]).to_list()
+
+        await BoletimOcorrencia.aggregate([
+            {"$unwind": "$declarantes"},
+            {"$group": {"_id": "$declarantes.$id", "quantidade_registros": {"$sum": 1}}},
+            {"$out": RankingDeclarante.get_collection_name()}
+        ]).to_list()
+
+        await Declarante.get_pymongo_collection().update_many({}, {"$set": {"quantidade_boletins": 0}})
+        await RankingDeclarante.aggregate([
+            {"$project": {"quantidade_boletins": "$quantidade_registros"}},
+            {
+                "$merge": {
+                    "into": Declarante.get_collection_name(),
+                    "on": "_id",
+                    "whenMatched": "merge",
+                    "whenNotMatched": "discard"
+                }
+            }
+        ]).to_list()
+
+        return await RankingAutor.count() + await RankingDeclarante.count()
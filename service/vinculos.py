@@ -0,0 +1,79 @@
+from fastapi import HTTPException, status
+
+from models import Autor, BoletimOcorrencia, Declarante
+from schemas.autor import AutorResponse
+from schemas.declarante import DeclaranteResponse
+
+EXPANSOES = {"autor", "declarantes"}
+
+# Todos os campos que os vínculos expandidos expõem na resposta (ver BoletimOcorrenciaDetalhado).
+PROJECAO_AUTOR = {campo: 1 for campo in AutorResponse.model_fields if campo != "id"}
+PROJECAO_DECLARANTE = {campo: 1 for campo in DeclaranteResponse.model_fields if campo != "id"}
+
+
+def interpretar_expand(expand: str | None) -> set[str]:
+    """
+    Converte o parâmetro ?expand= no conjunto de vínculos a carregar.
+
+    Sem o parâmetro todos os vínculos são carregados (comportamento original); com ?expand= vazio, nenhum.
+
+    :param expand: Lista separada por vírgulas (autor, declarantes).
+    :return: Conjunto de vínculos a expandir.
+    """
+    if expand is None:
+        return set(EXPANSOES)
+
+    pedidos = {parte.strip() for parte in expand.split(",") if parte.strip()}
+    invalidos = pedidos - EXPANSOES
+    if invalidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Expansão inválida: {', '.join(sorted(invalidos))}. Use: {', '.join(sorted(EXPANSOES))}"
+        )
+    return pedidos
+
+
+async def buscar_por_ids(modelo, ids: set, projecao: dict, construir=None) -> dict:
+    """
+    Busca os documentos vinculados com uma única consulta $in.
+
+    :param modelo: Documento do Beanie consultado.
+    :param ids: Identificadores desejados.
+    :param projecao: Campos retornados pelo MongoDB.
+    :param construir: Converte o documento bruto; por padrão, model_validate do modelo.
+    :return: Dicionário {id: documento} apenas com os encontrados.
+    """
+    if not ids:
+        return {}
+    construir = construir or modelo.model_validate
+    cursor = modelo.get_pymongo_collection().find({"_id": {"$in": list(ids)}}, projecao)
+    return {documento["_id"]: construir(documento) async for documento in cursor}
+
+
+async def resolver_vinculos(boletins: list[BoletimOcorrencia], expandir: set[str]) -> list[BoletimOcorrencia]:
+    """
+    Carrega os vínculos de uma página de boletins com uma consulta $in por coleção.
+
+    Autores e declarantes repetidos na página são buscados e validados uma única vez; vínculos
+    cujo documento não existe mais permanecem como referência.
+
+    :param boletins: Página de boletins carregada sem fetch_links.
+    :param expandir: Vínculos a carregar (autor, declarantes).
+    :return: A mesma lista, com os vínculos pedidos substituídos pelos documentos.
+    """
+    ids_autores = {b.id_autor() for b in boletins} if "autor" in expandir else set()
+    ids_declarantes = {d for b in boletins for d in b.ids_declarantes()} if "declarantes" in expandir else set()
+
+    autores = await buscar_por_ids(Autor, ids_autores, PROJECAO_AUTOR)
+    declarantes = await buscar_por_ids(Declarante, ids_declarantes, PROJECAO_DECLARANTE)
+
+    for boletim in boletins:
+        if "autor" in expandir:
+            boletim.autor = autores.get(boletim.id_autor(), boletim.autor)
+        if "declarantes" in expandir:
+            boletim.declarantes = [
+                declarantes.get(id_declarante, vinculo)
+                for id_declarante, vinculo in zip(boletim.ids_declarantes(), boletim.declarantes)
+            ]
+
+    return boletins
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+
+class ServidorRESPFalso:
+    """
+    Servidor mínimo que fala o protocolo RESP, com os comandos usados pelo BackendRedis
+    (AUTH, SELECT, MGET, SET ... PX, INCR), para exercitar o backend sem um Redis de verdade.
+    """
+
+    def __init__(self, senha: str | None = None):
+        self.senha = senha
+        self.dados: dict[bytes, tuple[float | None, bytes]] = {}
+        self.comandos: list[list[bytes]] = []
+        self.conexoes = 0
+        self.atraso = 0.0
+        self._servidor: asyncio.base_events.Server | None = None
+        self._escritores: set[asyncio.StreamWriter] = set()
+
+    async def iniciar(self) -> str:
+        self._servidor = await asyncio.start_server(self._atender, "127.0.0.1", 0)
+        porta = self._servidor.sockets[0].getsockname()[1]
+        return f"redis://127.0.0.1:{porta}"
+
+    async def parar(self):
+        self.derrubar_conexoes()
+        self._servidor.close()
+        await self._servidor.wait_closed()
+
+    def derrubar_conexoes(self):
+        for escritor in list(self._escritores):
+            escritor.close()
+        self._escritores.clear()
+
+    async def _ler_comando(self, leitor: asyncio.StreamReader) -> list[bytes] | None:
+        linha = await leitor.readline()
+        if not linha:
+            return None
+        argumentos = []
+        for _ in range(int(linha[1:-2])):
+            tamanho = int((await leitor.readline())[1:-2])
+            argumentos.append((await leitor.readexactly(tamanho + 2))[:-2])
+        return argumentos
+
+    def _valor(self, chave: bytes) -> bytes | None:
+        entrada = self.dados.get(chave)
+        if entrada is None:
+            return None
+        expira_em, valor = entrada
+        if expira_em is not None and expira_em < time.monotonic():
+            del self.dados[chave]
+            return None
+        return valor
+
+    @staticmethod
+    def _bulk(valor: bytes | None) -> bytes:
+        if valor is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(valor), valor)
+
+    def _executar(self, argumentos: list[bytes]) -> bytes:
+        nome, *resto = argumentos
+        nome = nome.upper()
+        if nome == b"AUTH":
+            return b"+OK\r\n" if resto[0].decode() == self.senha else b"-WRONGPASS invalid password\r\n"
+        if nome == b"SELECT":
+            return b"+OK\r\n"
+        if nome == b"MGET":
+            return b"*%d\r\n" % len(resto) + b"".join(self._bulk(self._valor(chave)) for chave in resto)
+        if nome == b"SET":
+            chave, valor, _, milissegundos = resto
+            self.dados[chave] = (time.monotonic() + int(milissegundos) / 1000, valor)
+            return b"+OK\r\n"
+        if nome == b"INCR":
+            atual = int(self._valor(resto[0]) or 0) + 1
+            self.dados[resto[0]] = (None, str(atual).encode())
+            return b":%d\r\n" % atual
+        return b"-ERR unknown command '%s'\r\n" % nome
+
+    async def _atender(self, leitor: asyncio.StreamReader, escritor: asyncio.StreamWriter):
+        self.conexoes += 1
+        self._escritores.add(escritor)
+        try:
+            while (argumentos := await self._ler_comando(leitor)) is not None:
+                self.comandos.append(argumentos)
+                if self.atraso:
+                    await asyncio.sleep(self.atraso)
+                escritor.write(self._executar(argumentos))
+                await escritor.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._escritores.discard(escritor)
+            escritor.close()
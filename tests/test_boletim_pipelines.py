@@ -0,0 +1,83 @@
+from datetime import datetime
+
+import pytest
+from bson import DBRef, ObjectId
+from pydantic import TypeAdapter
+
+from schemas.boletim import BoletimOcorrenciaDetalhado
+from service.boletim import BoletimService
+
+RESPOSTA = TypeAdapter(list[BoletimOcorrenciaDetalhado])
+
+
+def _valor(documento: dict, caminho: str):
+    for parte in caminho.split("."):
+        if not isinstance(documento, dict) or parte not in documento:
+            return None
+        documento = documento[parte]
+    return documento
+
+
+def projetar(documento: dict, projecao: dict, prefixo: str = "") -> dict:
+    """
+    Aplica um $project de inclusão (campos com 1, expressões "$caminho" e subdocumentos) a um documento.
+    """
+    resultado = {}
+    for campo, expressao in projecao.items():
+        if expressao == 0:
+            continue
+        if expressao == 1:
+            valor = _valor(documento, prefixo + campo)
+        elif isinstance(expressao, dict):
+            valor = projetar(documento, expressao)
+        else:
+            valor = _valor(documento, expressao.removeprefix("$"))
+        if valor is not None:
+            resultado[campo] = valor
+    return resultado
+
+
+def boletim_com_autor() -> dict:
+    """
+    Boletim como sai do ESTAGIOS_LOOKUP_AUTOR: autor já juntado, declarantes ainda como DBRef.
+    """
+    return {
+        "_id": ObjectId(),
+        "data_registro": datetime(2024, 1, 2),
+        "tipo_ocorrencia": "Furto",
+        "status": "Registrado",
+        "autor": {"_id": ObjectId(), "nome": "Autor", "matricula": "M000001", "posto": "Cabo", "lotacao": "Delegacia 1", "versao": 3},
+        "declarantes": [DBRef("declarantes", ObjectId()), DBRef("declarantes", ObjectId())],
+        "autor_resumo": {"posto": "Cabo", "lotacao": "Delegacia 1"},
+        "total_declarantes": 2,
+        "multiplos_declarantes": True,
+        "versao": 4,
+        "historico_alteracoes": [{"status_novo": "Registrado", "data": datetime(2024, 1, 2), "versao": 0}],
+    }
+
+
+@pytest.mark.parametrize("pipeline", [
+    BoletimService().pipeline_por_posto("cabo", 0, 10),
+    BoletimService().pipeline_abertos_por_lotacao("delegacia", 0, 10),
+])
+def test_pipelines_com_autor_projetam_todos_os_campos_da_resposta(pipeline):
+    projecao = pipeline[-1]["$project"]
+    assert set(BoletimOcorrenciaDetalhado.model_fields) <= set(projecao)
+
+    documento = boletim_com_autor()
+    [saida] = RESPOSTA.dump_python(RESPOSTA.validate_python([projetar(documento, projecao)]), mode="json")
+
+    assert saida["id"] == str(documento["_id"])
+    assert saida["total_declarantes"] == 2
+    assert saida["versao"] == 4
+    assert saida["autor_resumo"] == {"posto": "Cabo", "lotacao": "Delegacia 1"}
+    assert saida["historico_alteracoes"][0]["status_novo"] == "Registrado"
+    assert saida["autor"] == {
+        "id": str(documento["autor"]["_id"]),
+        "nome": "Autor",
+        "matricula": "M000001",
+        "posto": "Cabo",
+        "lotacao": "Delegacia 1",
+        "versao": 3,
+    }
+    assert [d["id"] for d in saida["declarantes"]] == [str(d.id) for d in documento["declarantes"]]
@@ -0,0 +1,227 @@
+import asyncio
+import time
+
+import pytest
+
+from service.cache_respostas import BackendMemoria, BackendRedis, CacheRespostas, ErroRedis
+from tests.resp_falso import ServidorRESPFalso
+
+
+def executar(cenario):
+    """
+    Sobe o servidor RESP falso, executa o cenário com a URL dele e encerra o servidor.
+    """
+    async def principal():
+        servidor = ServidorRESPFalso(senha="segredo")
+        url = await servidor.iniciar()
+        try:
+            await cenario(servidor, url)
+        finally:
+            await servidor.parar()
+
+    asyncio.run(principal())
+
+
+class Calculo:
+    def __init__(self):
+        self.chamadas = 0
+        self.liberado = asyncio.Event()
+        self.liberado.set()
+
+    async def __call__(self):
+        self.chamadas += 1
+        chamada = self.chamadas
+        await self.liberado.wait()
+        return {"chamada": chamada}
+
+
+def test_redis_set_get_many_e_incr():
+    async def cenario(servidor, url):
+        backend = BackendRedis(url)
+        assert await backend.get_many(["a", "b"]) == [None, None]
+
+        await backend.set("a", b"valor\r\ncom quebra", 10)
+        assert await backend.incr("versao:boletins") == 1
+        assert await backend.incr("versao:boletins") == 2
+        assert await backend.get_many(["a", "b", "versao:boletins"]) == [b"valor\r\ncom quebra", None, b"2"]
+
+        # Todas as chamadas reaproveitam a mesma conexão.
+        assert servidor.conexoes == 1
+
+    executar(cenario)
+
+
+def test_redis_set_expira_em_milissegundos():
+    async def cenario(servidor, url):
+        backend = BackendRedis(url)
+        await backend.set("a", b"1", 0.05)
+        assert servidor.comandos[-1] == [b"SET", b"a", b"1", b"PX", b"50"]
+        await asyncio.sleep(0.1)
+        assert await backend.get_many(["a"]) == [None]
+
+    executar(cenario)
+
+
+def test_redis_autentica_e_seleciona_banco():
+    async def cenario(servidor, url):
+        backend = BackendRedis(url.replace("redis://", "redis://:segredo@") + "/3")
+        await backend.incr("x")
+        assert servidor.comandos[:2] == [[b"AUTH", b"segredo"], [b"SELECT", b"3"]]
+
+    executar(cenario)
+
+
+def test_redis_erro_do_servidor():
+    async def cenario(servidor, url):
+        backend = BackendRedis(url)
+        with pytest.raises(ErroRedis, match="unknown command"):
+            await backend.comando("FLUSHALL")
+        # Erros do protocolo não derrubam a conexão.
+        assert await backend.incr("x") == 1
+        assert servidor.conexoes == 1
+
+    executar(cenario)
+
+
+def test_redis_reconecta_depois_de_queda():
+    async def cenario(servidor, url):
+        backend = BackendRedis(url)
+        await backend.incr("x")
+        servidor.derrubar_conexoes()
+        await asyncio.sleep(0)
+
+        with pytest.raises((ConnectionError, OSError)):
+            await backend.incr("x")
+        assert await backend.incr("x") == 2
+        assert servidor.conexoes == 2
+
+    executar(cenario)
+
+
+def test_redis_descarta_conexao_de_comando_cancelado():
+    async def cenario(servidor, url):
+        backend = BackendRedis(url)
+        await backend.set("a", b"1", 10)
+
+        servidor.atraso = 0.2
+        pendente = asyncio.create_task(backend.get_many(["a"]))
+        await asyncio.sleep(0.05)
+        pendente.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pendente
+        servidor.atraso = 0.0
+
+        # A resposta do MGET cancelado não pode ser lida como resposta do comando seguinte.
+        assert await backend.incr("x") == 1
+        assert servidor.conexoes == 2
+
+    executar(cenario)
+
+
+def test_cache_reaproveita_resposta_ate_invalidar():
+    async def cenario(servidor, url):
+        cache = CacheRespostas(BackendRedis(url), ttl_fresco=30, ttl_obsoleto=300)
+        calcular = Calculo()
+
+        primeira = await cache.obter_ou_calcular("rota", {"limit": 10}, ("boletins",), calcular)
+        segunda = await cache.obter_ou_calcular("rota", {"limit": 10}, ("boletins",), calcular)
+        assert primeira == segunda == {"chamada": 1}
+
+        outra = await cache.obter_ou_calcular("rota", {"limit": 20}, ("boletins",), calcular)
+        assert outra == {"chamada": 2}
+
+        revisao = await cache.revisao(("boletins",))
+        await cache.invalidar("boletins")
+        assert await cache.revisao(("boletins",)) != revisao
+        assert await cache.obter_ou_calcular("rota", {"limit": 10}, ("boletins",), calcular) == {"chamada": 3}
+
+    executar(cenario)
+
+
+def test_cache_stale_while_revalidate():
+    async def cenario(servidor, url):
+        cache = CacheRespostas(BackendRedis(url), ttl_fresco=0, ttl_obsoleto=300)
+        calcular = Calculo()
+
+        assert await cache.obter_ou_calcular("rota", {}, ("autores",), calcular) == {"chamada": 1}
+        await asyncio.sleep(0.01)
+
+        # Resposta obsoleta sai na hora; a nova é calculada uma única vez em segundo plano.
+        calcular.liberado.clear()
+        assert await cache.obter_ou_calcular("rota", {}, ("autores",), calcular) == {"chamada": 1}
+        assert await cache.obter_ou_calcular("rota", {}, ("autores",), calcular) == {"chamada": 1}
+        assert calcular.chamadas == 2
+        calcular.liberado.set()
+        await asyncio.gather(*cache._tarefas)
+
+        assert await cache.obter_ou_calcular("rota", {}, ("autores",), calcular) == {"chamada": 2}
+
+    executar(cenario)
+
+
+def test_cache_consulta_direto_com_servidor_indisponivel():
+    async def cenario(servidor, url):
+        await servidor.parar()
+        cache = CacheRespostas(BackendRedis(url), ttl_fresco=30, ttl_obsoleto=300)
+        calcular = Calculo()
+
+        assert await cache.obter_ou_calcular("rota", {}, ("boletins",), calcular) == {"chamada": 1}
+        assert await cache.obter_ou_calcular("rota", {}, ("boletins",), calcular) == {"chamada": 2}
+        assert await cache.revisao(("boletins",)) is None
+        await cache.invalidar("boletins")
+
+    async def principal():
+        servidor = ServidorRESPFalso()
+        await cenario(servidor, await servidor.iniciar())
+
+    asyncio.run(principal())
+
+
+def test_memoria_limita_tamanho_com_lru():
+    async def cenario():
+        backend = BackendMemoria(tamanho_maximo=3)
+        for chave in "abc":
+            await backend.set(chave, chave.encode(), 60)
+        await backend.get_many(["a"])
+        await backend.set("d", b"d", 60)
+
+        assert await backend.get_many(["a", "b", "c", "d"]) == [b"a", None, b"c", b"d"]
+        assert len(backend._dados) == 3
+
+    asyncio.run(cenario())
+
+
+def test_memoria_descarta_expiradas_ao_gravar():
+    async def cenario():
+        backend = BackendMemoria(tamanho_maximo=100)
+        for indice in range(10):
+            await backend.set(f"antiga:{indice}", b"x", 0.01)
+        await asyncio.sleep(0.02)
+        await backend.set("nova", b"y", 60)
+
+        assert list(backend._dados) == ["nova"]
+
+    asyncio.run(cenario())
+
+
+def test_memoria_nao_descarta_versoes():
+    async def cenario():
+        backend = BackendMemoria(tamanho_maximo=1)
+        assert await backend.incr("versao:boletins") == 1
+        for indice in range(5):
+            await backend.set(f"resposta:{indice}", b"x", 60)
+        assert await backend.incr("versao:boletins") == 2
+        assert await backend.get_many(["versao:boletins", "versao:autores"]) == [b"2", None]
+
+    asyncio.run(cenario())
+
+
+def test_memoria_expira_entrada_lida():
+    async def cenario():
+        backend = BackendMemoria(tamanho_maximo=10)
+        await backend.set("a", b"1", 0.01)
+        time.sleep(0.02)
+        assert await backend.get_many(["a"]) == [None]
+        assert "a" not in backend._dados
+
+    asyncio.run(cenario())
@@ -0,0 +1,268 @@
+"""
+Testes do barramento de change streams contra um replica set de verdade (um nó basta).
+
+Usa MONGODB_TESTE_URL, por padrão o serviço mongo-rs do docker-compose
+(docker compose --profile replica up -d mongo-rs); sem replica set acessível, os testes são pulados.
+"""
+import asyncio
+import inspect
+import os
+import time
+
+import pytest
+from beanie import init_beanie
+from pymongo import AsyncMongoClient, MongoClient
+from pymongo.errors import PyMongoError
+
+from config.eventos import BarramentoEventos
+from models import Autor, BoletimOcorrencia, Declarante, RankingAutor, RankingDeclarante, TokenRetomada
+from models.boletim_ocorrencia import StatusBoletim, TipoOcorrencia
+from service.cache import _AUSENTE, cache_autores, cache_declarantes
+from service.invalidacao import invalidar_autores, invalidar_declarantes
+from service.ranking import RankingService
+
+URL = os.getenv("MONGODB_TESTE_URL", "mongodb://localhost:27018/?directConnection=true")
+BANCO = "db_boletim_testes_eventos"
+
+
+def _replica_set_disponivel() -> bool:
+    client = MongoClient(URL, serverSelectionTimeoutMS=1000)
+    try:
+        return "setName" in client.admin.command("hello")
+    except PyMongoError:
+        return False
+    finally:
+        client.close()
+
+
+pytestmark = pytest.mark.skipif(not _replica_set_disponivel(), reason=f"sem replica set em {URL}")
+
+
+def executar(cenario):
+    """
+    Executa o cenário com os modelos ligados a um banco de testes, removido ao final.
+    """
+    async def principal():
+        client = AsyncMongoClient(URL)
+        await client.drop_database(BANCO)
+        await init_beanie(database=client[BANCO], document_models=[
+            Autor, Declarante, BoletimOcorrencia, RankingAutor, RankingDeclarante, TokenRetomada
+        ])
+        try:
+            await cenario(client)
+        finally:
+            await client.drop_database(BANCO)
+            await client.close()
+
+    asyncio.run(principal())
+
+
+async def ate(condicao, timeout: float = 10.0):
+    """
+    Aguarda a condição (síncrona ou assíncrona) ficar verdadeira.
+    """
+    limite = time.monotonic() + timeout
+    while True:
+        resultado = condicao()
+        if inspect.isawaitable(resultado):
+            resultado = await resultado
+        if resultado:
+            return resultado
+        if time.monotonic() > limite:
+            raise AssertionError("condição não atendida a tempo")
+        await asyncio.sleep(0.05)
+
+
+async def posicionar(barramento: BarramentoEventos, modelo):
+    """
+    Grava o ponto atual do change stream como token de retomada, para que o barramento
+    receba todos os eventos a partir daqui mesmo que ainda esteja abrindo o stream.
+    """
+    colecao = modelo.get_pymongo_collection()
+    async with await colecao.watch() as stream:
+        await stream.try_next()
+        await barramento._gravar_token(colecao.name, stream.resume_token)
+
+
+def autor(indice: int) -> dict:
+    return {"nome": f"Autor {indice}", "matricula": f"M{indice:06d}", "posto": "Cabo", "lotacao": "Delegacia 1", "versao": 0}
+
+
+def declarante(indice: int) -> dict:
+    return {"nome": f"Declarante {indice}", "cpf": f"{indice:011d}", "endereco": "Rua 1", "tipo_envolvimento": "Vítima"}
+
+
+def test_entrega_eventos_e_grava_token():
+    async def cenario(client):
+        barramento = BarramentoEventos("teste", tamanho_lote=100, intervalo_lote_ms=50, fila_maxima=100)
+        recebidos = []
+
+        async def registrar(eventos):
+            recebidos.extend(eventos)
+
+        async def falhar(eventos):
+            raise RuntimeError("tratador com defeito")
+
+        barramento.assinar(Autor, registrar)
+        barramento.assinar(Autor, falhar)
+        await posicionar(barramento, Autor)
+        assert await barramento.iniciar(client)
+        try:
+            colecao = Autor.get_pymongo_collection()
+            inserido = (await colecao.insert_one(autor(1))).inserted_id
+            await colecao.update_one({"_id": inserido}, {"$set": {"posto": "Sargento"}})
+            await colecao.delete_one({"_id": inserido})
+
+            await ate(lambda: len(recebidos) == 3)
+            assert [e["operationType"] for e in recebidos] == ["insert", "update", "delete"]
+            assert {e["documentKey"]["_id"] for e in recebidos} == {inserido}
+
+            # A falha de um tratador é contada, mas não impede os demais nem o avanço do token.
+            assert barramento.metricas()["falhas"]["autor"] >= 1
+
+            async def token_gravado():
+                return await barramento._token(colecao.name) == recebidos[-1]["_id"]
+
+            await ate(token_gravado)
+            assert await TokenRetomada.find(TokenRetomada.stream == "teste:autor").count() == 1
+        finally:
+            await barramento.parar()
+
+    executar(cenario)
+
+
+def test_lotes_e_back_pressure():
+    async def cenario(client):
+        barramento = BarramentoEventos("teste", tamanho_lote=10, intervalo_lote_ms=200, fila_maxima=5)
+        lotes = []
+        liberado = asyncio.Event()
+
+        async def tratador(eventos):
+            lotes.append(eventos)
+            await liberado.wait()
+
+        barramento.assinar(Autor, tratador)
+        await posicionar(barramento, Autor)
+        assert await barramento.iniciar(client)
+        try:
+            resultado = await Autor.get_pymongo_collection().insert_many([autor(i) for i in range(40)])
+
+            # Com o tratador parado, a fila enche e a leitura do stream pausa.
+            await ate(lambda: lotes)
+            await asyncio.sleep(0.5)
+            assert len(lotes) == 1
+            assert barramento.metricas()["pendentes"]["autor"] <= 5
+
+            liberado.set()
+            await ate(lambda: sum(len(lote) for lote in lotes) == 40)
+            assert all(len(lote) <= 10 for lote in lotes)
+            recebidos = [e["documentKey"]["_id"] for lote in lotes for e in lote]
+            assert recebidos == resultado.inserted_ids
+            assert barramento.metricas()["lotes"]["autor"] == len(lotes)
+        finally:
+            await barramento.parar()
+
+    executar(cenario)
+
+
+def test_retoma_do_token_gravado():
+    async def cenario(client):
+        colecao = Autor.get_pymongo_collection()
+        recebidos = []
+
+        async def registrar(eventos):
+            recebidos.extend(e["documentKey"]["_id"] for e in eventos)
+
+        primeiro = BarramentoEventos("teste", tamanho_lote=100, intervalo_lote_ms=50, fila_maxima=100)
+        primeiro.assinar(Autor, registrar)
+        await posicionar(primeiro, Autor)
+        assert await primeiro.iniciar(client)
+        try:
+            antes = (await colecao.insert_one(autor(1))).inserted_id
+            await ate(lambda: recebidos == [antes])
+
+            async def token_gravado():
+                return await primeiro._token(colecao.name) is not None
+
+            await ate(token_gravado)
+        finally:
+            await primeiro.parar()
+
+        # Escritas com o barramento parado são entregues quando ele volta, a partir do token gravado.
+        durante = (await colecao.insert_one(autor(2))).inserted_id
+        recebidos.clear()
+
+        segundo = BarramentoEventos("teste", tamanho_lote=100, intervalo_lote_ms=50, fila_maxima=100)
+        segundo.assinar(Autor, registrar)
+        assert await segundo.iniciar(client)
+        try:
+            depois = (await colecao.insert_one(autor(3))).inserted_id
+            await ate(lambda: len(recebidos) == 2)
+            assert recebidos == [durante, depois]
+        finally:
+            await segundo.parar()
+
+    executar(cenario)
+
+
+def test_invalida_cache_em_escrita_direta_no_banco():
+    async def cenario(client):
+        colecao = Autor.get_pymongo_collection()
+        id_autor = (await colecao.insert_one(autor(1))).inserted_id
+        cache_autores._gravar(id_autor, Autor(id=id_autor, **autor(1)))
+
+        barramento = BarramentoEventos("teste", tamanho_lote=100, intervalo_lote_ms=50, fila_maxima=100)
+        barramento.assinar(Autor, invalidar_autores)
+        await posicionar(barramento, Autor)
+        assert await barramento.iniciar(client)
+        try:
+            await colecao.update_one({"_id": id_autor}, {"$set": {"lotacao": "Delegacia 2"}})
+            await ate(lambda: cache_autores._ler(id_autor) is _AUSENTE)
+        finally:
+            await barramento.parar()
+            cache_autores.limpar()
+
+    executar(cenario)
+
+
+def test_contador_de_boletins_nao_invalida_declarantes():
+    async def cenario(client):
+        colecao = Declarante.get_pymongo_collection()
+        id_autor = (await Autor.get_pymongo_collection().insert_one(autor(1))).inserted_id
+        id_declarante = (await colecao.insert_one(declarante(1))).inserted_id
+        cache_declarantes._gravar(id_declarante, Declarante(id=id_declarante, **declarante(1)))
+
+        recebidos = []
+
+        async def registrar(eventos):
+            recebidos.extend(eventos)
+
+        barramento = BarramentoEventos("teste", tamanho_lote=100, intervalo_lote_ms=50, fila_maxima=100)
+        barramento.assinar(Declarante, registrar)
+        barramento.assinar(Declarante, invalidar_declarantes)
+        await posicionar(barramento, Declarante)
+        assert await barramento.iniciar(client)
+        try:
+            # Gravar um boletim só incrementa quantidade_boletins do declarante: o cache continua valendo.
+            boletim = BoletimOcorrencia(
+                tipo_ocorrencia=TipoOcorrencia.FURTO,
+                status=StatusBoletim.REGISTRADO,
+                autor=await Autor.get(id_autor),
+                declarantes=[await Declarante.get(id_declarante)],
+            )
+            await boletim.insert()
+            await RankingService().aplicar_alteracoes([(None, boletim)])
+
+            await ate(lambda: len(recebidos) == 1)
+            assert recebidos[0]["updateDescription"]["updatedFields"] == {"quantidade_boletins": 1}
+            await ate(lambda: barramento.metricas()["lotes"].get("declarantes") == 1)
+            assert cache_declarantes._ler(id_declarante) is not _AUSENTE
+
+            # Qualquer outro campo alterado descarta a cópia local.
+            await colecao.update_one({"_id": id_declarante}, {"$set": {"endereco": "Rua 2"}})
+            await ate(lambda: cache_declarantes._ler(id_declarante) is _AUSENTE)
+        finally:
+            await barramento.parar()
+            cache_declarantes.limpar()
+
+    executar(cenario)
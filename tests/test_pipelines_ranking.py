@@ -0,0 +1,17 @@
+import pytest
+
+from schemas.autor import AutorRanking
+from schemas.declarante import DeclaranteNumerosDeRegistros, DeclaranteResponse
+from service.autor import AutorService
+from service.declarante import DeclaranteService
+
+
+@pytest.mark.parametrize("pipeline, resposta", [
+    (AutorService().pipeline_ranking_autores(0, 10), AutorRanking),
+    (DeclaranteService().pipeline_ranking_declarantes(0, 10), DeclaranteNumerosDeRegistros),
+    (DeclaranteService().pipeline_reincidentes_por_tipo(0, 10), DeclaranteResponse),
+    (DeclaranteService().pipeline_sem_boletim(0, 10), DeclaranteNumerosDeRegistros),
+])
+def test_pipelines_projetam_todos_os_campos_da_resposta(pipeline, resposta):
+    # Campos com valor padrão (como versao) sairiam zerados se o $project os deixasse de fora.
+    assert set(resposta.model_fields) <= set(pipeline[-1]["$project"])
@@ -0,0 +1,21 @@
+import pytest
+from pydantic import ValidationError
+
+from config.settings import DatabaseSettings
+
+
+@pytest.mark.parametrize("valor", [None, -1, 90, 600])
+def test_max_staleness_aceita_valores_do_mongodb(valor):
+    assert DatabaseSettings(analytics_max_staleness_s=valor).analytics_max_staleness_s == valor
+
+
+@pytest.mark.parametrize("valor", [0, 1, 89, -5])
+def test_max_staleness_rejeita_valores_abaixo_de_90(valor):
+    with pytest.raises(ValidationError, match="pelo menos 90"):
+        DatabaseSettings(analytics_max_staleness_s=valor)
+
+
+def test_max_staleness_validado_ao_ler_do_ambiente(monkeypatch):
+    monkeypatch.setenv("MONGODB_ANALYTICS_MAX_STALENESS_S", "30")
+    with pytest.raises(ValidationError):
+        DatabaseSettings()